@@ -0,0 +1,4 @@
+"""Micro-benchmarks for sandbox hot paths.
+
+Run from packages/modal-infra, e.g. ``python -m benchmarks.bench_sse_parser``.
+"""
@@ -0,0 +1,101 @@
+"""
+Measure JSON codec cost per streamed token for each available backend.
+
+For every text part update in a synthetic OpenCode turn the bridge parses the
+SSE payload, serializes the outbound token event and formats at least one
+structured log line. This benchmark times that work with the codec bound to
+orjson, msgspec and the stdlib in turn (backends that are not installed are
+skipped).
+
+Usage:
+    python -m benchmarks.bench_codec [--tokens N]
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+import time
+
+from benchmarks.traces import opencode_turn
+from src.sandbox import codec, log_config
+
+_BACKEND_BLOCKS = {
+    "orjson": [],
+    "msgspec": ["orjson"],
+    "json": ["orjson", "msgspec"],
+}
+
+
+def _load_backend(name: str) -> bool:
+    saved = {mod: sys.modules.get(mod) for mod in _BACKEND_BLOCKS[name]}
+    try:
+        for mod in saved:
+            sys.modules[mod] = None  # type: ignore[assignment]
+        importlib.reload(codec)
+    finally:
+        for mod, module in saved.items():
+            if module is None:
+                sys.modules.pop(mod, None)
+            else:
+                sys.modules[mod] = module
+    return name == codec.BACKEND
+
+
+def _per_token_work(payloads: list[str], formatter: logging.Formatter) -> int:
+    tokens = 0
+    for data in payloads:
+        event = codec.loads(data)
+        part = event["properties"]["part"]
+        if part["type"] != "text":
+            continue
+        codec.dumps(
+            {
+                "type": "token",
+                "content": part["text"],
+                "messageId": "cp-msg-1",
+                "sandboxId": "sb-bench",
+                "timestamp": 1_760_000_000.0,
+            }
+        )
+        record = logging.LogRecord("bridge", logging.DEBUG, __file__, 0, "bridge.part", None, None)
+        record.__dict__.update(part_type="text", part_id=part["id"], text_len=len(part["text"]))
+        formatter.format(record)
+        tokens += 1
+    return tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    events = opencode_turn(tokens=args.tokens)
+    payloads = [json.dumps(e) for e in events if e["type"] == "message.part.updated"]
+    formatter = log_config.JSONFormatter()
+
+    print(f"{args.tokens} text updates, {sum(map(len, payloads)) / 1e6:.1f} MB of SSE payload")
+    print(f"{'backend':<10}{'total (ms)':>12}{'per token (us)':>16}{'vs json':>10}")
+    baseline = None
+    results = []
+    for name in ("json", "msgspec", "orjson"):
+        if not _load_backend(name):
+            print(f"{name:<10}{'not installed':>12}")
+            continue
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            tokens = _per_token_work(payloads, formatter)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        results.append((name, best, tokens))
+    for name, best, tokens in results:
+        print(f"{name:<10}{best * 1e3:>12.1f}{best / tokens * 1e6:>16.2f}{baseline / best:>9.1f}x")
+
+    importlib.reload(codec)
+
+
+if __name__ == "__main__":
+    main()
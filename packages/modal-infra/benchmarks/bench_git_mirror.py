@@ -0,0 +1,114 @@
+"""
+Compare sandbox clone time with and without a git mirror.
+
+"origin" is a shallow clone straight from the upstream URL, as sandboxes did
+before mirrors. "mirror" is what the supervisor does when the volume holds a
+mirror: a shallow clone from the mirror's local path, then a fetch from the
+upstream URL for the commits the mirror is missing (--behind N leaves the
+mirror N commits stale, as it would be between scheduler refreshes).
+
+Without --url the upstream is a synthetic local repository, which shows the
+local-copy cost but not network transfer; pass a real remote URL to measure
+what the mirror saves against GitHub.
+
+Usage:
+    python -m benchmarks.bench_git_mirror [--url URL] [--files N] [--file-kb KB] [--behind N] [--runs N]
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from src.sandbox.git_mirror import mirror_clone_url, refresh_mirror
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+
+def git(*args: str, cwd: Path | None = None) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, env=GIT_ENV)
+
+
+def commit(repo: Path, message: str) -> None:
+    git("add", "-A", cwd=repo)
+    git("-c", "commit.gpgsign=false", "commit", "-q", "-m", message, cwd=repo)
+
+
+def synthetic_upstream(path: Path, files: int, file_kb: int) -> None:
+    """A repository with incompressible files, so transfer size is realistic."""
+    git("init", "-q", "-b", "main", str(path))
+    for n in range(files):
+        (path / f"file-{n:05}.bin").write_bytes(os.urandom(file_kb * 1024))
+    commit(path, "initial")
+
+
+def add_commits(path: Path, count: int) -> None:
+    for n in range(count):
+        (path / f"change-{n:03}.txt").write_text(f"change {n}\n" * 100)
+        commit(path, f"change {n}")
+
+
+def clone_from_origin(url: str, dest: Path) -> None:
+    git("clone", "-q", "--depth", "1", url, str(dest))
+
+
+def clone_from_mirror(url: str, mirror: Path, dest: Path) -> None:
+    git("clone", "-q", "--depth", "1", mirror_clone_url(mirror), str(dest))
+    git("remote", "set-url", "origin", url, cwd=dest)
+    git("fetch", "-q", "origin", cwd=dest)
+
+
+def timed(run, runs: int) -> float:
+    """Best of runs, in seconds; run receives a fresh destination directory."""
+    best = float("inf")
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as scratch:
+            start = time.perf_counter()
+            run(Path(scratch) / "checkout")
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="upstream to clone (default: synthetic local repo)")
+    parser.add_argument("--files", type=int, default=2000, help="synthetic repo file count")
+    parser.add_argument("--file-kb", type=int, default=16, help="synthetic repo file size")
+    parser.add_argument("--behind", type=int, default=5, help="commits the mirror lags by")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        root = Path(scratch)
+        url = args.url
+        if url is None:
+            upstream = root / "upstream"
+            synthetic_upstream(upstream, args.files, args.file_kb)
+            url = f"file://{upstream}"
+
+        start = time.perf_counter()
+        mirror = refresh_mirror("bench", "repo", url, root=root / "mirrors").path
+        print(f"mirror created in {time.perf_counter() - start:.2f}s")
+        if args.url is None and args.behind:
+            add_commits(upstream, args.behind)
+            print(f"upstream moved {args.behind} commits past the mirror")
+
+        origin_s = timed(lambda dest: clone_from_origin(url, dest), args.runs)
+        mirror_s = timed(lambda dest: clone_from_mirror(url, mirror, dest), args.runs)
+
+        print(f"{'clone source':<28}{'best (s)':>10}")
+        print(f"{'origin':<28}{origin_s:>10.2f}")
+        print(f"{'mirror + delta fetch':<28}{mirror_s:>10.2f}")
+        print(f"speedup: {origin_s / mirror_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare the incremental SSEParser with the previous str-splitting parser.
+
+The previous implementation appended each chunk to a str and called
+``buffer.split("\\n\\n", 1)`` per event, re-copying the remaining buffer every
+time. That is quadratic when OpenCode flushes many events in one large chunk.
+
+Usage:
+    python -m benchmarks.bench_sse_parser [--events N]
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable, Iterable
+
+from src.sandbox.sse import SSEParser
+
+
+def legacy_parse(chunks: Iterable[str]) -> int:
+    """The pre-SSEParser algorithm from AgentBridge._parse_sse_stream."""
+    count = 0
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while "\n\n" in buffer:
+            event_str, buffer = buffer.split("\n\n", 1)
+            data_lines = []
+            for line in event_str.split("\n"):
+                if line.startswith("data:"):
+                    data_content = line[5:].lstrip()
+                    if data_content:
+                        data_lines.append(data_content)
+            if data_lines:
+                "\n".join(data_lines)
+                count += 1
+    return count
+
+
+def incremental_parse(chunks: Iterable[bytes]) -> int:
+    parser = SSEParser()
+    count = 0
+    for chunk in chunks:
+        count += len(parser.feed(chunk))
+    return count
+
+
+def build_stream(num_events: int) -> str:
+    """A burst of text deltas interleaved with large tool outputs."""
+    parts = []
+    for i in range(num_events):
+        if i % 50 == 0:
+            payload = {
+                "type": "message.part.updated",
+                "properties": {
+                    "part": {
+                        "type": "tool",
+                        "callID": f"call-{i}",
+                        "state": {"status": "completed", "output": "x" * 8000},
+                    }
+                },
+            }
+        else:
+            payload = {
+                "type": "message.part.updated",
+                "properties": {
+                    "part": {"type": "text", "id": "prt_1", "text": "..."},
+                    "delta": f"token {i} ",
+                },
+            }
+        parts.append(f"data: {json.dumps(payload)}\n\n")
+    return "".join(parts)
+
+
+def chunked(data: str | bytes, size: int) -> list:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def timed(fn: Callable[[], int], repeat: int = 3) -> tuple[float, int]:
+    best = float("inf")
+    result = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    text = build_stream(args.events)
+    raw = text.encode()
+    print(f"{args.events} events, {len(raw) / 1e6:.1f} MB")
+    print(f"{'scenario':<28}{'legacy (s)':>12}{'SSEParser (s)':>15}{'speedup':>10}")
+
+    for label, size in (
+        ("single flush", len(raw)),
+        ("64 KiB chunks", 64 * 1024),
+        ("4 KiB chunks", 4 * 1024),
+        ("256 B chunks", 256),
+    ):
+        legacy_s, legacy_n = timed(lambda size=size: legacy_parse(chunked(text, size)))
+        new_s, new_n = timed(lambda size=size: incremental_parse(chunked(raw, size)))
+        assert legacy_n == new_n == args.events
+        print(f"{label:<28}{legacy_s:>12.3f}{new_s:>15.3f}{legacy_s / new_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
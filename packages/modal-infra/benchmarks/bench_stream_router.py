@@ -0,0 +1,104 @@
+"""
+Measure how fast the bridge routes OpenCode events for a prompt.
+
+Feeds a synthetic turn with heavy sub-task traffic (child sessions streaming
+text and tools, unrelated sessions, heartbeats) straight into
+AgentBridge._stream_opencode_response_sse and reports events per second.
+The HTTP client and event subscription are stubbed, so the number reflects
+only the per-event routing and bookkeeping in the stream loop (including the
+DEBUG log lines it formats, which are written to /dev/null).
+
+Usage:
+    python -m benchmarks.bench_stream_router [--tokens N] [--children N]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from benchmarks.traces import PARENT_ID, SESSION_ID, subtask_turn
+from src.sandbox.bridge import AgentBridge, OpenCodeIdentifier
+from src.sandbox.log_config import JSONFormatter
+
+
+class _Response:
+    def __init__(self, status_code: int, data: Any = None):
+        self.status_code = status_code
+        self._data = data
+        self.text = ""
+
+    def json(self) -> Any:
+        return self._data
+
+
+class _HttpClient:
+    async def post(self, url: str, json: Any = None, timeout: float = 0) -> _Response:
+        return _Response(204)
+
+    async def get(self, url: str, timeout: float = 0) -> _Response:
+        return _Response(200, [])
+
+
+def _make_bridge(events: list[dict[str, Any]]) -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="sb-bench",
+        session_id="bench",
+        control_plane_url="http://localhost:8787",
+        auth_token="bench",
+    )
+    bridge.opencode_session_id = SESSION_ID
+    bridge.http_client = _HttpClient()  # type: ignore[assignment]
+
+    async def ensure_event_stream() -> None:
+        return None
+
+    async def iter_events(queue: Any, timeout_ctx: Any) -> AsyncIterator[dict[str, Any]]:
+        for event in events:
+            yield event
+
+    bridge._ensure_event_stream = ensure_event_stream  # type: ignore[method-assign]
+    bridge._iter_subscribed_events = iter_events  # type: ignore[method-assign]
+    return bridge
+
+
+async def _run_once(events: list[dict[str, Any]]) -> tuple[float, int]:
+    bridge = _make_bridge(events)
+    start = time.perf_counter()
+    emitted = 0
+    async for _ in bridge._stream_opencode_response_sse("cp-msg-1", "prompt"):
+        emitted += 1
+    return time.perf_counter() - start, emitted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Keep log formatting in the measurement (the sandbox logs at DEBUG) but discard the output
+    handler = logging.StreamHandler(open(os.devnull, "w"))  # noqa: SIM115
+    handler.setFormatter(JSONFormatter())
+    logging.root.handlers = [handler]
+    logging.root.setLevel(logging.DEBUG)
+
+    OpenCodeIdentifier.ascending = classmethod(lambda _cls, _prefix: PARENT_ID)  # type: ignore[method-assign,assignment]
+    events = subtask_turn(tokens=args.tokens, children=args.children)
+
+    best = float("inf")
+    emitted = 0
+    for _ in range(args.repeat):
+        elapsed, emitted = asyncio.run(_run_once(events))
+        best = min(best, elapsed)
+
+    print(f"{len(events)} events in, {emitted} events out")
+    print(f"best of {args.repeat}: {best * 1e3:.1f} ms, {len(events) / best:,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
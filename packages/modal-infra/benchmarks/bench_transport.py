@@ -0,0 +1,140 @@
+"""
+Compare bytes on the wire and encoding CPU for each WebSocket transport mode.
+
+Replays the outbound events the bridge produces for a synthetic OpenCode turn
+(token updates, cumulative or delta-encoded, plus tool_call status changes with
+large outputs, optionally with repeated outputs replaced by blob references)
+through every frame encoding the bridge can negotiate, and through a
+simulation of handshake-level permessage-deflate as websockets implements it
+(one shared compression context, sync flush per message).
+
+Usage:
+    python -m benchmarks.bench_transport [--tokens N] [--threshold BYTES] [--token-delta] [--blob-dedup]
+"""
+
+import argparse
+import time
+import zlib
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.traces import opencode_turn
+from src.sandbox import codec, transport
+from src.sandbox.blobs import BlobCache, blob_digest
+from src.sandbox.bridge import AgentBridge
+from src.sandbox.transport import FrameEncoder
+
+
+def outbound_events(tokens: int, token_delta: bool) -> list[dict[str, Any]]:
+    """Map OpenCode events to the bridge's outbound events."""
+    events = []
+    for event in opencode_turn(tokens=tokens):
+        part = event["properties"].get("part")
+        if not part:
+            continue
+        base = {"messageId": "cp-msg-1", "sandboxId": "sb-bench", "timestamp": 1_760_000_000.0}
+        if part["type"] == "text":
+            if token_delta:
+                token = {"delta": event["properties"]["delta"], "partId": part["id"]}
+            else:
+                token = {"content": part["text"]}
+            events.append({"type": "token", **token, **base})
+        elif part["type"] == "tool":
+            state = part["state"]
+            events.append(
+                {
+                    "type": "tool_call",
+                    "tool": part["tool"],
+                    "args": state.get("input", {}),
+                    "callId": part["callID"],
+                    "status": state["status"],
+                    "output": state.get("output", ""),
+                    **base,
+                }
+            )
+    return events
+
+
+def dedup_blobs(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Apply blob_dedup as the bridge does, assuming every blob is acked at once."""
+    cache = BlobCache(AgentBridge.BLOB_CACHE_MAX_ENTRIES)
+    deduped = []
+    for seq, event in enumerate(events):
+        output = event.get("output")
+        if isinstance(output, str) and len(output) >= AgentBridge.BLOB_MIN_CHARS:
+            digest = blob_digest(output)
+            if not cache.known(digest):
+                deduped.append({"type": "blob", "hash": digest, "data": output})
+                cache.sent(digest, seq)
+                cache.ack(seq)
+            event = {k: v for k, v in event.items() if k != "output"}
+            event["blobRefs"] = {"output": digest}
+        deduped.append(event)
+    return deduped
+
+
+def permessage_deflate() -> Callable[[dict[str, Any]], bytes]:
+    compressor = zlib.compressobj(
+        wbits=-AgentBridge.WS_DEFLATE_WINDOW_BITS, memLevel=AgentBridge.WS_DEFLATE_MEM_LEVEL
+    )
+
+    def encode(event: dict[str, Any]) -> bytes:
+        data = compressor.compress(codec.dumps_bytes(event)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data[:-4]  # websockets strips the 00 00 ff ff tail
+
+    return encode
+
+
+def frame_mode(**kwargs: Any) -> Callable[[dict[str, Any]], str | bytes]:
+    return FrameEncoder(
+        compress_level=AgentBridge.FRAME_COMPRESS_LEVEL,
+        window_bits=AgentBridge.WS_DEFLATE_WINDOW_BITS,
+        mem_level=AgentBridge.WS_DEFLATE_MEM_LEVEL,
+        **kwargs,
+    ).encode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument("--threshold", type=int, default=AgentBridge.FRAME_COMPRESS_THRESHOLD)
+    parser.add_argument("--token-delta", action="store_true", help="send tokens as deltas")
+    parser.add_argument("--blob-dedup", action="store_true", help="send repeated outputs once")
+    args = parser.parse_args()
+
+    events = outbound_events(args.tokens, args.token_delta)
+    if args.blob_dedup:
+        events = dedup_blobs(events)
+    modes: list[tuple[str, Callable[[], Callable[[dict[str, Any]], str | bytes]]]] = [
+        ("json text (default)", lambda: frame_mode()),
+        ("permessage-deflate", permessage_deflate),
+        ("frame_deflate", lambda: frame_mode(deflate=True, compress_threshold=args.threshold)),
+    ]
+    if transport.MSGPACK_AVAILABLE:
+        modes += [
+            ("frame_msgpack", lambda: frame_mode(use_msgpack=True)),
+            (
+                "frame_msgpack+deflate",
+                lambda: frame_mode(
+                    deflate=True, use_msgpack=True, compress_threshold=args.threshold
+                ),
+            ),
+        ]
+
+    print(f"{len(events)} outbound events, compress threshold {args.threshold} B")
+    print(f"{'mode':<24}{'wire (MB)':>10}{'ratio':>8}{'CPU/event (us)':>16}")
+    baseline = None
+    for name, factory in modes:
+        encode = factory()
+        start = time.perf_counter()
+        wire = sum(len(encode(event)) for event in events)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or wire
+        print(
+            f"{name:<24}{wire / 1e6:>10.2f}{wire / baseline:>8.2f}"
+            f"{elapsed / len(events) * 1e6:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Synthetic OpenCode event traces shared by the benchmarks.
+
+The payloads mirror the shape of what `opencode serve` emits on /event for a
+typical coding turn: a message.updated header, a long run of text part
+updates carrying both the cumulative text and the delta, tool parts moving
+through pending/running/completed with sizeable outputs, step markers and a
+final session.idle.
+"""
+
+import json
+from typing import Any
+
+SESSION_ID = "ses_bench000000000000000000"
+MESSAGE_ID = "msg_bench000000000000000001"
+PARENT_ID = "msg_bench000000000000000000"
+
+_SENTENCE = (
+    "the bridge forwards each token to the control plane which fans it out to "
+    "every connected client while the agent keeps editing files and running "
+    "tests in the sandbox workspace"
+)
+_WORDS = _SENTENCE.split()
+
+
+def _message_updated(
+    session_id: str = SESSION_ID, message_id: str = MESSAGE_ID, parent_id: str = PARENT_ID
+) -> dict[str, Any]:
+    return {
+        "type": "message.updated",
+        "properties": {
+            "info": {
+                "id": message_id,
+                "role": "assistant",
+                "sessionID": session_id,
+                "parentID": parent_id,
+                "modelID": "bench-model",
+                "providerID": "bench",
+                "time": {"created": 1_760_000_000_000},
+            }
+        },
+    }
+
+
+def _text_update(
+    part_id: str,
+    text: str,
+    delta: str,
+    session_id: str = SESSION_ID,
+    message_id: str = MESSAGE_ID,
+) -> dict[str, Any]:
+    return {
+        "type": "message.part.updated",
+        "properties": {
+            "part": {
+                "id": part_id,
+                "sessionID": session_id,
+                "messageID": message_id,
+                "type": "text",
+                "text": text,
+                "time": {"start": 1_760_000_000_000},
+            },
+            "delta": delta,
+        },
+    }
+
+
+def _tool_update(
+    call_id: str,
+    status: str,
+    output: str = "",
+    session_id: str = SESSION_ID,
+    message_id: str = MESSAGE_ID,
+    tool: str = "read",
+    metadata: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    state: dict[str, Any] = {
+        "status": status,
+        "input": {"filePath": "/workspace/repo/src/module.py", "offset": 0, "limit": 400},
+    }
+    if status == "running":
+        state["title"] = "src/module.py"
+    if status == "completed":
+        state["output"] = output
+        state["metadata"] = {"preview": output[:200], "truncated": False}
+    part: dict[str, Any] = {
+        "id": f"prt_{call_id}",
+        "sessionID": session_id,
+        "messageID": message_id,
+        "type": "tool",
+        "callID": call_id,
+        "tool": tool,
+        "state": state,
+    }
+    if metadata is not None:
+        part["metadata"] = metadata
+    return {"type": "message.part.updated", "properties": {"part": part}}
+
+
+def opencode_turn(tokens: int = 2000, tool_every: int = 200) -> list[dict[str, Any]]:
+    """Build the events of one assistant turn with `tokens` text deltas."""
+    events = [_message_updated()]
+    text = ""
+    part_index = 0
+    for i in range(tokens):
+        if i and i % tool_every == 0:
+            call_id = f"call_{i:06d}"
+            output = "\n".join(f"{n:5d}\t{' '.join(_WORDS[:8])}" for n in range(200))
+            events.append(_tool_update(call_id, "pending"))
+            events.append(_tool_update(call_id, "running"))
+            events.append(_tool_update(call_id, "completed", output))
+            part_index += 1
+            text = ""
+        delta = _WORDS[i % len(_WORDS)] + " "
+        text += delta
+        events.append(_text_update(f"prt_text_{part_index:04d}", text, delta))
+    events.append({"type": "session.idle", "properties": {"sessionID": SESSION_ID}})
+    return events
+
+
+def subtask_turn(
+    tokens: int = 2000, children: int = 4, foreign_sessions: int = 2
+) -> list[dict[str, Any]]:
+    """Build a turn where the agent delegates to sub-task sessions.
+
+    The parent streams `tokens` text deltas while each child session runs
+    tools and streams its own text, other sessions on the same OpenCode server
+    emit unrelated traffic, and heartbeats arrive throughout.
+    """
+    events = [_message_updated()]
+    child_ids = [f"ses_child{n:018d}" for n in range(children)]
+    foreign_ids = [f"ses_other{n:018d}" for n in range(foreign_sessions)]
+    output = "\n".join(f"{n:5d}\t{' '.join(_WORDS[:8])}" for n in range(50))
+
+    for n, child_id in enumerate(child_ids):
+        events.append(
+            _tool_update(
+                f"call_task_{n}",
+                "running",
+                tool="task",
+                metadata={"sessionId": child_id},
+            )
+        )
+        events.append(
+            {
+                "type": "session.created",
+                "properties": {"info": {"id": child_id, "parentID": SESSION_ID}},
+            }
+        )
+        events.append(
+            _message_updated(session_id=child_id, message_id=f"msg_{child_id}", parent_id="x")
+        )
+
+    texts: dict[str, str] = {}
+    for i in range(tokens):
+        delta = _WORDS[i % len(_WORDS)] + " "
+        texts[SESSION_ID] = texts.get(SESSION_ID, "") + delta
+        events.append(_text_update("prt_text_parent", texts[SESSION_ID], delta))
+
+        for session_id in (*child_ids, *foreign_ids):
+            texts[session_id] = texts.get(session_id, "") + delta
+            events.append(
+                _text_update(
+                    f"prt_text_{session_id}",
+                    texts[session_id],
+                    delta,
+                    session_id=session_id,
+                    message_id=f"msg_{session_id}",
+                )
+            )
+        if i % 50 == 0:
+            for session_id in child_ids:
+                for status in ("pending", "running", "completed"):
+                    events.append(
+                        _tool_update(
+                            f"call_{session_id}_{i}",
+                            status,
+                            output,
+                            session_id=session_id,
+                            message_id=f"msg_{session_id}",
+                        )
+                    )
+        if i % 100 == 0:
+            events.append({"type": "server.heartbeat", "properties": {}})
+
+    events.append({"type": "session.idle", "properties": {"sessionID": SESSION_ID}})
+    return events
+
+
+def as_sse(events: list[dict[str, Any]]) -> bytes:
+    """Encode events the way OpenCode writes them to the /event stream."""
+    return "".join(f"data: {json.dumps(e)}\n\n" for e in events).encode()
@@ -39,6 +39,7 @@ base_image = (
         "openssh-client",
         "jq",
         "unzip",  # Required for Bun installation
+        "zstd",  # Setup cache archives (sandbox/setup_cache.py)
         # For Playwright
         "libnss3",
         "libnspr4",
@@ -84,6 +85,8 @@ base_image = (
         "playwright",
         "pydantic>=2.0",  # Required for sandbox types
         "PyJWT[crypto]",  # For GitHub App token generation (includes cryptography)
+        "orjson",  # Fast JSON codec for bridge/supervisor hot paths (sandbox/codec.py)
+        "msgpack",  # Optional binary frame encoding (sandbox/transport.py)
     )
     # Install OpenCode CLI and plugin for custom tools
     # CACHE_BUSTER is embedded in a no-op echo so Modal invalidates this layer on bump.
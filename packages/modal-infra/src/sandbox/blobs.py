@@ -0,0 +1,71 @@
+"""
+Content-addressed tracking of large payloads already sent to the control plane.
+
+Agents re-read the same files and re-run the same commands, so identical
+tool outputs show up many times in one session. With ``blob_dedup``
+negotiated, the bridge sends each large payload once as a ``blob`` event and
+replaces it in later events with a reference to its hash. This module only
+tracks which hashes the control plane holds (or will hold once in-flight
+events are delivered); it never keeps the payloads themselves.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+
+def blob_digest(data: str) -> str:
+    """Content hash of a payload: the first 32 hex digits of its SHA-256."""
+    return hashlib.sha256(data.encode("utf-8", "surrogatepass")).hexdigest()[:32]
+
+
+class BlobCache:
+    """Hashes of blobs sent to the control plane.
+
+    Blobs start out in flight, tied to the sequence number of the blob event
+    that carries them. Acknowledging that sequence number moves them into an
+    LRU of confirmed hashes capped at max_entries.
+
+    Usage:
+        cache = BlobCache(max_entries=4096)
+        if not cache.known(digest):
+            seq = send_blob(digest, data)
+            cache.sent(digest, seq)
+        cache.ack(seq)             # control plane stored everything up to seq
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._acked: OrderedDict[str, None] = OrderedDict()
+        self._in_flight: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._acked) + len(self._in_flight)
+
+    def known(self, digest: str) -> bool:
+        """Whether the control plane holds, or is about to receive, this blob."""
+        if digest in self._acked:
+            self._acked.move_to_end(digest)
+            return True
+        return digest in self._in_flight
+
+    def sent(self, digest: str, seq: int) -> None:
+        self._in_flight[digest] = seq
+
+    def ack(self, seq: int) -> None:
+        """Confirm every in-flight blob sent at or before seq."""
+        if not self._in_flight:
+            return
+        for digest, blob_seq in list(self._in_flight.items()):
+            if blob_seq <= seq:
+                del self._in_flight[digest]
+                self._acked[digest] = None
+        while len(self._acked) > self.max_entries:
+            self._acked.popitem(last=False)
+
+    def forget(self, digest: str) -> None:
+        self._acked.pop(digest, None)
+        self._in_flight.pop(digest, None)
+
+    def drop_in_flight(self) -> None:
+        """Forget unconfirmed blobs, e.g. after their events were evicted undelivered."""
+        self._in_flight.clear()
@@ -11,13 +11,15 @@ This module handles:
 
 import argparse
 import asyncio
-import json
+import contextlib
+import hashlib
 import os
+import resource
 import secrets
-import subprocess
 import tempfile
 import time
-from collections.abc import AsyncIterator
+from collections import deque
+from collections.abc import AsyncIterator, Callable
 from pathlib import Path
 from typing import Any, ClassVar
 
@@ -25,8 +27,18 @@ import httpx
 import websockets
 from websockets import ClientConnection, State
 from websockets.exceptions import InvalidStatus
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
 
+from . import codec
+from .blobs import BlobCache, blob_digest
+from .git import GitCommandError, GitService
+from .inflight import InflightPrompt
+from .journal import EventJournal
 from .log_config import configure_logging, get_logger
+from .metrics import DURATION_BUCKETS, MetricsRegistry, serve_metrics
+from .pending_parts import PendingParts
+from .sse import SSEParser
+from .transport import MSGPACK_AVAILABLE, FrameEncoder
 from .types import GitUser
 
 configure_logging()
@@ -108,6 +120,263 @@ class SessionTerminatedError(Exception):
     pass
 
 
+class BridgeMetrics:
+    """The bridge's metrics, registered on one MetricsRegistry."""
+
+    __slots__ = (
+        "outbound_depth",
+        "prompt_duration",
+        "prompt_queue_depth",
+        "prompts",
+        "reconciles",
+        "reconnects",
+        "registry",
+        "send_latency",
+        "sse_events",
+        "sse_resumptions",
+        "time_to_first_token",
+        "ws_bytes_sent",
+        "ws_frames_sent",
+    )
+
+    def __init__(self) -> None:
+        registry = self.registry = MetricsRegistry()
+        self.sse_events = registry.counter(
+            "bridge_sse_events_total", "OpenCode events received, by type", label="type"
+        )
+        self.ws_frames_sent = registry.counter(
+            "bridge_ws_frames_sent_total", "WebSocket frames sent to the control plane"
+        )
+        self.ws_bytes_sent = registry.counter(
+            "bridge_ws_bytes_sent_total",
+            "Payload size of frames sent (characters for text frames)",
+        )
+        self.send_latency = registry.histogram(
+            "bridge_ws_send_seconds", "Time spent in one WebSocket send"
+        )
+        self.outbound_depth = registry.gauge(
+            "bridge_outbound_queue_depth", "Events waiting for the writer task"
+        )
+        self.prompt_queue_depth = registry.gauge(
+            "bridge_prompt_queue_depth", "Prompts waiting for the running one to finish"
+        )
+        self.reconnects = registry.counter(
+            "bridge_reconnects_total", "Reconnect attempts, by connection", label="target"
+        )
+        self.sse_resumptions = registry.counter(
+            "bridge_sse_resumptions_total",
+            "Prompt streams picked back up after an event stream error or bridge restart, "
+            "by outcome",
+            label="outcome",
+        )
+        self.time_to_first_token = registry.histogram(
+            "bridge_time_to_first_token_seconds",
+            "Time from prompt start to its first token event, by model",
+            buckets=DURATION_BUCKETS,
+            label="model",
+        )
+        self.prompt_duration = registry.histogram(
+            "bridge_prompt_duration_seconds",
+            "Prompt duration, by model",
+            buckets=DURATION_BUCKETS,
+            label="model",
+        )
+        self.prompts = registry.counter(
+            "bridge_prompts_total", "Prompts handled, by outcome", label="outcome"
+        )
+        self.reconciles = registry.counter(
+            "bridge_reconcile_total",
+            "Final-state reconciliations, by outcome (skipped/unchanged/changed/error)",
+            label="outcome",
+        )
+
+
+class QueuedPrompt:
+    """A prompt command waiting for (or holding) the bridge's single prompt slot."""
+
+    __slots__ = ("cmd", "contents", "merged_ids", "message_id", "task", "timeline")
+
+    def __init__(self, cmd: dict[str, Any]):
+        self.cmd = cmd
+        self.message_id: str = cmd.get("messageId") or cmd.get("message_id", "unknown")
+        # Follow-ups whose content was folded into this prompt before it started
+        self.merged_ids: list[str] = []
+        # Content of every prompt folded in, by message ID, in arrival order
+        self.contents: dict[str, str] = {self.message_id: cmd.get("content", "")}
+        self.task: asyncio.Task[None] | None = None
+        # Started on arrival so the time spent queued shows up in the timeline
+        self.timeline = PromptTimeline()
+
+    def can_absorb(self, cmd: dict[str, Any]) -> bool:
+        """Whether a mergeable follow-up can be appended to this prompt."""
+        return all(
+            cmd.get(key) == self.cmd.get(key) for key in ("model", "reasoningEffort", "author")
+        )
+
+    def absorb(self, cmd: dict[str, Any]) -> str:
+        """Append a follow-up's content to this prompt; returns its message ID."""
+        message_id: str = cmd.get("messageId") or cmd.get("message_id", "unknown")
+        self.contents[message_id] = cmd.get("content", "")
+        self._update()
+        return message_id
+
+    def remove(self, message_id: str) -> bool:
+        """Take one folded-in prompt's content back out.
+
+        Returns False, leaving the prompt unchanged, when message_id is the
+        only one left. The first remaining prompt becomes the primary.
+        """
+        if message_id not in self.contents or len(self.contents) == 1:
+            return False
+        del self.contents[message_id]
+        self._update()
+        return True
+
+    def _update(self) -> None:
+        self.message_id, *self.merged_ids = self.contents
+        self.cmd = {
+            **self.cmd,
+            "messageId": self.message_id,
+            "content": "\n\n".join(self.contents.values()),
+        }
+
+
+class PromptTimeline:
+    """Milestones of one prompt, in ms since its command was received (monotonic clock)."""
+
+    __slots__ = ("marks", "start")
+
+    # Outbound event types whose first occurrence is a milestone
+    FIRST_EVENT_STAGES: ClassVar[dict[str, str]] = {
+        "step_start": "first_step_start",
+        "token": "first_token",
+        "tool_call": "first_tool_call",
+    }
+
+    def __init__(self) -> None:
+        self.start = time.monotonic()
+        self.marks: dict[str, int] = {"received": 0}
+
+    def mark(self, stage: str) -> bool:
+        """Record stage unless already recorded. Returns True if it was new."""
+        if stage in self.marks:
+            return False
+        self.marks[stage] = int((time.monotonic() - self.start) * 1000)
+        return True
+
+
+class ToolOutputProgress:
+    """How much of a running tool's output has been streamed to the control plane."""
+
+    __slots__ = ("consumed", "last_flush", "offset")
+
+    def __init__(self, output: str):
+        # Characters of output accounted for, the UTF-16 offset the next delta
+        # starts at, and when output was last sent
+        self.consumed = len(output)
+        self.offset = _utf16_len(output)
+        self.last_flush = time.monotonic()
+
+
+class PromptStreamState:
+    """Per-prompt bookkeeping for AgentBridge._stream_opencode_response_sse."""
+
+    __slots__ = (
+        "allowed_assistant_msg_ids",
+        "child_session_ids",
+        "completed_msg_ids",
+        "completed_text_part_ids",
+        "cumulative_text",
+        "emitted_step_part_ids",
+        "emitted_tool_states",
+        "finish_reason",
+        "message_id",
+        "opencode_message_id",
+        "parent_assistant_msg_ids",
+        "peak_bytes",
+        "pending_parts",
+        "start_time",
+        "text_bytes",
+        "text_part_msg_ids",
+        "token_update_counts",
+        "tool_args_hashes",
+        "tool_outputs",
+    )
+
+    def __init__(
+        self,
+        message_id: str,
+        opencode_message_id: str,
+        pending_parts: PendingParts | None = None,
+    ):
+        # Control plane message ID (used in events sent back) and the OpenCode
+        # ascending ID our assistant messages name as parentID
+        self.message_id = message_id
+        self.opencode_message_id = opencode_message_id
+        self.start_time = time.time()
+        # Set by a handler to end the stream: "idle" or "error"
+        self.finish_reason: str | None = None
+
+        # Text of parts still streaming. Parts are evicted once OpenCode marks
+        # them ended and their final text has been handed to the journal.
+        self.cumulative_text: dict[str, str] = {}
+        self.text_bytes = 0
+        self.token_update_counts: dict[str, int] = {}
+        # Step parts and "sessionID/callID/status" tool states already
+        # forwarded; both survive a bridge restart in the in-flight record
+        self.emitted_step_part_ids: set[str] = set()
+        self.emitted_tool_states: set[str] = set()
+        # Streaming progress of running tools and the argsHash last sent for
+        # each open call, keyed by "sessionID/callID"
+        self.tool_outputs: dict[str, ToolOutputProgress] = {}
+        self.tool_args_hashes: dict[str, str] = {}
+        self.allowed_assistant_msg_ids: set[str] = set()
+        self.child_session_ids: set[str] = set()
+        # Parts of messages not yet correlated to this prompt, keyed by message ID
+        self.pending_parts = pending_parts if pending_parts is not None else PendingParts()
+        # High-water mark of retained_bytes(), reported in the prompt.run log
+        self.peak_bytes = 0
+
+        # Reconciliation bookkeeping: which of our assistant messages and text
+        # parts the stream has already shown in their completed state
+        self.parent_assistant_msg_ids: set[str] = set()
+        self.completed_msg_ids: set[str] = set()
+        self.text_part_msg_ids: dict[str, str] = {}
+        self.completed_text_part_ids: set[str] = set()
+
+    def retained_bytes(self) -> int:
+        """Approximate size of the streamed text and buffered parts held in memory.
+
+        Text is counted in characters, which matches bytes for the mostly-ASCII
+        output agents produce.
+        """
+        return self.text_bytes + self.pending_parts.memory_bytes
+
+    def update_peak(self) -> None:
+        retained = self.retained_bytes()
+        if retained > self.peak_bytes:
+            self.peak_bytes = retained
+
+    def unreconciled_msg_ids(self) -> set[str] | None:
+        """Messages whose final state the stream did not deliver.
+
+        None means no assistant message was correlated at all, so the
+        reconciliation has to scan the session instead.
+        """
+        if not self.parent_assistant_msg_ids:
+            return None
+        pending = self.parent_assistant_msg_ids - self.completed_msg_ids
+        pending.update(
+            msg_id
+            for part_id, msg_id in self.text_part_msg_ids.items()
+            if part_id not in self.completed_text_part_ids and msg_id
+        )
+        return pending
+
+
+PromptEventHandler = Callable[[PromptStreamState, dict[str, Any]], list[dict[str, Any]]]
+
+
 class AgentBridge:
     """
     Bridge between sandbox OpenCode instance and control plane.
@@ -130,7 +399,77 @@ class AgentBridge:
     HTTP_DEFAULT_TIMEOUT = 30.0
     OPENCODE_REQUEST_TIMEOUT = 10.0
     PROMPT_MAX_DURATION = 5400.0
-    MAX_PENDING_PART_EVENTS = 2000
+    SESSION_WARMUP_TIMEOUT = 30.0
+    SESSION_WARMUP_TIMEOUT_MIN = 0.0
+    SESSION_WARMUP_TIMEOUT_MAX = 300.0
+    # Read-only OpenCode endpoints whose first call does the lazy startup work a
+    # first prompt would otherwise wait for: provider setup, MCP connections,
+    # and tool/plugin loading
+    SESSION_WARMUP_PATHS: ClassVar[tuple[str, ...]] = (
+        "/config/providers",
+        "/mcp",
+        "/experimental/tool/ids",
+    )
+    PENDING_PARTS_MEMORY_BYTES = 4 << 20
+    PENDING_PARTS_SPILL_BYTES = 64 << 20
+    TOKEN_RESYNC_INTERVAL = 50
+    TOOL_OUTPUT_FLUSH_INTERVAL = 0.5
+    TOOL_OUTPUT_FLUSH_CHARS = 8 * 1024
+    TOOL_OUTPUT_HEAD_CHARS = 64 * 1024
+    TOOL_OUTPUT_TAIL_CHARS = 8 * 1024
+    OUTBOUND_QUEUE_MAX = 1000
+    SEND_COALESCE_WINDOW = 0.025
+    SEND_COALESCE_WINDOW_MIN = 0.0
+    SEND_COALESCE_WINDOW_MAX = 0.25
+    SEND_BATCH_MAX_EVENTS = 64
+    SEND_FLUSH_TIMEOUT = 2.0
+    EVENT_QUEUE_MAX = 1000
+    EVENT_STREAM_BACKOFF_BASE = 0.25
+    EVENT_STREAM_BACKOFF_MAX = 5.0
+    SSE_RESUME_MAX_ATTEMPTS = 5
+    JOURNAL_MAX_BYTES = 32 * 1024 * 1024
+    JOURNAL_MAX_AGE = 3600.0
+    JOURNAL_MAX_AGE_MIN = 60.0
+    JOURNAL_MAX_AGE_MAX = 86400.0
+    READY_ACK_TIMEOUT = 2.0
+    METRICS_PORT = 9464
+    GIT_PUSH_TIMEOUT = 120.0
+    BLOB_MIN_CHARS = 4096
+    BLOB_CACHE_MAX_ENTRIES = 4096
+    FRAME_COMPRESS_THRESHOLD = 1024
+    RECONCILE_RECENT_MESSAGES = 50
+    FRAME_COMPRESS_LEVEL = 1
+    WS_DEFLATE_WINDOW_BITS = 12
+    WS_DEFLATE_MEM_LEVEL = 5
+    JOURNAL_PATH: ClassVar[Path] = Path(tempfile.gettempdir()) / "bridge-events.journal"
+    INFLIGHT_PATH: ClassVar[Path] = Path(tempfile.gettempdir()) / "bridge-inflight-prompt.json"
+    INFLIGHT_SAVE_INTERVAL = 1.0
+    # Cancellation message for a prompt stopped on request, as opposed to one
+    # cancelled by the bridge shutting down
+    STOP_CANCEL_MESSAGE = "prompt stopped"
+    # Created by the supervisor while the repo setup script runs
+    SETUP_PENDING_PATH: ClassVar[Path] = Path(tempfile.gettempdir()) / "sandbox-setup-pending"
+    SETUP_POLL_INTERVAL = 0.25
+
+    # Connection-scoped events that are never journaled or replayed
+    UNJOURNALED_EVENT_TYPES: ClassVar[frozenset[str]] = frozenset({"ready", "heartbeat"})
+
+    # Event fields replaced by blob references when blob_dedup is negotiated
+    BLOB_FIELDS: ClassVar[tuple[str, ...]] = ("output",)
+
+    # Protocol extensions this bridge understands. Advertised in the ``ready``
+    # event; the control plane opts in to a subset with a ``ready_ack`` command.
+    # Until then (and for control planes that never ack) the legacy protocol is used.
+    SUPPORTED_CAPABILITIES: ClassVar[tuple[str, ...]] = (
+        "token_delta",
+        "tool_output_stream",
+        "tool_args_once",
+        "blob_dedup",
+        "event_batch",
+        "event_journal",
+        "frame_deflate",
+        "frame_msgpack",
+    )
 
     def __init__(
         self,
@@ -161,21 +500,102 @@ class AgentBridge:
             min_value=self.SSE_INACTIVITY_TIMEOUT_MIN,
             max_value=self.SSE_INACTIVITY_TIMEOUT_MAX,
         )
+        self.session_warmup_timeout = self._resolve_timeout_seconds(
+            name="BRIDGE_SESSION_WARMUP_TIMEOUT",
+            default=self.SESSION_WARMUP_TIMEOUT,
+            min_value=self.SESSION_WARMUP_TIMEOUT_MIN,
+            max_value=self.SESSION_WARMUP_TIMEOUT_MAX,
+        )
+        self.send_coalesce_window = self._resolve_timeout_seconds(
+            name="BRIDGE_SEND_COALESCE_WINDOW",
+            default=self.SEND_COALESCE_WINDOW,
+            min_value=self.SEND_COALESCE_WINDOW_MIN,
+            max_value=self.SEND_COALESCE_WINDOW_MAX,
+        )
 
         self.ws: ClientConnection | None = None
+        # Every outbound event is sequenced and spooled here until acknowledged,
+        # so events produced while disconnected are replayed on reconnect.
+        self.journal = EventJournal(
+            self.JOURNAL_PATH,
+            max_bytes=self.JOURNAL_MAX_BYTES,
+            max_age_seconds=self._resolve_timeout_seconds(
+                name="BRIDGE_JOURNAL_MAX_AGE",
+                default=self.JOURNAL_MAX_AGE,
+                min_value=self.JOURNAL_MAX_AGE_MIN,
+                max_value=self.JOURNAL_MAX_AGE_MAX,
+            ),
+        )
+        # Hashes of large payloads the control plane already holds (blob_dedup)
+        self.blobs = BlobCache(self.BLOB_CACHE_MAX_ENTRIES)
+        # Set while unacknowledged events await replay on a new connection;
+        # live events go only to the journal until the replay has been queued.
+        self._replay_pending = False
+        # Held while a replay is queued, so a late ready_ack and the timeout
+        # fallback never queue the backlog twice
+        self._replay_lock = asyncio.Lock()
+        self._replay_timeout_task: asyncio.Task[None] | None = None
+        # Outbound events for the current connection. Only the writer task
+        # touches the socket; producers block here when it falls behind.
+        self._outbound: asyncio.Queue[dict[str, Any]] = asyncio.Queue(
+            maxsize=self.OUTBOUND_QUEUE_MAX
+        )
         self.shutdown_event = asyncio.Event()
         self.git_sync_complete = asyncio.Event()
 
         # Session state
         self.opencode_session_id: str | None = None
+        # Set once the session exists and OpenCode has done its lazy startup work
+        self.session_warm = False
         self.session_id_file = Path(tempfile.gettempdir()) / "opencode-session-id"
         self.repo_path = Path("/workspace")
+        self.git = GitService(self.repo_path, self.log)
 
         # HTTP client for OpenCode API
         self.http_client: httpx.AsyncClient | None = None
 
-        # Track the current prompt task so _handle_stop can cancel it
+        # Session-wide OpenCode event subscription, fanned out to prompt consumers
+        self._event_stream_task: asyncio.Task[None] | None = None
+        self._event_stream_connected = asyncio.Event()
+        self._event_stream_error: Exception | None = None
+        self._event_subscribers: list[asyncio.Queue[dict[str, Any] | Exception]] = []
+        self.opencode_session_status: str | None = None
+
+        # Prompt stream routing: OpenCode event type -> handler(state, properties).
+        # Types without a handler (heartbeats, server.connected, ...) are skipped.
+        self._sse_handlers: dict[str, PromptEventHandler] = {
+            "session.created": self._on_session_created,
+            "message.updated": self._on_message_updated,
+            "message.part.updated": self._on_part_updated,
+            "session.idle": self._on_session_idle,
+            "session.status": self._on_session_status,
+            "session.error": self._on_session_error,
+        }
+
+        self.metrics = BridgeMetrics()
+        self._metrics_server: asyncio.Server | None = None
+        # PromptStreamState.peak_bytes of the last prompt stream, for prompt.run
+        self._prompt_state_peak_bytes = 0
+
+        # Prompts run one at a time in arrival order: _prompt_slot is held by the
+        # running prompt, _prompt_queue holds the ones waiting for it, and
+        # _running_prompt / _current_prompt_task are the running one so _handle_stop
+        # can cancel it
+        self._prompt_slot = asyncio.Lock()
+        self._prompt_queue: deque[QueuedPrompt] = deque()
+        self._running_prompt: QueuedPrompt | None = None
         self._current_prompt_task: asyncio.Task[None] | None = None
+        # Every prompt task, running or queued. They belong to the bridge rather
+        # than a connection: a dropped WebSocket leaves them running, writing
+        # into the journal, and only stop or shutdown cancels them.
+        self._prompt_tasks: set[asyncio.Task[None]] = set()
+
+        # Capabilities negotiated with the control plane for the current connection
+        self.capabilities: set[str] = set()
+        self.advertised_capabilities = self._available_capabilities(transport_deflate=False)
+        self._frame_encoder = FrameEncoder()
+        self._token_resync_requested = False
+        self._tool_args_resync_requested = False
 
     @property
     def ws_url(self) -> str:
@@ -198,6 +618,15 @@ class AgentBridge:
             )
         )
         await self._load_session_id()
+        recovered = self.journal.recover()
+        if recovered:
+            self.log.info(
+                "bridge.journal_recovered", events=recovered, last_seq=self.journal.last_seq
+            )
+        await self._start_metrics_server()
+        self._event_stream_task = asyncio.create_task(self._event_stream_loop())
+        await self._warm_opencode_session()
+        await self._reattach_inflight_prompt()
 
         reconnect_attempts = 0
 
@@ -242,6 +671,7 @@ class AgentBridge:
                     break
 
                 reconnect_attempts += 1
+                self.metrics.reconnects.labels("control_plane").inc()
                 delay = min(
                     self.RECONNECT_BACKOFF_BASE**reconnect_attempts,
                     self.RECONNECT_MAX_DELAY,
@@ -254,8 +684,37 @@ class AgentBridge:
                 await asyncio.sleep(delay)
 
         finally:
+            for task in self._prompt_tasks:
+                task.cancel()
+            if self._prompt_tasks:
+                await asyncio.gather(*self._prompt_tasks, return_exceptions=True)
+            if self._event_stream_task:
+                self._event_stream_task.cancel()
             if self.http_client:
                 await self.http_client.aclose()
+            if self._metrics_server:
+                self._metrics_server.close()
+            self.journal.close()
+
+    async def _start_metrics_server(self) -> None:
+        """Serve Prometheus metrics on localhost for the supervisor to scrape.
+
+        BRIDGE_METRICS_PORT overrides METRICS_PORT; 0 disables the endpoint.
+        """
+        raw = os.environ.get("BRIDGE_METRICS_PORT")
+        try:
+            port = int(raw) if raw else self.METRICS_PORT
+        except ValueError:
+            self.log.warn("bridge.metrics_port_invalid", value=raw)
+            port = self.METRICS_PORT
+        if port <= 0:
+            return
+        try:
+            self._metrics_server = await serve_metrics(self.metrics.registry, "127.0.0.1", port)
+        except OSError as e:
+            self.log.warn("bridge.metrics_server_error", exc=e, port=port)
+            return
+        self.log.info("bridge.metrics_server", port=port)
 
     def _is_fatal_connection_error(self, error_str: str) -> bool:
         """Check if a connection error is fatal and shouldn't trigger retry.
@@ -296,20 +755,51 @@ class AgentBridge:
                 additional_headers=additional_headers,
                 ping_interval=20,
                 ping_timeout=10,
+                compression=None,
+                extensions=[
+                    # Small window and memLevel keep per-connection zlib state
+                    # to a few tens of KiB; JSON events compress nearly as well.
+                    ClientPerMessageDeflateFactory(
+                        client_max_window_bits=self.WS_DEFLATE_WINDOW_BITS,
+                        compress_settings={"memLevel": self.WS_DEFLATE_MEM_LEVEL},
+                    )
+                ],
             ) as ws:
                 self.ws = ws
-                self.log.info("bridge.connect", outcome="success")
+                self.capabilities = set()
+                self._frame_encoder = FrameEncoder()
+                ws_extensions = [ext.name for ext in ws.protocol.extensions]
+                self.advertised_capabilities = self._available_capabilities(
+                    transport_deflate="permessage-deflate" in ws_extensions
+                )
+                self._replay_pending = self.journal.last_seq > self.journal.acked_seq
+                self.log.info(
+                    "bridge.connect",
+                    outcome="success",
+                    ws_extensions=ws_extensions,
+                    last_seq=self.journal.last_seq,
+                    pending_events=self.journal.pending,
+                )
+                writer_task = asyncio.create_task(self._writer_loop(ws))
 
                 await self._send_event(
                     {
                         "type": "ready",
                         "sandboxId": self.sandbox_id,
                         "opencodeSessionId": self.opencode_session_id,
+                        "sessionWarm": self.session_warm,
+                        "setupPending": self.SETUP_PENDING_PATH.exists(),
+                        "capabilities": list(self.advertised_capabilities),
+                        "lastSeq": self.journal.last_seq,
                     }
                 )
 
                 heartbeat_task = asyncio.create_task(self._heartbeat_loop())
                 background_tasks: set[asyncio.Task[None]] = set()
+                if self._replay_pending:
+                    # Control planes that never ack still get the backlog, just later
+                    self._replay_timeout_task = asyncio.create_task(self._replay_after_timeout())
+                    background_tasks.add(self._replay_timeout_task)
 
                 try:
                     async for message in ws:
@@ -317,12 +807,9 @@ class AgentBridge:
                             break
 
                         try:
-                            cmd = json.loads(message)
-                            task = await self._handle_command(cmd)
-                            if task:
-                                background_tasks.add(task)
-                                task.add_done_callback(background_tasks.discard)
-                        except json.JSONDecodeError as e:
+                            cmd = codec.loads(message)
+                            await self._handle_command(cmd)
+                        except codec.JSONDecodeError as e:
                             self.log.warn("bridge.invalid_message", exc=e)
                         except Exception as e:
                             self.log.error("bridge.command_error", exc=e)
@@ -331,7 +818,15 @@ class AgentBridge:
                     heartbeat_task.cancel()
                     for task in background_tasks:
                         task.cancel()
+                    if ws.state == State.OPEN:
+                        # Give queued events (e.g. a final execution_complete) a chance to go out
+                        with contextlib.suppress(TimeoutError):
+                            await asyncio.wait_for(
+                                self._outbound.join(), timeout=self.SEND_FLUSH_TIMEOUT
+                            )
+                    writer_task.cancel()
                     self.ws = None
+                    self._discard_outbound()
 
         except InvalidStatus as e:
             status = getattr(getattr(e, "response", None), "status_code", None)
@@ -353,37 +848,239 @@ class AgentBridge:
                         "sandboxId": self.sandbox_id,
                         "status": "ready",
                         "timestamp": time.time(),
+                        "queueDepth": len(self._prompt_queue),
+                        "metrics": self.metrics.registry.summary(),
                     }
                 )
 
     async def _send_event(self, event: dict[str, Any]) -> None:
-        """Send event to control plane."""
+        """Journal event and queue it for delivery by the writer task.
+
+        Events sent while disconnected (or while a replay is pending) are kept
+        in the journal and delivered on the next connection. Blocks while the
+        outbound queue is full, which applies backpressure to the producer
+        (e.g. a prompt task reading the OpenCode stream).
+        """
         event_type = event.get("type", "unknown")
+        event["sandboxId"] = self.sandbox_id
+        event["timestamp"] = event.get("timestamp", time.time())
+
+        journaled = event_type not in self.UNJOURNALED_EVENT_TYPES
+        if journaled and "blob_dedup" in self.capabilities and event_type != "blob":
+            for blob in self._extract_blobs(event):
+                await self._send_event(blob)
+                self.blobs.sent(blob["hash"], blob["seq"])
+        if journaled:
+            evicted = self.journal.evicted
+            self.journal.append(event)
+            if self.journal.evicted != evicted:
+                self.log.warn(
+                    "bridge.journal_evicted",
+                    count=self.journal.evicted - evicted,
+                    acked_seq=self.journal.acked_seq,
+                )
+                # Blob events may have been among the evicted: stop referencing them
+                self.blobs.drop_in_flight()
 
         if not self.ws:
-            self.log.debug("bridge.send_failed", event_type=event_type, reason="ws_none")
+            self.log.debug(
+                "bridge.send_deferred" if journaled else "bridge.send_failed",
+                event_type=event_type,
+                reason="ws_none",
+            )
             return
         if self.ws.state != State.OPEN:
             self.log.debug(
-                "bridge.send_failed",
+                "bridge.send_deferred" if journaled else "bridge.send_failed",
                 event_type=event_type,
                 reason=f"ws_state_{self.ws.state}",
             )
             return
+        if journaled and self._replay_pending:
+            return
 
-        event["sandboxId"] = self.sandbox_id
-        event["timestamp"] = event.get("timestamp", time.time())
+        await self._outbound.put(event)
 
-        try:
-            await self.ws.send(json.dumps(event))
-        except Exception as e:
-            self.log.error("bridge.send_error", event_type=event_type, exc=e)
+    def _extract_blobs(self, event: dict[str, Any]) -> list[dict[str, Any]]:
+        """Replace large payload fields of event with references to their content hash.
+
+        Each replaced field is removed and listed in ``blobRefs`` as
+        field -> hash. Returns ``blob`` events for payloads the control plane
+        does not hold yet; they must be sent before the event itself.
+        """
+        blobs: list[dict[str, Any]] = []
+        for field in self.BLOB_FIELDS:
+            value = event.get(field)
+            if not isinstance(value, str) or len(value) < self.BLOB_MIN_CHARS:
+                continue
+            digest = blob_digest(value)
+            if not self.blobs.known(digest) and all(b["hash"] != digest for b in blobs):
+                blobs.append({"type": "blob", "hash": digest, "data": value})
+            del event[field]
+            event.setdefault("blobRefs", {})[field] = digest
+        return blobs
+
+    def _ack_delivered(self, seq: int) -> None:
+        """Record that the control plane holds every event up to seq."""
+        self.journal.ack(seq)
+        self.blobs.ack(seq)
+
+    async def _resume_delivery(self) -> None:
+        """Queue every unacknowledged journal entry, then resume live sends.
+
+        Live events produced while the replay is being queued land in the
+        journal too, so the loop runs until it has caught up; the flag flips
+        with no await in between, which keeps sequence order intact. Queueing
+        can block on a full outbound queue, so replays are serialised: a caller
+        that finds one already done returns without queueing anything.
+        """
+        async with self._replay_lock:
+            if not self._replay_pending:
+                return
+            from_seq = after_seq = self.journal.acked_seq
+            replayed = 0
+            while self.ws and self.ws.state == State.OPEN:
+                events = self.journal.replay(after_seq)
+                if not events:
+                    self._replay_pending = False
+                    break
+                for event in events:
+                    await self._outbound.put(event)
+                after_seq = events[-1]["seq"]
+                replayed += len(events)
+            self.log.info(
+                "bridge.replay",
+                from_seq=from_seq,
+                count=replayed,
+                complete=not self._replay_pending,
+            )
+
+    async def _replay_after_timeout(self) -> None:
+        """Replay the backlog if the control plane does not answer ready with ready_ack."""
+        await asyncio.sleep(self.READY_ACK_TIMEOUT)
+        await self._resume_delivery()
+
+    async def _writer_loop(self, ws: ClientConnection) -> None:
+        """Drain the outbound queue onto the socket.
+
+        After the first event of a burst arrives, waits up to
+        send_coalesce_window for more so token updates can be collapsed and
+        several events written as one frame.
+        """
+        loop = asyncio.get_running_loop()
+        metrics = self.metrics
+        while True:
+            batch = [await self._outbound.get()]
+            try:
+                deadline = loop.time() + self.send_coalesce_window
+                while len(batch) < self.SEND_BATCH_MAX_EVENTS:
+                    if not self._outbound.empty():
+                        batch.append(self._outbound.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._outbound.get(), remaining))
+                    except TimeoutError:
+                        break
+
+                metrics.outbound_depth.set(self._outbound.qsize())
+                for frame in self._encode_frames(self._coalesce_events(batch)):
+                    try:
+                        send_start = time.perf_counter()
+                        await ws.send(frame)
+                        metrics.send_latency.observe(time.perf_counter() - send_start)
+                        metrics.ws_frames_sent.inc()
+                        metrics.ws_bytes_sent.inc(len(frame))
+                    except websockets.ConnectionClosed:
+                        # The receive loop notices the closure and tears the connection down
+                        return
+                    except Exception as e:
+                        self.log.error("bridge.send_error", exc=e)
+                if "event_journal" not in self.capabilities:
+                    # Without acks from the control plane, a completed send is
+                    # the best delivery signal available
+                    self._ack_delivered(max((e.get("seq", 0) for e in batch), default=0))
+            finally:
+                for _ in batch:
+                    self._outbound.task_done()
+
+    def _encode_frames(self, events: list[dict[str, Any]]) -> list[str | bytes]:
+        """Serialize events into frames, batching them into one array when negotiated."""
+        encode = self._frame_encoder.encode
+        if len(events) > 1 and "event_batch" in self.capabilities:
+            return [encode(events)]
+        return [encode(event) for event in events]
+
+    @staticmethod
+    def _coalesce_events(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Collapse consecutive token updates for the same text part.
+
+        A cumulative token supersedes the previous one; a delta token is
+        appended to the previous update when it continues at the right offset.
+        Legacy tokens carry no part ID and are never merged, since there is no
+        telling whether two of them belong to the same part. Ordering relative
+        to other event types is preserved.
+        """
+        result: list[dict[str, Any]] = []
+        for event in events:
+            last = result[-1] if result else None
+            if (
+                last is not None
+                and event.get("type") == "token"
+                and last.get("type") == "token"
+                and last.get("messageId") == event.get("messageId")
+                and event.get("partId") is not None
+                and last.get("partId") == event.get("partId")
+                and last.get("isSubtask") == event.get("isSubtask")
+            ):
+                if "content" in event:
+                    result[-1] = event
+                    continue
+                if "content" in last:
+                    end = _utf16_len(last["content"])
+                    merged_key = "content"
+                else:
+                    end = last["offset"] + _utf16_len(last["delta"])
+                    merged_key = "delta"
+                if event.get("offset") == end:
+                    result[-1] = {
+                        **event,
+                        "offset": last.get("offset", 0),
+                        merged_key: last[merged_key] + event["delta"],
+                    }
+                    if merged_key == "content":
+                        del result[-1]["delta"]
+                    continue
+            result.append(event)
+        return result
+
+    def _discard_outbound(self) -> None:
+        """Drop events still queued for a connection that has gone away.
+
+        Journaled events stay unacknowledged and are replayed on reconnect.
+        """
+        dropped = 0
+        while not self._outbound.empty():
+            self._outbound.get_nowait()
+            self._outbound.task_done()
+            dropped += 1
+        if dropped:
+            self.log.warn(
+                "bridge.send_deferred",
+                reason="disconnected",
+                dropped=dropped,
+                pending_events=self.journal.pending,
+            )
 
     async def _handle_command(self, cmd: dict[str, Any]) -> asyncio.Task[None] | None:
         """Handle command from control plane.
 
         Long-running commands (like prompt) are run as background tasks to keep
-        the WebSocket listener responsive to other commands (like push).
+        the WebSocket listener responsive to other commands (like push). Those
+        tasks are owned by the bridge, not the connection, so they survive a
+        reconnect.
 
         Returns a Task for long-running commands, None for immediate commands.
         """
@@ -391,40 +1088,9 @@ class AgentBridge:
         self.log.debug("bridge.command_received", cmd_type=cmd_type)
 
         if cmd_type == "prompt":
-            message_id = cmd.get("messageId") or cmd.get("message_id", "unknown")
-            task = asyncio.create_task(self._handle_prompt(cmd))
-            self._current_prompt_task = task
-
-            def handle_task_exception(t: asyncio.Task[None], mid: str = message_id) -> None:
-                if self._current_prompt_task is t:
-                    self._current_prompt_task = None
-                if t.cancelled():
-                    asyncio.create_task(
-                        self._send_event(
-                            {
-                                "type": "execution_complete",
-                                "messageId": mid,
-                                "success": False,
-                                "error": "Task was cancelled",
-                            }
-                        )
-                    )
-                elif exc := t.exception():
-                    asyncio.create_task(
-                        self._send_event(
-                            {
-                                "type": "execution_complete",
-                                "messageId": mid,
-                                "success": False,
-                                "error": str(exc),
-                            }
-                        )
-                    )
-
-            task.add_done_callback(handle_task_exception)
-            return task
+            return await self._enqueue_prompt(cmd)
         elif cmd_type == "stop":
-            await self._handle_stop()
+            await self._handle_stop(cmd.get("messageId"))
         elif cmd_type == "snapshot":
             await self._handle_snapshot()
         elif cmd_type == "shutdown":
@@ -433,19 +1099,204 @@ class AgentBridge:
             self.git_sync_complete.set()
         elif cmd_type == "push":
             await self._handle_push(cmd)
+        elif cmd_type == "ready_ack":
+            await self._handle_ready_ack(cmd)
+        elif cmd_type == "ack":
+            self._handle_ack(cmd)
+        elif cmd_type == "token_resync":
+            self._token_resync_requested = True
+        elif cmd_type == "tool_args_resync":
+            self._tool_args_resync_requested = True
+        elif cmd_type == "blob_miss":
+            self._handle_blob_miss(cmd)
         else:
             self.log.debug("bridge.unknown_command", cmd_type=cmd_type)
         return None
 
-    async def _handle_prompt(self, cmd: dict[str, Any]) -> None:
-        """Handle prompt command - send to OpenCode and stream response."""
+    async def _handle_ready_ack(self, cmd: dict[str, Any]) -> None:
+        """Handle ready_ack command - enable the capabilities the control plane accepted.
+
+        With event_journal, ``lastSeq`` is the last event the control plane
+        stored; everything after it is replayed before live events resume.
+        """
+        requested = cmd.get("capabilities")
+        if not isinstance(requested, list):
+            requested = []
+        self.capabilities = {c for c in requested if c in self.advertised_capabilities}
+        self._frame_encoder = FrameEncoder(
+            deflate="frame_deflate" in self.capabilities,
+            use_msgpack="frame_msgpack" in self.capabilities,
+            compress_threshold=self.FRAME_COMPRESS_THRESHOLD,
+            compress_level=self.FRAME_COMPRESS_LEVEL,
+            window_bits=self.WS_DEFLATE_WINDOW_BITS,
+            mem_level=self.WS_DEFLATE_MEM_LEVEL,
+        )
+        self.log.info("bridge.capabilities", capabilities=sorted(self.capabilities))
+
+        timeout_task = self._replay_timeout_task
+        # Once the fallback holds the lock its replay is under way; let it finish
+        if timeout_task and not timeout_task.done() and not self._replay_lock.locked():
+            timeout_task.cancel()
+        last_seq = cmd.get("lastSeq")
+        if "event_journal" in self.capabilities and isinstance(last_seq, int):
+            self._ack_delivered(last_seq)
+        await self._resume_delivery()
+
+    def _available_capabilities(self, transport_deflate: bool) -> tuple[str, ...]:
+        """Capabilities to advertise for a connection.
+
+        Frame-level deflate is pointless when permessage-deflate was negotiated
+        during the handshake, and msgpack frames need the optional package.
+        """
+        unavailable = set()
+        if transport_deflate:
+            unavailable.add("frame_deflate")
+        if not MSGPACK_AVAILABLE:
+            unavailable.add("frame_msgpack")
+        return tuple(c for c in self.SUPPORTED_CAPABILITIES if c not in unavailable)
+
+    def _handle_ack(self, cmd: dict[str, Any]) -> None:
+        """Handle ack command - the control plane has stored events up to seq."""
+        seq = cmd.get("seq")
+        if "event_journal" in self.capabilities and isinstance(seq, int):
+            self._ack_delivered(seq)
+
+    def _handle_blob_miss(self, cmd: dict[str, Any]) -> None:
+        """Handle blob_miss command - the control plane lost a blob we referenced.
+
+        The payload itself is not retained, so it cannot be resent; forgetting
+        the hash makes the next occurrence go out as a fresh blob.
+        """
+        digest = cmd.get("hash")
+        if isinstance(digest, str):
+            self.blobs.forget(digest)
+            self.log.warn("bridge.blob_miss", blob_hash=digest)
+
+    async def _enqueue_prompt(self, cmd: dict[str, Any]) -> asyncio.Task[None] | None:
+        """Queue a prompt behind the running one and start a task that waits its turn.
+
+        A follow-up the control plane marked ``mergeable`` is appended to the
+        last queued prompt instead when that one has not started yet and uses
+        the same model, reasoning effort and author. Returns the new prompt's
+        task, or None when the prompt was merged.
+        """
+        queue = self._prompt_queue
+        if (
+            cmd.get("mergeable")
+            and queue
+            and queue[-1].task is not self._current_prompt_task
+            and queue[-1].can_absorb(cmd)
+        ):
+            target = queue[-1]
+            message_id = target.absorb(cmd)
+            self.log.info("prompt.merged", message_id=message_id, merged_into=target.message_id)
+            await self._send_event(
+                {
+                    "type": "prompt_queued",
+                    "messageId": message_id,
+                    "mergedInto": target.message_id,
+                    "position": self._prompts_in_flight() - 1,
+                }
+            )
+            return None
+
+        entry = QueuedPrompt(cmd)
+        message_id = entry.message_id
+        task = asyncio.create_task(self._run_queued_prompt(entry))
+        entry.task = task
+        self._prompt_tasks.add(task)
+        task.add_done_callback(self._prompt_tasks.discard)
+        queue.append(entry)
+        self.metrics.prompt_queue_depth.set(len(queue))
+        if not self._prompt_slot.locked() and len(queue) == 1:
+            # Starts right away: visible to _handle_stop before the task first runs
+            self._current_prompt_task = task
+        else:
+            position = self._prompts_in_flight() - 1
+            self.log.info("prompt.queued", message_id=message_id, position=position)
+            await self._send_event(
+                {"type": "prompt_queued", "messageId": message_id, "position": position}
+            )
+
+        def handle_task_exception(t: asyncio.Task[None]) -> None:
+            if self._current_prompt_task is t:
+                self._current_prompt_task = None
+            if t.cancelled():
+                error = "Task was cancelled"
+            elif exc := t.exception():
+                error = str(exc)
+            else:
+                return
+            asyncio.create_task(
+                self._send_execution_complete(
+                    {
+                        "type": "execution_complete",
+                        "messageId": entry.message_id,
+                        "success": False,
+                        "error": error,
+                    },
+                    entry.merged_ids,
+                )
+            )
+
+        task.add_done_callback(handle_task_exception)
+        return task
+
+    def _prompts_in_flight(self) -> int:
+        """Prompts running or queued, including one about to take the free slot."""
+        return len(self._prompt_queue) + self._prompt_slot.locked()
+
+    async def _run_queued_prompt(self, entry: QueuedPrompt) -> None:
+        """Wait for the prompt slot (FIFO), then run the prompt."""
+        try:
+            async with self._prompt_slot:
+                self._prompt_queue.remove(entry)
+                self.metrics.prompt_queue_depth.set(len(self._prompt_queue))
+                self._running_prompt = entry
+                self._current_prompt_task = entry.task
+                if entry.merged_ids:
+                    self.log.info(
+                        "prompt.dequeued",
+                        message_id=entry.message_id,
+                        merged_ids=entry.merged_ids,
+                    )
+                entry.timeline.mark("dequeued")
+                await self._handle_prompt(entry.cmd, entry)
+        finally:
+            if self._running_prompt is entry:
+                self._running_prompt = None
+            if entry in self._prompt_queue:
+                # Cancelled while waiting
+                self._prompt_queue.remove(entry)
+                self.metrics.prompt_queue_depth.set(len(self._prompt_queue))
+
+    async def _send_execution_complete(
+        self, event: dict[str, Any], merged_ids: list[str] | tuple[str, ...] = ()
+    ) -> None:
+        """Send execution_complete for a prompt and for each follow-up merged into it."""
+        copies = [
+            {**event, "messageId": merged_id, "mergedInto": event["messageId"]}
+            for merged_id in merged_ids
+        ]
+        for complete in (event, *copies):
+            await self._send_event(complete)
+
+    async def _handle_prompt(self, cmd: dict[str, Any], queued: QueuedPrompt | None = None) -> None:
+        """Handle prompt command - send to OpenCode and stream response.
+
+        queued is the prompt's queue entry, which supplies the timeline started
+        on arrival and the follow-ups merged into it.
+        """
         message_id = cmd.get("messageId") or cmd.get("message_id", "unknown")
         content = cmd.get("content", "")
         model = cmd.get("model")
         reasoning_effort = cmd.get("reasoningEffort")
         author_data = cmd.get("author", {})
         start_time = time.time()
+        timeline = queued.timeline if queued else PromptTimeline()
+        merged_ids = queued.merged_ids if queued else ()
         outcome = "success"
+        self._prompt_state_peak_bytes = 0
 
         self.log.info(
             "prompt.start",
@@ -463,16 +1314,32 @@ class AgentBridge:
                     email=github_email,
                 )
             )
+            timeline.mark("identity_configured")
 
         if not self.opencode_session_id:
             await self._create_opencode_session()
+        timeline.mark("session_ready")
+        if await self._wait_for_setup(message_id):
+            timeline.mark("setup_complete")
 
+        first_event_stages = PromptTimeline.FIRST_EVENT_STAGES
         try:
             had_error = False
             error_message = None
+            reattach = cmd.get("reattach")
             async for event in self._stream_opencode_response_sse(
-                message_id, content, model, reasoning_effort
+                message_id,
+                content,
+                model,
+                reasoning_effort,
+                timeline,
+                reattach if isinstance(reattach, InflightPrompt) else None,
             ):
+                stage = first_event_stages.get(event.get("type", ""))
+                if stage and timeline.mark(stage) and stage == "first_token":
+                    self.metrics.time_to_first_token.labels(model or "default").observe(
+                        timeline.marks[stage] / 1000
+                    )
                 if event.get("type") == "error":
                     had_error = True
                     error_message = event.get("error")
@@ -481,28 +1348,44 @@ class AgentBridge:
             if had_error:
                 outcome = "error"
 
-            await self._send_event(
+            timeline.mark("complete")
+            await self._send_execution_complete(
                 {
                     "type": "execution_complete",
                     "messageId": message_id,
                     "success": not had_error,
                     **({"error": error_message} if error_message else {}),
-                }
+                    "timeline": timeline.marks,
+                },
+                merged_ids,
             )
 
         except Exception as e:
             outcome = "error"
             self.log.error("prompt.error", exc=e, message_id=message_id)
-            await self._send_event(
+            timeline.mark("complete")
+            await self._send_execution_complete(
                 {
                     "type": "execution_complete",
                     "messageId": message_id,
                     "success": False,
                     "error": str(e),
-                }
+                    "timeline": timeline.marks,
+                },
+                merged_ids,
             )
         finally:
-            duration_ms = int((time.time() - start_time) * 1000)
+            self.log.info(
+                "prompt.timeline",
+                message_id=message_id,
+                model=model,
+                outcome=outcome,
+                **{f"{stage}_ms": ms for stage, ms in timeline.marks.items()},
+            )
+            duration = time.time() - start_time
+            duration_ms = int(duration * 1000)
+            self.metrics.prompt_duration.labels(model or "default").observe(duration)
+            self.metrics.prompts.labels(outcome).inc()
             self.log.info(
                 "prompt.run",
                 message_id=message_id,
@@ -510,6 +1393,8 @@ class AgentBridge:
                 reasoning_effort=reasoning_effort,
                 outcome=outcome,
                 duration_ms=duration_ms,
+                state_peak_bytes=self._prompt_state_peak_bytes,
+                rss_peak_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
             )
 
     async def _create_opencode_session(self) -> None:
@@ -534,6 +1419,65 @@ class AgentBridge:
 
         await self._save_session_id()
 
+    async def _wait_for_setup(self, message_id: str) -> bool:
+        """Hold a prompt while the supervisor is still running the repo setup script.
+
+        The bridge starts alongside the setup script, so a prompt can arrive
+        before the dependencies it installs exist. Returns True if it waited.
+        """
+        if not self.SETUP_PENDING_PATH.exists():
+            return False
+        self.log.info("prompt.setup_wait", message_id=message_id)
+        while self.SETUP_PENDING_PATH.exists() and not self.shutdown_event.is_set():
+            await asyncio.sleep(self.SETUP_POLL_INTERVAL)
+        return True
+
+    async def _warm_opencode_session(self) -> None:
+        """Create the OpenCode session ahead of the first prompt and warm OpenCode up.
+
+        Runs before the first ready event, so the first prompt does not pay
+        for session creation or OpenCode's lazy initialization. The warm-up
+        requests (SESSION_WARMUP_PATHS) have no side effects and are bounded
+        by session_warmup_timeout; a timeout of 0 skips them. Failures are
+        logged and leave the work to the first prompt, as before.
+        """
+        start = time.monotonic()
+        failed: list[str] = []
+        try:
+            if not self.opencode_session_id:
+                await self._create_opencode_session()
+            paths = self.SESSION_WARMUP_PATHS if self.session_warmup_timeout > 0 else ()
+            if paths:
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(self._warmup_request(path) for path in paths)),
+                    timeout=self.session_warmup_timeout,
+                )
+                failed = [path for path, ok in zip(paths, results, strict=True) if not ok]
+        except (httpx.HTTPError, RuntimeError, TimeoutError) as e:
+            self.log.warn("opencode.session.warmup_error", exc=e)
+            failed = ["session"]
+
+        self.session_warm = not failed
+        self.log.info(
+            "opencode.session.warmup",
+            opencode_session_id=self.opencode_session_id,
+            outcome="success" if self.session_warm else "partial",
+            failed=failed or None,
+            duration_ms=int((time.monotonic() - start) * 1000),
+        )
+
+    async def _warmup_request(self, path: str) -> bool:
+        if not self.http_client:
+            return False
+        try:
+            response = await self.http_client.get(
+                f"{self.opencode_base_url}{path}", timeout=self.session_warmup_timeout
+            )
+        except httpx.HTTPError as e:
+            self.log.debug("opencode.session.warmup_request_error", path=path, exc=e)
+            return False
+        return response.status_code == 200
+
     @staticmethod
     def _extract_error_message(error: Any) -> str | None:
         """Extract message from OpenCode NamedError: { "name": "...", "data": { "message": "..." } }."""
@@ -544,6 +1488,103 @@ class AgentBridge:
             return error.get("message") or error.get("name")
         return str(error) if error else None
 
+    def _build_token_event(
+        self,
+        message_id: str,
+        part_id: str,
+        text: str,
+        previous: str,
+        update_counts: dict[str, int] | None = None,
+    ) -> dict[str, Any]:
+        """Build a token event for a text part whose content changed from previous to text.
+
+        Legacy control planes receive the cumulative text. With ``token_delta``
+        negotiated, only the appended suffix is sent together with its part ID and
+        the offset it starts at. Offsets count UTF-16 code units so they line up
+        with JavaScript string indexing on the control plane. A full resync is
+        sent for the first update of a part, when the text was rewritten instead
+        of appended to, every TOKEN_RESYNC_INTERVAL updates (when update_counts
+        is given), and after the control plane asks for one. A requested resync
+        covers only parts still streaming, not ones that have already ended.
+        """
+        if "token_delta" not in self.capabilities:
+            return {
+                "type": "token",
+                "content": text,
+                "messageId": message_id,
+            }
+
+        force_full = not previous or not text.startswith(previous)
+        if update_counts is not None:
+            count = update_counts.get(part_id, 0) + 1
+            if count >= self.TOKEN_RESYNC_INTERVAL:
+                force_full = True
+            update_counts[part_id] = 0 if force_full else count
+
+        if force_full:
+            return {
+                "type": "token",
+                "content": text,
+                "partId": part_id,
+                "offset": 0,
+                "messageId": message_id,
+            }
+        return {
+            "type": "token",
+            "delta": text[len(previous) :],
+            "partId": part_id,
+            "offset": _utf16_len(previous),
+            "messageId": message_id,
+        }
+
+    def _build_tool_output_event(
+        self,
+        progress: ToolOutputProgress,
+        call_id: str,
+        output: str,
+        message_id: str,
+    ) -> dict[str, Any] | None:
+        """Build a tool_output event for output a running tool appended since the last one.
+
+        Only sent with ``tool_output_stream`` negotiated. Updates are throttled:
+        nothing is sent until TOOL_OUTPUT_FLUSH_INTERVAL has passed since the
+        last event or TOOL_OUTPUT_FLUSH_CHARS of new output are waiting. The
+        control plane truncates the streamed output at ``offset`` (UTF-16 code
+        units) and appends ``delta``. Past TOOL_OUTPUT_HEAD_CHARS no more deltas
+        are sent; instead each event carries the last TOOL_OUTPUT_TAIL_CHARS as
+        ``tail``, replacing the previous one, and ``omitted`` counts the
+        characters in between. The completed tool_call still carries the full output.
+        """
+        if len(output) < progress.consumed:
+            # Output was rewritten rather than appended to: restart from the beginning
+            progress.consumed = progress.offset = 0
+        waiting = len(output) - progress.consumed
+        now = time.monotonic()
+        if waiting <= 0 or (
+            waiting < self.TOOL_OUTPUT_FLUSH_CHARS
+            and now - progress.last_flush < self.TOOL_OUTPUT_FLUSH_INTERVAL
+        ):
+            return None
+
+        event: dict[str, Any] = {
+            "type": "tool_output",
+            "callId": call_id,
+            "offset": progress.offset,
+            "messageId": message_id,
+        }
+        head = self.TOOL_OUTPUT_HEAD_CHARS
+        if progress.consumed < head:
+            delta = output[progress.consumed : head]
+            event["delta"] = delta
+            progress.offset += _utf16_len(delta)
+        if len(output) > head:
+            tail = output[max(head, len(output) - self.TOOL_OUTPUT_TAIL_CHARS) :]
+            event["tail"] = tail
+            event["omitted"] = len(output) - head - len(tail)
+        progress.consumed = len(output)
+        progress.last_flush = now
+        return event
+
     def _transform_part_to_event(
         self,
         part: dict[str, Any],
@@ -664,7 +1705,6 @@ class AgentBridge:
     async def _parse_sse_stream(
         self,
         response: httpx.Response,
-        timeout_ctx: asyncio.Timeout | None = None,
     ) -> AsyncIterator[dict[str, Any]]:
         """Parse Server-Sent Events stream from OpenCode.
 
@@ -673,38 +1713,151 @@ class AgentBridge:
 
             data: {"type": "...", "properties": {...}}
 
-        Events are separated by double newlines.
-        If timeout_ctx is provided, the deadline is reset on every chunk received.
+        Raw bytes are fed to an incremental SSEParser; the data of each
+        dispatched event is decoded as JSON.
         """
-        buffer = ""
-        async for chunk in response.aiter_text():
-            buffer += chunk
-            if timeout_ctx is not None:
-                timeout_ctx.reschedule(
-                    asyncio.get_running_loop().time() + self.sse_inactivity_timeout
-                )
+        parser = SSEParser()
+        async for chunk in response.aiter_bytes():
+            for sse_event in parser.feed(chunk):
+                try:
+                    yield codec.loads(sse_event.data)
+                except codec.JSONDecodeError as e:
+                    self.log.debug("bridge.sse_parse_error", exc=e)
+
+    async def _event_stream_loop(self) -> None:
+        """Hold one OpenCode ``/event`` subscription for the lifetime of the bridge.
+
+        Events are fanned out to the queues of active prompt consumers. The loop
+        reconnects with exponential backoff whenever the stream ends. A clean end
+        of stream is transparent to consumers; a failed connection or read error
+        is handed to them so the affected prompt can resume from the message API
+        (or fail once its resume budget is spent).
+        """
+        if not self.http_client:
+            raise RuntimeError("HTTP client not initialized")
 
-            # Process complete events (separated by double newlines)
-            while "\n\n" in buffer:
-                event_str, buffer = buffer.split("\n\n", 1)
-
-                # Parse the event lines
-                data_lines: list[str] = []
-                for line in event_str.split("\n"):
-                    if line.startswith("data:"):
-                        # Handle both "data: {...}" and "data:{...}" formats
-                        data_content = line[5:].lstrip()
-                        if data_content:
-                            data_lines.append(data_content)
-
-                # Join multi-line data and parse JSON
-                if data_lines:
-                    try:
-                        raw_data = "\n".join(data_lines)
-                        event = json.loads(raw_data)
-                        yield event
-                    except json.JSONDecodeError as e:
-                        self.log.debug("bridge.sse_parse_error", exc=e)
+        sse_url = f"{self.opencode_base_url}/event"
+        attempts = 0
+
+        while not self.shutdown_event.is_set():
+            error: Exception | None = None
+            try:
+                async with self.http_client.stream(
+                    "GET",
+                    sse_url,
+                    timeout=httpx.Timeout(None, connect=self.HTTP_CONNECT_TIMEOUT, read=None),
+                ) as sse_response:
+                    if sse_response.status_code != 200:
+                        raise SSEConnectionError(
+                            f"SSE connection failed: {sse_response.status_code}"
+                        )
+
+                    attempts = 0
+                    self._event_stream_error = None
+                    self._event_stream_connected.set()
+                    self.log.info("bridge.event_stream_connect", outcome="success")
+
+                    sse_events = self.metrics.sse_events
+                    async for event in self._parse_sse_stream(sse_response):
+                        sse_events.labels(event.get("type", "unknown")).inc()
+                        self._observe_session_event(event)
+                        for subscriber in list(self._event_subscribers):
+                            await subscriber.put(event)
+
+            except SSEConnectionError as e:
+                error = e
+            except httpx.ReadError as e:
+                self.log.error("bridge.sse_read_error", exc=e)
+                error = SSEConnectionError(f"SSE read error: {e}")
+            except httpx.HTTPError as e:
+                error = SSEConnectionError(f"SSE connection failed: {e}")
+
+            self._event_stream_connected.clear()
+            self.metrics.reconnects.labels("event_stream").inc()
+            if error is not None:
+                self._event_stream_error = error
+                for subscriber in list(self._event_subscribers):
+                    await subscriber.put(error)
+
+            attempts += 1
+            delay = min(
+                self.EVENT_STREAM_BACKOFF_BASE * 2 ** (attempts - 1),
+                self.EVENT_STREAM_BACKOFF_MAX,
+            )
+            self.log.warn(
+                "bridge.event_stream_disconnect",
+                detail=str(error) if error else "stream_ended",
+                attempt=attempts,
+                delay_s=round(delay, 2),
+            )
+            await asyncio.sleep(delay)
+
+    async def _ensure_event_stream(self) -> None:
+        """Start the event subscription if needed and wait until it is connected."""
+        if self._event_stream_task is None or self._event_stream_task.done():
+            self._event_stream_task = asyncio.create_task(self._event_stream_loop())
+        try:
+            await asyncio.wait_for(
+                self._event_stream_connected.wait(), timeout=self.HTTP_CONNECT_TIMEOUT
+            )
+        except TimeoutError:
+            detail = self._event_stream_error or "timed out"
+            raise SSEConnectionError(f"SSE connection not established: {detail}")
+
+    def _subscribe_events(self) -> asyncio.Queue[dict[str, Any] | Exception]:
+        """Register a consumer queue that receives every event from the subscription."""
+        queue: asyncio.Queue[dict[str, Any] | Exception] = asyncio.Queue(
+            maxsize=self.EVENT_QUEUE_MAX
+        )
+        self._event_subscribers.append(queue)
+        return queue
+
+    def _unsubscribe_events(self, queue: asyncio.Queue[dict[str, Any] | Exception]) -> None:
+        """Remove a consumer queue, draining it so the dispatcher never blocks on it."""
+        with contextlib.suppress(ValueError):
+            self._event_subscribers.remove(queue)
+        self._drain_queue(queue)
+
+    @staticmethod
+    def _drain_queue(
+        queue: asyncio.Queue[dict[str, Any] | Exception],
+    ) -> list[dict[str, Any] | Exception]:
+        """Remove and return everything currently in a consumer queue."""
+        items = []
+        while not queue.empty():
+            items.append(queue.get_nowait())
+        return items
+
+    async def _iter_subscribed_events(
+        self,
+        queue: asyncio.Queue[dict[str, Any] | Exception],
+        timeout_ctx: asyncio.Timeout,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield events delivered to a consumer queue, resetting the inactivity deadline."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            timeout_ctx.reschedule(loop.time() + self.sse_inactivity_timeout)
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _observe_session_event(self, event: dict[str, Any]) -> None:
+        """Track session-level state from events, including those between prompts."""
+        event_type = event.get("type")
+        props = event.get("properties", {})
+        if event_type == "session.status":
+            if props.get("sessionID") == self.opencode_session_id:
+                self.opencode_session_status = props.get("status", {}).get("type")
+        elif event_type == "session.idle":
+            if props.get("sessionID") == self.opencode_session_id:
+                self.opencode_session_status = "idle"
+        elif event_type == "session.created" and not self._event_subscribers:
+            info = props.get("info", {})
+            if info.get("parentID") == self.opencode_session_id:
+                self.log.debug(
+                    "bridge.child_session_between_prompts", child_session_id=info.get("id")
+                )
 
     async def _stream_opencode_response_sse(
         self,
@@ -712,6 +1865,8 @@ class AgentBridge:
         content: str,
         model: str | None = None,
         reasoning_effort: str | None = None,
+        timeline: PromptTimeline | None = None,
+        reattach: InflightPrompt | None = None,
     ) -> AsyncIterator[dict[str, Any]]:
         """Stream response from OpenCode using Server-Sent Events.
 
@@ -726,125 +1881,56 @@ class AgentBridge:
         The ascending ID ensures our user message ID is lexicographically greater
         than any previous assistant message IDs, preventing the early exit condition
         in OpenCode's prompt loop (lastUser.id < lastAssistant.id).
+
+        When a timeline is given, the sse_connected, prompt_accepted and idle
+        milestones are recorded on it.
+
+        With reattach, the prompt a previous bridge process submitted is picked
+        up instead of sending a new one: the stream first catches up from the
+        message API, skipping what the record says was already sent.
+
+        The in-flight record is removed once the prompt ends, is stopped or
+        fails. Cancelled any other way (the bridge shutting down), the stream
+        leaves it for the next bridge process to reattach to.
         """
         if not self.http_client or not self.opencode_session_id:
             raise RuntimeError("OpenCode session not initialized")
+        if timeline is None:
+            timeline = PromptTimeline()
 
-        opencode_message_id = OpenCodeIdentifier.ascending("message")
+        opencode_message_id = (
+            reattach.opencode_message_id if reattach else OpenCodeIdentifier.ascending("message")
+        )
         request_body = self._build_prompt_request_body(
             content, model, opencode_message_id, reasoning_effort
         )
 
-        sse_url = f"{self.opencode_base_url}/event"
         async_url = f"{self.opencode_base_url}/session/{self.opencode_session_id}/prompt_async"
 
-        cumulative_text: dict[str, str] = {}
-        emitted_tool_states: set[str] = set()
-        allowed_assistant_msg_ids: set[str] = set()
-        pending_parts: dict[str, list[tuple[dict[str, Any], Any]]] = {}
-        pending_parts_total = 0
-        pending_drop_logged = False
-
-        # Child session tracking (sub-tasks)
-        tracked_child_session_ids: set[str] = set()
-
-        start_time = time.time()
+        state = PromptStreamState(
+            message_id,
+            opencode_message_id,
+            PendingParts(self.PENDING_PARTS_MEMORY_BYTES, self.PENDING_PARTS_SPILL_BYTES),
+        )
+        if reattach:
+            state.completed_text_part_ids.update(reattach.settled_part_ids)
+            state.emitted_step_part_ids.update(reattach.step_part_ids)
+            state.emitted_tool_states.update(reattach.tool_states)
+        handlers = self._sse_handlers
+        own_session_id = self.opencode_session_id
         loop = asyncio.get_running_loop()
 
-        def buffer_part(oc_msg_id: str, part: dict[str, Any], delta: Any) -> None:
-            nonlocal pending_parts_total
-            nonlocal pending_drop_logged
-            if pending_parts_total >= self.MAX_PENDING_PART_EVENTS:
-                if not pending_drop_logged:
-                    self.log.warn(
-                        "bridge.pending_parts_dropped",
-                        message_id=message_id,
-                        limit=self.MAX_PENDING_PART_EVENTS,
-                    )
-                    pending_drop_logged = True
-                return
-            pending_parts.setdefault(oc_msg_id, []).append((part, delta))
-            pending_parts_total += 1
-
-        def handle_part(
-            part: dict[str, Any],
-            delta: Any,
-            *,
-            is_subtask: bool = False,
-        ) -> list[dict[str, Any]]:
-            part_type = part.get("type", "")
-            part_id = part.get("id", "")
-            events: list[dict[str, Any]] = []
-
-            if part_type == "text":
-                if is_subtask:
-                    return events  # Don't forward child text tokens
-                text = part.get("text", "")
-                if delta:
-                    cumulative_text[part_id] = cumulative_text.get(part_id, "") + delta
-                else:
-                    cumulative_text[part_id] = text
-
-                if cumulative_text.get(part_id):
-                    events.append(
-                        {
-                            "type": "token",
-                            "content": cumulative_text[part_id],
-                            "messageId": message_id,
-                        }
-                    )
-
-            elif part_type == "tool":
-                tool_event = self._transform_part_to_event(part, message_id)
-                if tool_event:
-                    state = part.get("state", {})
-                    status = state.get("status", "")
-                    call_id = part.get("callID", "")
-                    part_sid = part.get("sessionID", "")
-                    tool_key = f"tool:{part_sid}:{call_id}:{status}"
-
-                    if tool_key not in emitted_tool_states:
-                        emitted_tool_states.add(tool_key)
-                        events.append(tool_event)
-
-            elif part_type == "step-start":
-                events.append(
-                    {
-                        "type": "step_start",
-                        "messageId": message_id,
-                    }
-                )
-
-            elif part_type == "step-finish":
-                events.append(
-                    {
-                        "type": "step_finish",
-                        "cost": part.get("cost"),
-                        "tokens": part.get("tokens"),
-                        "reason": part.get("reason"),
-                        "messageId": message_id,
-                    }
-                )
-
-            if is_subtask:
-                for ev in events:
-                    ev["isSubtask"] = True
-            return events
-
+        subscriber = self._subscribe_events()
+        keep_inflight = False
         try:
-            deadline = asyncio.get_running_loop().time() + self.sse_inactivity_timeout
-            async with asyncio.timeout_at(deadline) as timeout_ctx:
-                async with self.http_client.stream(
-                    "GET",
-                    sse_url,
-                    timeout=httpx.Timeout(None, connect=self.HTTP_CONNECT_TIMEOUT, read=None),
-                ) as sse_response:
-                    if sse_response.status_code != 200:
-                        raise SSEConnectionError(
-                            f"SSE connection failed: {sse_response.status_code}"
-                        )
+            await self._ensure_event_stream()
+            timeline.mark("sse_connected")
 
-                    prompt_start = loop.time()
+            deadline = loop.time() + self.sse_inactivity_timeout
+            async with asyncio.timeout_at(deadline) as timeout_ctx:
+                prompt_start = loop.time()
+                if reattach is None:
+                    self._save_inflight(state)
                     prompt_response = await self.http_client.post(
                         async_url,
                         json=request_body,
@@ -860,218 +1946,91 @@ class AgentBridge:
                         raise RuntimeError(
                             f"Async prompt failed: {prompt_response.status_code} - {error_body}"
                         )
-
-                    async for event in self._parse_sse_stream(sse_response, timeout_ctx):
-                        event_type = event.get("type")
-                        props = event.get("properties", {})
-
-                        if event_type == "server.connected":
-                            pass
-                        elif event_type != "server.heartbeat":
-                            # Track direct child sessions before filtering
-                            if event_type == "session.created":
-                                info = props.get("info", {})
-                                child_id = info.get("id")
-                                child_parent = info.get("parentID")
-                                if child_id and child_parent == self.opencode_session_id:
-                                    tracked_child_session_ids.add(child_id)
-                                    self.log.info(
-                                        "bridge.child_session_detected",
-                                        child_session_id=child_id,
-                                        source="session.created",
-                                    )
-                                # Always continue: no downstream handler processes session.created,
-                                # and non-matching events would just fall through to no-op.
-                                continue
-
-                            event_session_id = props.get("sessionID") or props.get("part", {}).get(
-                                "sessionID"
-                            )
-                            is_child = event_session_id in tracked_child_session_ids
-                            if (
-                                not event_session_id
-                                or event_session_id == self.opencode_session_id
-                                or is_child
-                            ):
-                                if event_type == "message.updated":
-                                    info = props.get("info", {})
-                                    msg_session_id = info.get("sessionID")
-                                    if msg_session_id == self.opencode_session_id:
-                                        oc_msg_id = info.get("id", "")
-                                        parent_id = info.get("parentID", "")
-                                        role = info.get("role", "")
-                                        finish = info.get("finish", "")
-
-                                        self.log.debug(
-                                            "bridge.message_updated",
-                                            role=role,
-                                            oc_msg_id=oc_msg_id,
-                                            parent_match=(parent_id == opencode_message_id),
-                                        )
-
-                                        if (
-                                            role == "assistant"
-                                            and parent_id == opencode_message_id
-                                            and oc_msg_id
-                                        ):
-                                            allowed_assistant_msg_ids.add(oc_msg_id)
-                                            pending = pending_parts.pop(oc_msg_id, [])
-                                            if pending:
-                                                pending_parts_total -= len(pending)
-                                                for part, delta in pending:
-                                                    for part_event in handle_part(part, delta):
-                                                        yield part_event
-
-                                        if finish and finish not in ("tool-calls", ""):
-                                            self.log.debug(
-                                                "bridge.message_finished",
-                                                finish=finish,
-                                            )
-
-                                    elif msg_session_id in tracked_child_session_ids:
-                                        # Child session: authorize all assistant messages
-                                        oc_msg_id = info.get("id", "")
-                                        role = info.get("role", "")
-                                        if role == "assistant" and oc_msg_id:
-                                            allowed_assistant_msg_ids.add(oc_msg_id)
-                                            pending = pending_parts.pop(oc_msg_id, [])
-                                            if pending:
-                                                pending_parts_total -= len(pending)
-                                                for part, delta in pending:
-                                                    for ev in handle_part(
-                                                        part, delta, is_subtask=True
-                                                    ):
-                                                        yield ev
-
-                                elif event_type == "message.part.updated":
-                                    part = props.get("part", {})
-                                    delta = props.get("delta")
-                                    oc_msg_id = part.get("messageID", "")
-                                    part_session_id = part.get("sessionID", "")
-
-                                    # Discover child sessions from task tool metadata (covers task_id resume)
-                                    if (
-                                        part.get("tool") == "task"
-                                        and part_session_id == self.opencode_session_id
-                                    ):
-                                        metadata = part.get("metadata")
-                                        child_sid = (
-                                            metadata.get("sessionId")
-                                            if isinstance(metadata, dict)
-                                            else None
-                                        )
-                                        if child_sid and child_sid not in tracked_child_session_ids:
-                                            tracked_child_session_ids.add(child_sid)
-                                            self.log.info(
-                                                "bridge.child_session_detected",
-                                                child_session_id=child_sid,
-                                                source="task_metadata",
-                                            )
-
-                                    if oc_msg_id in allowed_assistant_msg_ids:
-                                        if part_session_id in tracked_child_session_ids:
-                                            for ev in handle_part(part, delta, is_subtask=True):
-                                                yield ev
-                                        else:
-                                            for part_event in handle_part(part, delta):
-                                                yield part_event
-                                    elif oc_msg_id:
-                                        buffer_part(oc_msg_id, part, delta)
-
-                                elif event_type == "session.idle":
-                                    idle_session_id = props.get("sessionID")
-                                    # Only parent idle terminates the stream
-                                    if idle_session_id == self.opencode_session_id:
-                                        elapsed = time.time() - start_time
-                                        self.log.debug(
-                                            "bridge.session_idle",
-                                            elapsed_s=round(elapsed, 1),
-                                            tracked_msgs=len(allowed_assistant_msg_ids),
-                                        )
-                                        async for final_event in self._fetch_final_message_state(
-                                            message_id,
-                                            opencode_message_id,
-                                            cumulative_text,
-                                            allowed_assistant_msg_ids,
-                                        ):
-                                            yield final_event
-                                        return
-
-                                elif event_type == "session.status":
-                                    status_session_id = props.get("sessionID")
-                                    status = props.get("status", {})
-                                    # Only parent status=idle terminates the stream
-                                    if (
-                                        status_session_id == self.opencode_session_id
-                                        and status.get("type") == "idle"
-                                    ):
-                                        elapsed = time.time() - start_time
-                                        self.log.debug(
-                                            "bridge.session_status_idle",
-                                            elapsed_s=round(elapsed, 1),
-                                            tracked_msgs=len(allowed_assistant_msg_ids),
-                                        )
-                                        async for final_event in self._fetch_final_message_state(
-                                            message_id,
-                                            opencode_message_id,
-                                            cumulative_text,
-                                            allowed_assistant_msg_ids,
-                                        ):
-                                            yield final_event
-                                        return
-
-                                elif event_type == "session.error":
-                                    error_session_id = props.get("sessionID")
-                                    if error_session_id == self.opencode_session_id:
-                                        error_msg = self._extract_error_message(
-                                            props.get("error", {})
-                                        )
-                                        self.log.error("bridge.session_error", error_msg=error_msg)
-                                        yield {
-                                            "type": "error",
-                                            "error": error_msg or "Unknown error",
-                                            "messageId": message_id,
-                                        }
-                                        return
-                                    elif error_session_id in tracked_child_session_ids:
-                                        error_msg = self._extract_error_message(
-                                            props.get("error", {})
-                                        )
-                                        self.log.error(
-                                            "bridge.child_session_error",
-                                            error_msg=error_msg,
-                                            child_session_id=error_session_id,
-                                        )
-                                        yield {
-                                            "type": "error",
-                                            "error": error_msg or "Sub-task error",
-                                            "messageId": message_id,
-                                            "isSubtask": True,
-                                        }
-                                        # No return — parent stream continues
-
-                        if loop.time() > prompt_start + self.PROMPT_MAX_DURATION:
-                            elapsed = time.time() - start_time
+                    timeline.mark("prompt_accepted")
+                else:
+                    async for resumed_event in self._resume_prompt_stream(
+                        state, subscriber, "bridge_restart", 0, reattach.text_offsets
+                    ):
+                        yield resumed_event
+                    if state.finish_reason is None and await self._opencode_session_busy() is False:
+                        # Nothing more is coming for this prompt
+                        state.finish_reason = "idle"
+                next_save_at = loop.time() + self.INFLIGHT_SAVE_INTERVAL
+                max_duration_at = prompt_start + self.PROMPT_MAX_DURATION
+
+                resumes = 0
+                while state.finish_reason is None:
+                    try:
+                        async for event in self._iter_subscribed_events(subscriber, timeout_ctx):
+                            handler = handlers.get(event.get("type", ""))
+                            if handler is not None:
+                                props = event.get("properties", {})
+                                # Drop events for sessions that are neither ours nor a tracked
+                                # child before doing any other work
+                                event_session_id = (
+                                    props.get("sessionID")
+                                    or (props.get("part") or {}).get("sessionID")
+                                    or (props.get("info") or {}).get("sessionID")
+                                )
+                                if (
+                                    not event_session_id
+                                    or event_session_id == own_session_id
+                                    or event_session_id in state.child_session_ids
+                                ):
+                                    for out_event in handler(state, props):
+                                        yield out_event
+                                    if state.finish_reason is not None:
+                                        break
+                                    if loop.time() >= next_save_at:
+                                        self._save_inflight(state)
+                                        next_save_at = loop.time() + self.INFLIGHT_SAVE_INTERVAL
+
+                            if loop.time() > max_duration_at:
+                                elapsed = time.time() - state.start_time
+                                self.log.error(
+                                    "bridge.prompt_max_duration_timeout",
+                                    timeout_ms=int(self.PROMPT_MAX_DURATION * 1000),
+                                    elapsed_ms=int(elapsed * 1000),
+                                    message_id=message_id,
+                                )
+                                await self._request_opencode_stop(
+                                    reason="prompt_max_duration_timeout"
+                                )
+                                async for final_event in self._reconcile_prompt(state):
+                                    yield final_event
+                                raise RuntimeError(
+                                    f"Prompt exceeded max duration of {self.PROMPT_MAX_DURATION:.0f}s."
+                                )
+                    except SSEConnectionError as e:
+                        # OpenCode usually keeps working through a dropped event
+                        # stream: resubscribe and catch up instead of failing
+                        resumes += 1
+                        if resumes > self.SSE_RESUME_MAX_ATTEMPTS:
+                            self.metrics.sse_resumptions.labels("exhausted").inc()
                             self.log.error(
-                                "bridge.prompt_max_duration_timeout",
-                                timeout_ms=int(self.PROMPT_MAX_DURATION * 1000),
-                                elapsed_ms=int(elapsed * 1000),
+                                "bridge.sse_resume_exhausted",
                                 message_id=message_id,
+                                attempts=resumes - 1,
+                                exc=e,
                             )
-                            await self._request_opencode_stop(reason="prompt_max_duration_timeout")
-                            async for final_event in self._fetch_final_message_state(
-                                message_id,
-                                opencode_message_id,
-                                cumulative_text,
-                                allowed_assistant_msg_ids,
-                            ):
-                                yield final_event
-                            raise RuntimeError(
-                                f"Prompt exceeded max duration of {self.PROMPT_MAX_DURATION:.0f}s."
-                            )
+                            raise
+                        async for resumed_event in self._resume_prompt_stream(
+                            state, subscriber, str(e), resumes
+                        ):
+                            yield resumed_event
+                        timeout_ctx.reschedule(loop.time() + self.sse_inactivity_timeout)
+
+                if state.finish_reason == "idle":
+                    timeline.mark("idle")
+                    async for final_event in self._reconcile_prompt(state):
+                        yield final_event
+
+        except asyncio.CancelledError as e:
+            keep_inflight = e.args != (self.STOP_CANCEL_MESSAGE,)
+            raise
 
         except TimeoutError:
-            elapsed = time.time() - start_time
+            elapsed = time.time() - state.start_time
             self.log.error(
                 "bridge.sse_inactivity_timeout",
                 timeout_name="sse_inactivity",
@@ -1081,21 +2040,525 @@ class AgentBridge:
                 message_id=message_id,
             )
             await self._request_opencode_stop(reason="inactivity_timeout")
-            async for final_event in self._fetch_final_message_state(
-                message_id,
-                opencode_message_id,
-                cumulative_text,
-                allowed_assistant_msg_ids,
-            ):
+            async for final_event in self._reconcile_prompt(state):
                 yield final_event
             raise RuntimeError(
                 f"SSE stream inactive for {self.sse_inactivity_timeout:.0f}s "
                 f"(no data received). Total elapsed: {elapsed:.0f}s"
             )
 
-        except httpx.ReadError as e:
-            self.log.error("bridge.sse_read_error", exc=e)
-            raise SSEConnectionError(f"SSE read error: {e}")
+        finally:
+            self._unsubscribe_events(subscriber)
+            if not keep_inflight:
+                self._clear_inflight()
+            elif self.INFLIGHT_PATH.exists():
+                # Bring the record up to what was actually sent before exiting
+                self._save_inflight(state)
+            state.pending_parts.close()
+            self._prompt_state_peak_bytes = state.peak_bytes
+
+    async def _resume_prompt_stream(
+        self,
+        state: PromptStreamState,
+        subscriber: asyncio.Queue[dict[str, Any] | Exception],
+        reason: str,
+        attempt: int,
+        text_offsets: dict[str, int] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Pick a prompt stream back up after the OpenCode event stream failed.
+
+        Waits for the subscription to reconnect, then replays the current parts
+        of the prompt's assistant messages from the message API through the
+        usual part handler, so what the stream missed is sent and nothing is
+        sent twice. Sets state.finish_reason if OpenCode finished meanwhile.
+
+        Attempt 0 is a reattach after a bridge restart; text_offsets then give
+        how much of each text part the previous process already sent.
+        """
+        self.log.warn(
+            "bridge.sse_resume",
+            message_id=state.message_id,
+            attempt=attempt,
+            detail=reason,
+        )
+        resumptions = self.metrics.sse_resumptions
+        try:
+            await self._ensure_event_stream()
+        except SSEConnectionError as e:
+            resumptions.labels("failed").inc()
+            self.log.warn("bridge.sse_resume_error", message_id=state.message_id, exc=e)
+            return
+
+        # Errors from reconnect attempts that failed before this one are stale
+        live = [item for item in self._drain_queue(subscriber) if not isinstance(item, Exception)]
+        for item in live:
+            subscriber.put_nowait(item)
+
+        try:
+            messages = await self._fetch_recent_messages()
+        except httpx.HTTPError as e:
+            self.log.warn("bridge.sse_resume_error", message_id=state.message_id, exc=e)
+            messages = None
+        if messages is None:
+            # The next event (or idle) still arrives over the restored stream
+            resumptions.labels("failed").inc()
+            return
+
+        events: list[dict[str, Any]] = []
+        latest: dict[str, Any] | None = None
+        for msg in messages:
+            info = msg.get("info", {})
+            oc_msg_id = info.get("id", "")
+            if info.get("role") != "assistant" or not oc_msg_id:
+                continue
+            if info.get("parentID") == state.opencode_message_id:
+                state.allowed_assistant_msg_ids.add(oc_msg_id)
+                state.parent_assistant_msg_ids.add(oc_msg_id)
+                events.extend(self._flush_pending_parts(state, oc_msg_id, is_subtask=False))
+                if latest is None or oc_msg_id > latest.get("id", ""):
+                    latest = info
+            elif oc_msg_id not in state.allowed_assistant_msg_ids:
+                continue
+            if info.get("time", {}).get("completed"):
+                state.completed_msg_ids.add(oc_msg_id)
+            for part in msg.get("parts", []):
+                part_id = part.get("id", "")
+                if (
+                    text_offsets
+                    and part_id in text_offsets
+                    and part_id not in state.cumulative_text
+                ):
+                    sent = part.get("text", "")[: text_offsets[part_id]]
+                    state.cumulative_text[part_id] = sent
+                    state.text_bytes += len(sent)
+                if (
+                    part.get("type") == "text"
+                    and not part.get("time", {}).get("end")
+                    and part.get("text", "") == state.cumulative_text.get(part_id)
+                ):
+                    continue
+                events.extend(self._handle_prompt_part(state, part, None))
+
+        if (
+            latest is not None
+            and latest.get("time", {}).get("completed")
+            and latest.get("finish") not in (None, "", "tool-calls")
+        ):
+            state.finish_reason = "idle"
+
+        resumptions.labels("resumed" if attempt else "reattached").inc()
+        self.log.info(
+            "bridge.sse_resumed",
+            message_id=state.message_id,
+            attempt=attempt,
+            replayed_events=len(events),
+            finished=state.finish_reason is not None,
+        )
+        for event in events:
+            yield event
+
+    async def _opencode_session_busy(self) -> bool | None:
+        """Whether OpenCode is working on our session; None if it cannot tell."""
+        if not self.http_client or not self.opencode_session_id:
+            return None
+        try:
+            response = await self.http_client.get(
+                f"{self.opencode_base_url}/session/status",
+                timeout=self.OPENCODE_REQUEST_TIMEOUT,
+            )
+        except httpx.HTTPError as e:
+            self.log.warn("bridge.session_status_error", exc=e)
+            return None
+        statuses = response.json() if response.status_code == 200 else None
+        if not isinstance(statuses, dict):
+            return None
+        status = statuses.get(self.opencode_session_id)
+        # Idle sessions are left out of the map
+        return isinstance(status, dict) and status.get("type") != "idle"
+
+    def _save_inflight(self, state: PromptStreamState) -> None:
+        """Record the prompt's progress for a restarted bridge to reattach to."""
+        record = InflightPrompt(
+            message_id=state.message_id,
+            opencode_session_id=self.opencode_session_id or "",
+            opencode_message_id=state.opencode_message_id,
+            last_seq=self.journal.last_seq,
+            text_offsets={part_id: len(text) for part_id, text in state.cumulative_text.items()},
+            settled_part_ids=sorted(state.completed_text_part_ids),
+            step_part_ids=sorted(state.emitted_step_part_ids),
+            tool_states=sorted(state.emitted_tool_states),
+        )
+        try:
+            record.save(self.INFLIGHT_PATH)
+        except OSError as e:
+            self.log.warn("prompt.inflight_save_error", exc=e)
+
+    def _clear_inflight(self) -> None:
+        with contextlib.suppress(OSError):
+            self.INFLIGHT_PATH.unlink(missing_ok=True)
+
+    async def _reattach_inflight_prompt(self) -> None:
+        """Queue the prompt a previous bridge process was streaming, if any.
+
+        Only a record for the current OpenCode session is used. Its events
+        continue the journal's numbering from where that process stopped.
+        """
+        record = InflightPrompt.load(self.INFLIGHT_PATH)
+        if record is None:
+            return
+        if not self.opencode_session_id or record.opencode_session_id != self.opencode_session_id:
+            self.log.info(
+                "prompt.reattach_skip", message_id=record.message_id, reason="session_changed"
+            )
+            self._clear_inflight()
+            return
+        self.journal.advance(record.last_seq)
+        self.log.info(
+            "prompt.reattach",
+            message_id=record.message_id,
+            oc_message_id=record.opencode_message_id,
+            last_seq=record.last_seq,
+        )
+        await self._enqueue_prompt(
+            {"type": "prompt", "messageId": record.message_id, "reattach": record}
+        )
+
+    def _reconcile_prompt(self, state: PromptStreamState) -> AsyncIterator[dict[str, Any]]:
+        """Reconcile the prompt's final message state against what was streamed."""
+        return self._fetch_final_message_state(
+            state.message_id,
+            state.opencode_message_id,
+            state.cumulative_text,
+            state.allowed_assistant_msg_ids,
+            state.unreconciled_msg_ids(),
+            state.completed_text_part_ids,
+        )
+
+    # Prompt stream handlers, dispatched by OpenCode event type from
+    # _stream_opencode_response_sse after the session pre-filter. Each returns
+    # the events to forward and sets state.finish_reason to end the stream.
+
+    def _on_session_created(
+        self, state: PromptStreamState, props: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        info = props.get("info", {})
+        child_id = info.get("id")
+        if child_id and info.get("parentID") == self.opencode_session_id:
+            state.child_session_ids.add(child_id)
+            self.log.info(
+                "bridge.child_session_detected",
+                child_session_id=child_id,
+                source="session.created",
+            )
+        return []
+
+    def _on_message_updated(
+        self, state: PromptStreamState, props: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        info = props.get("info", {})
+        msg_session_id = info.get("sessionID")
+        oc_msg_id = info.get("id", "")
+        role = info.get("role", "")
+
+        if msg_session_id == self.opencode_session_id:
+            parent_id = info.get("parentID", "")
+            finish = info.get("finish", "")
+
+            self.log.debug(
+                "bridge.message_updated",
+                role=role,
+                oc_msg_id=oc_msg_id,
+                parent_match=(parent_id == state.opencode_message_id),
+            )
+
+            events: list[dict[str, Any]] = []
+            if role == "assistant" and parent_id == state.opencode_message_id and oc_msg_id:
+                state.allowed_assistant_msg_ids.add(oc_msg_id)
+                state.parent_assistant_msg_ids.add(oc_msg_id)
+                if info.get("time", {}).get("completed"):
+                    state.completed_msg_ids.add(oc_msg_id)
+                events = self._flush_pending_parts(state, oc_msg_id, is_subtask=False)
+
+            if finish and finish not in ("tool-calls", ""):
+                self.log.debug("bridge.message_finished", finish=finish)
+            return events
+
+        if msg_session_id in state.child_session_ids and role == "assistant" and oc_msg_id:
+            # Child session: authorize all assistant messages
+            state.allowed_assistant_msg_ids.add(oc_msg_id)
+            return self._flush_pending_parts(state, oc_msg_id, is_subtask=True)
+        return []
+
+    def _on_part_updated(
+        self, state: PromptStreamState, props: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        part = props.get("part", {})
+        part_session_id = part.get("sessionID", "")
+        is_subtask = part_session_id in state.child_session_ids
+        if is_subtask and part.get("type") == "text":
+            # Child text tokens are never forwarded; skip them before any bookkeeping
+            return []
+        oc_msg_id = part.get("messageID", "")
+
+        # Discover child sessions from task tool metadata (covers task_id resume)
+        if part.get("tool") == "task" and part_session_id == self.opencode_session_id:
+            metadata = part.get("metadata")
+            child_sid = metadata.get("sessionId") if isinstance(metadata, dict) else None
+            if child_sid and child_sid not in state.child_session_ids:
+                state.child_session_ids.add(child_sid)
+                self.log.info(
+                    "bridge.child_session_detected",
+                    child_session_id=child_sid,
+                    source="task_metadata",
+                )
+
+        if oc_msg_id in state.allowed_assistant_msg_ids:
+            return self._handle_prompt_part(state, part, props.get("delta"), is_subtask=is_subtask)
+        if oc_msg_id:
+            self._buffer_prompt_part(state, oc_msg_id, part, props.get("delta"))
+        return []
+
+    def _on_session_idle(
+        self, state: PromptStreamState, props: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        # Only parent idle terminates the stream
+        if props.get("sessionID") == self.opencode_session_id:
+            self.log.debug(
+                "bridge.session_idle",
+                elapsed_s=round(time.time() - state.start_time, 1),
+                tracked_msgs=len(state.allowed_assistant_msg_ids),
+            )
+            state.finish_reason = "idle"
+        return []
+
+    def _on_session_status(
+        self, state: PromptStreamState, props: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        # Only parent status=idle terminates the stream
+        if (
+            props.get("sessionID") == self.opencode_session_id
+            and props.get("status", {}).get("type") == "idle"
+        ):
+            self.log.debug(
+                "bridge.session_status_idle",
+                elapsed_s=round(time.time() - state.start_time, 1),
+                tracked_msgs=len(state.allowed_assistant_msg_ids),
+            )
+            state.finish_reason = "idle"
+        return []
+
+    def _on_session_error(
+        self, state: PromptStreamState, props: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        error_session_id = props.get("sessionID")
+        if error_session_id == self.opencode_session_id:
+            error_msg = self._extract_error_message(props.get("error", {}))
+            self.log.error("bridge.session_error", error_msg=error_msg)
+            state.finish_reason = "error"
+            return [
+                {
+                    "type": "error",
+                    "error": error_msg or "Unknown error",
+                    "messageId": state.message_id,
+                }
+            ]
+        if error_session_id in state.child_session_ids:
+            error_msg = self._extract_error_message(props.get("error", {}))
+            self.log.error(
+                "bridge.child_session_error",
+                error_msg=error_msg,
+                child_session_id=error_session_id,
+            )
+            # No finish_reason: the parent stream continues
+            return [
+                {
+                    "type": "error",
+                    "error": error_msg or "Sub-task error",
+                    "messageId": state.message_id,
+                    "isSubtask": True,
+                }
+            ]
+        return []
+
+    def _buffer_prompt_part(
+        self, state: PromptStreamState, oc_msg_id: str, part: dict[str, Any], delta: Any
+    ) -> None:
+        """Hold a part whose message has not been correlated to this prompt yet."""
+        pending = state.pending_parts
+        was_spilled = pending.spilled
+        if not pending.add(oc_msg_id, part, delta):
+            if pending.dropped == 1:
+                self.log.warn(
+                    "bridge.pending_parts_dropped",
+                    message_id=state.message_id,
+                    memory_limit=pending.max_memory_bytes,
+                    spill_limit=pending.max_spill_bytes,
+                )
+            return
+        if pending.spilled and not was_spilled:
+            self.log.info(
+                "bridge.pending_parts_spilled",
+                message_id=state.message_id,
+                memory_limit=pending.max_memory_bytes,
+                buffered=len(pending),
+            )
+        state.update_peak()
+
+    def _flush_pending_parts(
+        self, state: PromptStreamState, oc_msg_id: str, is_subtask: bool
+    ) -> list[dict[str, Any]]:
+        """Process parts buffered for a message that has just been correlated."""
+        pending = state.pending_parts.pop(oc_msg_id)
+        if not pending:
+            return []
+        events: list[dict[str, Any]] = []
+        for part, delta in pending:
+            events.extend(self._handle_prompt_part(state, part, delta, is_subtask=is_subtask))
+        return events
+
+    def _handle_prompt_part(
+        self,
+        state: PromptStreamState,
+        part: dict[str, Any],
+        delta: Any,
+        *,
+        is_subtask: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Turn a part of one of our assistant messages into control-plane events."""
+        message_id = state.message_id
+        part_type = part.get("type", "")
+        part_id = part.get("id", "")
+        events: list[dict[str, Any]] = []
+
+        if part_type == "text":
+            if is_subtask:
+                return events  # Don't forward child text tokens
+            if part_id in state.completed_text_part_ids:
+                return events  # Final text already sent and evicted
+            cumulative_text = state.cumulative_text
+            text = part.get("text", "")
+            state.text_part_msg_ids[part_id] = part.get("messageID", "")
+            previous = cumulative_text.get(part_id, "")
+            current = previous + delta if delta else text
+            cumulative_text[part_id] = current
+            state.text_bytes += len(current) - len(previous)
+            state.update_peak()
+
+            if self._token_resync_requested:
+                # Control plane lost track of the streamed text: resend every live
+                # part in full. Parts that already ended were evicted and are not
+                # resent; their text is only as complete as the events delivered
+                self._token_resync_requested = False
+                state.token_update_counts.clear()
+                for pid, full_text in cumulative_text.items():
+                    if full_text:
+                        events.append(self._build_token_event(message_id, pid, full_text, ""))
+            elif current:
+                events.append(
+                    self._build_token_event(
+                        message_id,
+                        part_id,
+                        current,
+                        previous,
+                        state.token_update_counts,
+                    )
+                )
+
+            if part.get("time", {}).get("end"):
+                state.completed_text_part_ids.add(part_id)
+                state.text_bytes -= len(cumulative_text.pop(part_id))
+                state.token_update_counts.pop(part_id, None)
+
+        elif part_type == "tool":
+            events.extend(self._handle_tool_part(state, part, message_id))
+
+        elif part_type in ("step-start", "step-finish") and part_id in state.emitted_step_part_ids:
+            pass  # Already forwarded; a stream resume replays every part
+
+        elif part_type == "step-start":
+            if part_id:
+                state.emitted_step_part_ids.add(part_id)
+            events.append(
+                {
+                    "type": "step_start",
+                    "messageId": message_id,
+                }
+            )
+
+        elif part_type == "step-finish":
+            if part_id:
+                state.emitted_step_part_ids.add(part_id)
+            events.append(
+                {
+                    "type": "step_finish",
+                    "cost": part.get("cost"),
+                    "tokens": part.get("tokens"),
+                    "reason": part.get("reason"),
+                    "messageId": message_id,
+                }
+            )
+
+        if is_subtask:
+            for ev in events:
+                ev["isSubtask"] = True
+        return events
+
+    def _handle_tool_part(
+        self, state: PromptStreamState, part: dict[str, Any], message_id: str
+    ) -> list[dict[str, Any]]:
+        """Turn a tool part into a tool_call per status, plus tool_output while running."""
+        tool_event = self._transform_part_to_event(part, message_id)
+        if not tool_event:
+            return []
+        status = tool_event["status"]
+        part_sid = part.get("sessionID", "")
+        call_id = part.get("callID", "")
+        call_key = f"{part_sid}/{call_id}"
+        tool_key = f"{call_key}/{status}"
+
+        if tool_key in state.emitted_tool_states:
+            if status == "running":
+                progress = state.tool_outputs.get(call_key)
+                if progress is not None:
+                    output_event = self._build_tool_output_event(
+                        progress, call_id, tool_event["output"] or "", message_id
+                    )
+                    if output_event:
+                        return [output_event]
+            return []
+
+        state.emitted_tool_states.add(tool_key)
+        if "tool_args_once" in self.capabilities:
+            if self._tool_args_resync_requested:
+                self._tool_args_resync_requested = False
+                state.tool_args_hashes.clear()
+            self._compact_tool_args(state, call_key, tool_event)
+        if status == "running":
+            if "tool_output_stream" in self.capabilities:
+                state.tool_outputs[call_key] = ToolOutputProgress(tool_event["output"] or "")
+        elif status in ("completed", "error"):
+            state.tool_outputs.pop(call_key, None)
+            state.tool_args_hashes.pop(call_key, None)
+        return [tool_event]
+
+    @staticmethod
+    def _compact_tool_args(
+        state: PromptStreamState, call_key: str, tool_event: dict[str, Any]
+    ) -> None:
+        """Drop args from a tool_call whose call already sent identical args.
+
+        Every event carries ``argsHash``: the first 16 hex digits of the SHA-256
+        of the args' compact JSON encoding. ``args`` is included only when the
+        hash differs from the one last sent for the call (first event, or the
+        input changed between pending and running), so the control plane can
+        tell a stale copy from a missed update and ask for a tool_args_resync.
+        """
+        args_hash = hashlib.sha256(codec.dumps_bytes(tool_event["args"])).hexdigest()[:16]
+        tool_event["argsHash"] = args_hash
+        if state.tool_args_hashes.get(call_key) == args_hash:
+            del tool_event["args"]
+        else:
+            state.tool_args_hashes[call_key] = args_hash
 
     async def _fetch_final_message_state(
         self,
@@ -1103,18 +2566,27 @@ class AgentBridge:
         opencode_message_id: str,
         cumulative_text: dict[str, str],
         tracked_msg_ids: set[str] | None = None,
+        pending_msg_ids: set[str] | None = None,
+        settled_part_ids: set[str] | None = None,
     ) -> AsyncIterator[dict[str, Any]]:
         """Fetch final message state from API to ensure complete text.
 
         This is called after session.idle to capture any text that may have
         been missed due to SSE event ordering. It fetches the latest message
-        state and emits any text that's longer than what we've already sent.
+        state and emits any text that's longer than what we've already sent
+        (only the missing suffix when ``token_delta`` is negotiated).
 
         Args:
             message_id: Control plane message ID (used in events sent back)
             opencode_message_id: OpenCode ascending ID (used for parentID correlation)
             cumulative_text: Text already sent, keyed by part ID
             tracked_msg_ids: Assistant message IDs tracked during SSE streaming
+            pending_msg_ids: Assistant messages whose completed state the stream
+                did not deliver. When given, only these are fetched (one request
+                each) and an empty set skips the fetch entirely. When None, the
+                most recent RECONCILE_RECENT_MESSAGES of the session are scanned.
+            settled_part_ids: Text parts whose final text was already sent and
+                evicted from cumulative_text; these are left alone.
 
         Uses parentID-based correlation if available, falling back to
         tracked_msg_ids from SSE streaming if parentID doesn't match.
@@ -1122,22 +2594,25 @@ class AgentBridge:
         if not self.http_client or not self.opencode_session_id:
             return
 
-        messages_url = f"{self.opencode_base_url}/session/{self.opencode_session_id}/message"
+        if pending_msg_ids is not None and not pending_msg_ids:
+            self._record_reconcile("skipped", mode="skipped")
+            return
 
+        start = time.monotonic()
+        mode = "window"
+        updated_parts = 0
         try:
-            response = await self.http_client.get(
-                messages_url,
-                timeout=self.OPENCODE_REQUEST_TIMEOUT,
-            )
-            if response.status_code != 200:
-                self.log.warn(
-                    "bridge.final_state_fetch_error",
-                    status_code=response.status_code,
-                )
+            messages: list[dict[str, Any]] | None = None
+            if pending_msg_ids:
+                mode = "targeted"
+                messages = await self._fetch_messages_by_id(sorted(pending_msg_ids))
+            if messages is None:
+                mode = "window"
+                messages = await self._fetch_recent_messages()
+            if messages is None:
+                self._record_reconcile("error", mode=mode)
                 return
 
-            messages = response.json()
-
             for msg in messages:
                 info = msg.get("info", {})
                 role = info.get("role", "")
@@ -1159,6 +2634,8 @@ class AgentBridge:
                     part_id = part.get("id", "")
 
                     if part_type == "text":
+                        if settled_part_ids and part_id in settled_part_ids:
+                            continue
                         text = part.get("text", "")
                         previously_sent = cumulative_text.get(part_id, "")
                         if len(text) > len(previously_sent):
@@ -1168,21 +2645,126 @@ class AgentBridge:
                                 new_len=len(text),
                             )
                             cumulative_text[part_id] = text
-                            yield {
-                                "type": "token",
-                                "content": text,
-                                "messageId": message_id,
-                            }
+                            updated_parts += 1
+                            yield self._build_token_event(
+                                message_id, part_id, text, previously_sent
+                            )
+
+            self._record_reconcile(
+                "changed" if updated_parts else "unchanged",
+                mode=mode,
+                fetched_msgs=len(messages),
+                updated_parts=updated_parts,
+                duration_ms=int((time.monotonic() - start) * 1000),
+            )
 
         except Exception as e:
+            self._record_reconcile("error", mode=mode)
             self.log.error("bridge.final_state_error", exc=e)
 
-    async def _handle_stop(self) -> None:
-        """Handle stop command - cancel prompt task and request OpenCode stop."""
-        self.log.info("bridge.stop")
+    async def _fetch_messages_by_id(self, msg_ids: list[str]) -> list[dict[str, Any]] | None:
+        """Fetch specific messages of the OpenCode session concurrently.
+
+        Returns None if any request fails, so the caller can fall back to a
+        windowed scan rather than reconcile from partial data.
+        """
+        if not self.http_client:
+            return None
+        base_url = f"{self.opencode_base_url}/session/{self.opencode_session_id}/message"
+        responses = await asyncio.gather(
+            *(
+                self.http_client.get(f"{base_url}/{msg_id}", timeout=self.OPENCODE_REQUEST_TIMEOUT)
+                for msg_id in msg_ids
+            ),
+            return_exceptions=True,
+        )
+        messages = []
+        for msg_id, response in zip(msg_ids, responses, strict=True):
+            if isinstance(response, BaseException) or response.status_code != 200:
+                self.log.warn(
+                    "bridge.final_state_fetch_error",
+                    oc_msg_id=msg_id,
+                    status_code=getattr(response, "status_code", None),
+                )
+                return None
+            messages.append(response.json())
+        return messages
+
+    async def _fetch_recent_messages(self) -> list[dict[str, Any]] | None:
+        """Fetch the most recent messages of the OpenCode session."""
+        if not self.http_client:
+            return None
+        response = await self.http_client.get(
+            f"{self.opencode_base_url}/session/{self.opencode_session_id}/message"
+            f"?limit={self.RECONCILE_RECENT_MESSAGES}",
+            timeout=self.OPENCODE_REQUEST_TIMEOUT,
+        )
+        if response.status_code != 200:
+            self.log.warn(
+                "bridge.final_state_fetch_error",
+                status_code=response.status_code,
+            )
+            return None
+        messages: list[dict[str, Any]] = response.json()
+        return messages
+
+    def _record_reconcile(self, outcome: str, **kw: Any) -> None:
+        """Count a final-state reconciliation outcome and log it."""
+        reconciles = self.metrics.reconciles
+        reconciles.labels(outcome).inc()
+        self.log.info(
+            "bridge.reconcile",
+            outcome=outcome,
+            changed_total=int(reconciles.labels("changed").value),
+            runs_total=int(sum(child.value for _, child in reconciles.series())),
+            **kw,
+        )
+
+    async def _handle_stop(self, message_id: str | None = None) -> None:
+        """Handle stop command - cancel a prompt and request OpenCode stop.
+
+        A messageId naming a queued prompt drops just that prompt; OpenCode is
+        not involved. When other follow-ups were merged with it, only its own
+        content is taken out and the rest still runs. Otherwise the running
+        prompt is cancelled, unless the messageId names some other prompt (one
+        that already finished) or a follow-up merged into the running prompt,
+        whose content OpenCode already has.
+        """
+        self.log.info("bridge.stop", message_id=message_id)
+        if message_id:
+            for entry in self._prompt_queue:
+                if message_id not in entry.contents:
+                    continue
+                if entry.remove(message_id):
+                    self.log.info(
+                        "prompt.unmerged", message_id=message_id, merged_into=entry.message_id
+                    )
+                    await self._send_event(
+                        {
+                            "type": "execution_complete",
+                            "messageId": message_id,
+                            "success": False,
+                            "error": "Task was cancelled",
+                        }
+                    )
+                elif entry.task and not entry.task.done():
+                    entry.task.cancel()
+                return
+            running = self._running_prompt
+            if running is None or message_id not in running.contents:
+                self.log.info("bridge.stop_ignored", message_id=message_id)
+                return
+            if message_id != running.message_id:
+                self.log.info(
+                    "bridge.stop_ignored",
+                    message_id=message_id,
+                    reason="merged_into_running",
+                    merged_into=running.message_id,
+                )
+                return
         task = self._current_prompt_task
         if task and not task.done():
-            task.cancel()
+            task.cancel(self.STOP_CANCEL_MESSAGE)
         # Best-effort: also tell OpenCode to stop (saves LLM compute cost)
         await self._request_opencode_stop(reason="command")
 
@@ -1212,8 +2794,7 @@ class AgentBridge:
             mode="push_spec",
         )
 
-        repo_dirs = list(self.repo_path.glob("*/.git"))
-        if not repo_dirs:
+        if self.git.repo_dir is None:
             self.log.warn("git.push_error", reason="no_repository")
             await self._send_event(
                 {
@@ -1223,8 +2804,6 @@ class AgentBridge:
             )
             return
 
-        repo_dir = repo_dirs[0].parent
-
         try:
             if not push_spec:
                 self.log.warn("git.push_error", reason="missing_push_spec")
@@ -1272,19 +2851,15 @@ class AgentBridge:
                 remote_url=redacted_push_url,
             )
 
-            result = await asyncio.create_subprocess_exec(
-                "git",
+            result = await self.git.run(
                 "push",
                 push_url,
                 refspec,
                 *(["-f"] if force_push else []),
-                cwd=repo_dir,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+                timeout=self.GIT_PUSH_TIMEOUT,
+                check=False,
             )
 
-            _stdout, _stderr = await result.communicate()
-
             if result.returncode != 0:
                 self.log.warn("git.push_failed", branch_name=branch_name)
                 await self._send_event(
@@ -1315,27 +2890,10 @@ class AgentBridge:
 
     async def _configure_git_identity(self, user: GitUser) -> None:
         """Configure git identity for commit attribution."""
-        self.log.debug("git.identity_configure", git_name=user.name, git_email=user.email)
-
-        repo_dirs = list(self.repo_path.glob("*/.git"))
-        if not repo_dirs:
-            self.log.debug("git.identity_skip", reason="no_repository")
-            return
-
-        repo_dir = repo_dirs[0].parent
-
         try:
-            subprocess.run(
-                ["git", "config", "--local", "user.name", user.name],
-                cwd=repo_dir,
-                check=True,
-            )
-            subprocess.run(
-                ["git", "config", "--local", "user.email", user.email],
-                cwd=repo_dir,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
+            if await self.git.set_identity(user):
+                self.log.debug("git.identity_configure", git_name=user.name, git_email=user.email)
+        except (GitCommandError, OSError) as e:
             self.log.error("git.identity_error", exc=e)
 
     async def _load_session_id(self) -> None:
@@ -1439,6 +2997,13 @@ class AgentBridge:
         return value
 
 
+def _utf16_len(text: str) -> int:
+    """Length of text in UTF-16 code units (JavaScript string length)."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
 async def main():
     """Entry point for bridge process."""
     parser = argparse.ArgumentParser(description="Open-Inspect Agent Bridge")
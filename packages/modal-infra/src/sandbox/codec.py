@@ -0,0 +1,101 @@
+"""
+JSON codec for sandbox hot paths.
+
+Every SSE event from OpenCode, every WebSocket frame to the control plane and
+every structured log line is serialized here. orjson (or msgspec) is used when
+installed and is several times faster than the stdlib; otherwise the stdlib
+``json`` module is used. Output is always compact, valid JSON, so consumers
+cannot tell the backends apart.
+
+Usage:
+    from . import codec
+
+    frame = codec.dumps(event)
+    try:
+        payload = codec.loads(data)
+    except codec.JSONDecodeError:
+        ...
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+JSONDecodeError = json.JSONDecodeError
+
+_dumps_bytes: Callable[[Any, Callable[[Any], Any] | None], bytes]
+_loads: Callable[[str | bytes], Any]
+# Errors that make dumps_bytes() retry with the stdlib encoder
+_encode_errors: tuple[type[Exception], ...]
+
+try:
+    import orjson
+
+    def _orjson_dumps(obj: Any, default: Callable[[Any], Any] | None) -> bytes:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+    _dumps_bytes = _orjson_dumps
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _loads = orjson.loads
+    _encode_errors = (orjson.JSONEncodeError,)
+    BACKEND = "orjson"
+except ImportError:
+    try:
+        import msgspec
+
+        _msgspec_encoder = msgspec.json.Encoder()
+        _msgspec_decoder = msgspec.json.Decoder()
+
+        def _msgspec_dumps(obj: Any, default: Callable[[Any], Any] | None) -> bytes:
+            if default is None:
+                return _msgspec_encoder.encode(obj)
+            return msgspec.json.encode(obj, enc_hook=default)
+
+        def _msgspec_loads(data: str | bytes) -> Any:
+            try:
+                return _msgspec_decoder.decode(data)
+            except msgspec.DecodeError as e:
+                text = data if isinstance(data, str) else data.decode("utf-8", errors="replace")
+                raise JSONDecodeError(str(e), text, 0) from e
+
+        _dumps_bytes = _msgspec_dumps
+        _loads = _msgspec_loads
+        _encode_errors = (TypeError, OverflowError, msgspec.EncodeError)
+        BACKEND = "msgspec"
+    except ImportError:
+
+        def _stdlib_dumps(obj: Any, default: Callable[[Any], Any] | None) -> bytes:
+            return _stdlib_dumps_str(obj, default).encode()
+
+        _dumps_bytes = _stdlib_dumps
+        _loads = json.loads
+        _encode_errors = ()
+        BACKEND = "json"
+
+
+def _stdlib_dumps_str(obj: Any, default: Callable[[Any], Any] | None) -> str:
+    return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps_bytes(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    """Serialize to compact UTF-8 encoded JSON.
+
+    Values the fast backend rejects (e.g. integers wider than 64 bits) are
+    retried with the stdlib encoder, so behavior matches ``json.dumps``.
+    """
+    try:
+        return _dumps_bytes(obj, default)
+    except _encode_errors:
+        return _stdlib_dumps_str(obj, default).encode()
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> str:
+    """Serialize to a compact JSON string."""
+    if BACKEND == "json":
+        return _stdlib_dumps_str(obj, default)
+    return dumps_bytes(obj, default).decode()
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON from str or bytes, raising JSONDecodeError on invalid input."""
+    return _loads(data)
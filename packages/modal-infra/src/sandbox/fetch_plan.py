@@ -0,0 +1,124 @@
+"""
+Narrow git fetches for sandbox sync.
+
+A bare ``git fetch origin`` fetches every branch and, with them, every tag;
+on a busy repository most of that is history the session never looks at. The
+supervisor instead fetches only the branches a session uses: its base branch,
+plus the branch checked out in the workspace when that differs and origin
+already knows it. Tags are never fetched. In a shallow repository (every
+sandbox clone is shallow) a branch the clone already tracks is fetched
+without a depth, so origin sends only the commits added since; only a branch
+the clone never had is depth-bounded, so it does not pull its whole history.
+
+The plan is built from files under ``.git`` rather than git commands, so
+planning costs no processes on the startup critical path. The same goes for
+measuring a fetch: objects come from the server's summary line and bytes from
+the pack files the fetch wrote.
+"""
+
+import contextlib
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+# History fetched for a branch a shallow clone has never had: just the tip,
+# like the clone itself
+SHALLOW_FETCH_DEPTH = 1
+
+# "remote: Total 3 (delta 1), reused 0 (delta 0), pack-reused 0"
+_TOTAL_OBJECTS = re.compile(r"Total (\d+) \(delta")
+
+
+class FetchPlan(NamedTuple):
+    branches: tuple[str, ...]
+    depth: int | None
+
+    def args(self, remote: str = "origin") -> list[str]:
+        """Arguments to git for this fetch.
+
+        Every fetch is kept as a pack file (git would otherwise explode small
+        ones into loose objects) so its size is the bytes transferred, and
+        ``--progress`` makes the server report the object count even though
+        stderr is not a terminal.
+        """
+        args = ["-c", "fetch.unpackLimit=1", "fetch", "--no-tags", "--progress"]
+        if self.depth:
+            args.append(f"--depth={self.depth}")
+        args.append(remote)
+        args += [f"+refs/heads/{b}:refs/remotes/{remote}/{b}" for b in self.branches]
+        return args
+
+
+class FetchStats(NamedTuple):
+    objects: int
+    bytes: int
+
+
+def current_branch(repo_path: Path) -> str | None:
+    """Branch checked out in repo_path, or None when HEAD is detached or unreadable."""
+    try:
+        head = (repo_path / ".git" / "HEAD").read_text().strip()
+    except OSError:
+        return None
+    prefix = "ref: refs/heads/"
+    return head[len(prefix) :] if head.startswith(prefix) else None
+
+
+def _has_remote_branch(repo_path: Path, remote: str, branch: str) -> bool:
+    ref = f"refs/remotes/{remote}/{branch}"
+    git_dir = repo_path / ".git"
+    if (git_dir / ref).is_file():
+        return True
+    try:
+        packed = (git_dir / "packed-refs").read_text()
+    except OSError:
+        return False
+    return any(line.endswith(f" {ref}") for line in packed.splitlines())
+
+
+def plan_fetch(repo_path: Path, base_branch: str, remote: str = "origin") -> list[FetchPlan]:
+    """Fetches to run for a session on base_branch in repo_path.
+
+    The checked-out branch is included only if a remote-tracking ref for it
+    exists: a branch that was never pushed has nothing to fetch, and asking
+    origin for a missing ref would fail the whole fetch.
+
+    In a shallow repository, branches that already have a remote-tracking ref
+    are fetched without a depth. A depth there would deepen them to that many
+    commits even when origin has nothing new. Branches without one get a
+    separate fetch bounded to SHALLOW_FETCH_DEPTH.
+    """
+    branches = [base_branch]
+    working = current_branch(repo_path)
+    if working and working != base_branch and _has_remote_branch(repo_path, remote, working):
+        branches.append(working)
+    if not (repo_path / ".git" / "shallow").exists():
+        return [FetchPlan(tuple(branches), None)]
+    known = tuple(b for b in branches if _has_remote_branch(repo_path, remote, b))
+    new = tuple(b for b in branches if b not in known)
+    plans = (FetchPlan(known, None), FetchPlan(new, SHALLOW_FETCH_DEPTH))
+    return [plan for plan in plans if plan.branches]
+
+
+def pack_files(repo_path: Path) -> set[str]:
+    """Names of the repository's pack files."""
+    try:
+        return {p.name for p in (repo_path / ".git" / "objects" / "pack").glob("*.pack")}
+    except OSError:
+        return set()
+
+
+def fetch_stats(repo_path: Path, packs_before: set[str], stderr: str) -> FetchStats:
+    """What a fetch transferred, given the pack files that existed before it ran.
+
+    A fetch with nothing new prints no summary and writes no pack; it counts
+    as zero.
+    """
+    objects = sum(int(n) for n in _TOTAL_OBJECTS.findall(stderr))
+    pack_dir = repo_path / ".git" / "objects" / "pack"
+    size = 0
+    for name in pack_files(repo_path) - packs_before:
+        # The automatic gc after a fetch may already have repacked it
+        with contextlib.suppress(OSError):
+            size += (pack_dir / name).stat().st_size
+    return FetchStats(objects, size)
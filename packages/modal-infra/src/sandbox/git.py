@@ -0,0 +1,135 @@
+"""
+Asynchronous git operations for the sandbox bridge.
+
+Every git invocation runs through ``asyncio.create_subprocess_exec`` with a
+timeout, so a slow or hung git never stalls the bridge's event loop (and with
+it token streaming, heartbeats and command handling).
+"""
+
+import asyncio
+import contextlib
+import os
+import signal
+from pathlib import Path
+from typing import NamedTuple
+
+from .log_config import StructuredLogger
+from .types import GitUser
+
+
+class GitResult(NamedTuple):
+    returncode: int
+    stdout: str
+    stderr: str
+
+
+class GitCommandError(Exception):
+    """A git command exited non-zero or timed out."""
+
+    def __init__(self, args: tuple[str, ...], returncode: int | None, stderr: str):
+        self.git_args = args
+        self.returncode = returncode
+        self.stderr = stderr
+        status = "timed out" if returncode is None else f"exited {returncode}"
+        super().__init__(f"git {args[0] if args else ''} {status}: {stderr.strip()[:200]}")
+
+
+class GitService:
+    """Git helper bound to the repository checked out under a workspace directory.
+
+    The repository is discovered on first use and remembered; the identity
+    last applied is cached so unchanged authors cost no git calls at all.
+    """
+
+    COMMAND_TIMEOUT = 10.0
+
+    def __init__(self, workspace: Path, log: StructuredLogger):
+        self.workspace = workspace
+        self.log = log
+        self._repo_dir: Path | None = None
+        self._identity: tuple[str, str] | None = None
+
+    @property
+    def repo_dir(self) -> Path | None:
+        """The first ``<workspace>/*/.git`` checkout, or None until one exists."""
+        if self._repo_dir is None or not (self._repo_dir / ".git").exists():
+            self._repo_dir = next(
+                (git_dir.parent for git_dir in self.workspace.glob("*/.git")), None
+            )
+            self._identity = None
+        return self._repo_dir
+
+    async def run(self, *args: str, timeout: float | None = None, check: bool = True) -> GitResult:
+        """Run ``git <args>`` in the repository.
+
+        Raises:
+            FileNotFoundError: If no repository has been checked out.
+            GitCommandError: If the command times out, or exits non-zero with check set.
+        """
+        repo_dir = self.repo_dir
+        if repo_dir is None:
+            raise FileNotFoundError(f"No git repository under {self.workspace}")
+
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=repo_dir,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # Own process group, so a timeout also kills helpers git spawned
+            # (ssh, credential helpers) that would keep the pipes open
+            start_new_session=True,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(), timeout=timeout or self.COMMAND_TIMEOUT
+            )
+        except TimeoutError:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+            raise GitCommandError(args, None, "") from None
+
+        result = GitResult(
+            process.returncode or 0,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+        )
+        if check and result.returncode != 0:
+            raise GitCommandError(args, result.returncode, result.stderr)
+        return result
+
+    async def set_identity(self, user: GitUser) -> bool:
+        """Make user the repository's local commit identity.
+
+        Returns True if the git config was changed. Values already in place
+        (cached, or read back from the config on first use) are not rewritten.
+        """
+        if self.repo_dir is None:
+            self.log.debug("git.identity_skip", reason="no_repository")
+            return False
+        wanted = (user.name, user.email)
+        if self._identity == wanted:
+            return False
+
+        if self._identity is None:
+            result = await self.run(
+                "config", "--local", "--get-regexp", r"^user\.(name|email)$", check=False
+            )
+            current = dict(line.split(" ", 1) for line in result.stdout.splitlines() if " " in line)
+            self._identity = (current.get("user.name", ""), current.get("user.email", ""))
+
+        changed = False
+        try:
+            for key, value, cached in zip(
+                ("user.name", "user.email"), wanted, self._identity, strict=True
+            ):
+                if value != cached:
+                    await self.run("config", "--local", key, value)
+                    changed = True
+        except BaseException:
+            # Config may be half-written: read it back next time
+            self._identity = None
+            raise
+        self._identity = wanted
+        return changed
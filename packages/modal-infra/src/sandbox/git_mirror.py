@@ -0,0 +1,110 @@
+"""
+Per-repository bare git mirrors kept on the shared data volume.
+
+Cloning a large repository from GitHub for every fresh sandbox and every
+image build dominates startup and counts against GitHub rate limits. The
+scheduler keeps one bare mirror per repository on the volume, refreshed with
+incremental fetches. Sandboxes and the image builder clone from the mirror's
+local path instead and then fetch only the few commits it is missing from
+origin.
+
+Clones are made with ``file://`` rather than ``--reference``: the result owns
+its objects and has no alternates pointing into the volume, so filesystem
+snapshots of a sandbox stay valid after the mirror is repacked or removed.
+
+This module is used both by the sandbox supervisor and by Modal functions, so
+it depends on nothing but the standard library.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+# Where mirrors live when the data volume is mounted at /data
+MIRROR_ROOT = Path("/data/git-mirrors")
+
+MIRROR_FETCH_TIMEOUT = 900
+
+
+class MirrorRefresh(NamedTuple):
+    path: Path
+    created: bool
+    duration_ms: int
+
+
+def mirror_path(repo_owner: str, repo_name: str, root: Path = MIRROR_ROOT) -> Path:
+    """Location of the bare mirror for a repository."""
+    return root / repo_owner.lower() / f"{repo_name.lower()}.git"
+
+
+def mirror_clone_url(mirror: Path) -> str:
+    """URL to clone a mirror from (``file://`` so ``--depth`` is honoured)."""
+    return f"file://{mirror.resolve()}"
+
+
+def _git(*args: str, timeout: float = MIRROR_FETCH_TIMEOUT) -> None:
+    subprocess.run(
+        ["git", *args],
+        check=True,
+        capture_output=True,
+        timeout=timeout,
+        # Never stop for credentials: an unusable token should fail the refresh
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+
+
+def refresh_mirror(
+    repo_owner: str,
+    repo_name: str,
+    clone_url: str,
+    default_branch: str = "main",
+    root: Path = MIRROR_ROOT,
+) -> MirrorRefresh:
+    """Create or incrementally update the bare mirror of a repository.
+
+    ``clone_url`` may carry an access token; it is passed on the command line
+    for this fetch only and never written to the mirror's config.
+
+    A new mirror is built next to its final location and renamed into place,
+    so readers never see a half-fetched repository.
+
+    Raises:
+        subprocess.CalledProcessError: If a git command fails.
+        subprocess.TimeoutExpired: If the fetch takes longer than MIRROR_FETCH_TIMEOUT.
+    """
+    start = time.monotonic()
+    mirror = mirror_path(repo_owner, repo_name, root)
+    created = not mirror.exists()
+
+    if created:
+        mirror.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{mirror.name}-", dir=mirror.parent))
+        try:
+            _git("init", "--quiet", "--bare", str(staging))
+            _fetch_heads(staging, clone_url)
+            _git("-C", str(staging), "symbolic-ref", "HEAD", f"refs/heads/{default_branch}")
+            staging.rename(mirror)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    else:
+        _fetch_heads(mirror, clone_url)
+
+    return MirrorRefresh(mirror, created, int((time.monotonic() - start) * 1000))
+
+
+def _fetch_heads(mirror: Path, clone_url: str) -> None:
+    _git(
+        "-C",
+        str(mirror),
+        "fetch",
+        "--quiet",
+        "--prune",
+        "--no-tags",
+        clone_url,
+        "+refs/heads/*:refs/heads/*",
+    )
@@ -0,0 +1,42 @@
+"""
+On-disk record of the prompt the bridge is streaming.
+
+When the supervisor restarts a crashed bridge, OpenCode is usually still
+working on the prompt the old process was streaming. The record tells the new
+process which control-plane message that output belongs to and how much of it
+already went out, so it can reattach to the prompt instead of dropping it.
+"""
+
+from pathlib import Path
+from typing import NamedTuple
+
+from . import codec
+
+
+class InflightPrompt(NamedTuple):
+    message_id: str
+    opencode_session_id: str
+    opencode_message_id: str
+    # Journal sequence number of the last event handed to the journal
+    last_seq: int
+    # Characters already sent of each text part still streaming
+    text_offsets: dict[str, int]
+    # Text parts whose final text was sent
+    settled_part_ids: list[str]
+    # Step parts and "sessionID/callID/status" tool states already sent
+    step_part_ids: list[str]
+    tool_states: list[str]
+
+    def save(self, path: Path) -> None:
+        """Write the record atomically, replacing any previous one."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(codec.dumps_bytes(self._asdict()))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "InflightPrompt | None":
+        """Read the record at path; None if there is none or it is unreadable."""
+        try:
+            return cls(**codec.loads(path.read_bytes()))
+        except (OSError, codec.JSONDecodeError, TypeError):
+            return None
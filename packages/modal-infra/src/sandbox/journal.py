@@ -0,0 +1,222 @@
+"""
+Disk-backed journal of outbound bridge events.
+
+Every event the bridge sends to the control plane is stamped with a monotonic
+sequence number and appended to a spool file as one JSON line. Entries stay
+in the journal until they are acknowledged, so events produced while the
+WebSocket is down (or lost in flight when it drops) can be replayed on the
+next connection instead of being discarded.
+
+A spool left behind by a crashed process can be recovered by the next one,
+which replays what it holds and continues the sequence numbering. The
+acknowledged watermark is kept in a small sidecar file next to the spool, so
+the recovered journal does not replay events the control plane already has.
+
+The journal is bounded by total size and entry age; once either cap is hit
+the oldest entries are evicted even if unacknowledged. Acknowledged and
+evicted entries always form a prefix of the file, so compaction is a single
+copy of the retained suffix.
+"""
+
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from . import codec
+
+
+class JournalEntry(NamedTuple):
+    seq: int
+    created_at: float
+    offset: int
+    size: int
+
+
+class EventJournal:
+    """Append-only spool of sequenced events with cumulative acknowledgement.
+
+    Usage:
+        journal = EventJournal(path, max_bytes=32 << 20, max_age_seconds=3600)
+        seq = journal.append(event)   # stamps event["seq"]
+        journal.ack(seq)              # everything up to seq was delivered
+        for event in journal.replay():
+            ...                       # retained, unacknowledged events in order
+    """
+
+    # Compact once at least this many dead bytes sit in front of the live entries
+    COMPACT_MIN_BYTES = 1 << 20
+
+    def __init__(self, path: Path, max_bytes: int, max_age_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.last_seq = 0
+        self.acked_seq = 0
+        self.evicted = 0
+        self._entries: deque[JournalEntry] = deque()
+        self._fd: int | None = None
+        self._end = 0
+        self.acked_path = path.with_name(path.name + ".acked")
+        self._acked_fd: int | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of retained, unacknowledged events."""
+        return len(self._entries)
+
+    @property
+    def retained_bytes(self) -> int:
+        if not self._entries:
+            return 0
+        return self._end - self._entries[0].offset
+
+    def append(self, event: dict[str, Any]) -> int:
+        """Stamp the event with the next sequence number and spool it."""
+        self.last_seq += 1
+        event["seq"] = self.last_seq
+        line = codec.dumps_bytes(event) + b"\n"
+
+        fd = self._open()
+        os.write(fd, line)
+        now = time.time()
+        self._entries.append(JournalEntry(self.last_seq, now, self._end, len(line)))
+        self._end += len(line)
+        self._enforce_limits(now)
+        return self.last_seq
+
+    def ack(self, seq: int) -> None:
+        """Mark every event up to and including seq as delivered."""
+        seq = min(seq, self.last_seq)
+        if seq <= self.acked_seq:
+            return
+        self.acked_seq = seq
+        self._save_acked()
+        while self._entries and self._entries[0].seq <= seq:
+            self._entries.popleft()
+        self._maybe_compact()
+
+    def replay(self, after_seq: int = 0) -> list[dict[str, Any]]:
+        """Return retained events with a sequence number above after_seq, oldest first."""
+        entries = [e for e in self._entries if e.seq > after_seq]
+        if not entries or self._fd is None:
+            return []
+        start = entries[0].offset
+        data = os.pread(self._fd, self._end - start, start)
+        return [codec.loads(data[e.offset - start : e.offset - start + e.size]) for e in entries]
+
+    def recover(self) -> int:
+        """Adopt the spool a previous process left at path, before the first append.
+
+        Its complete lines after the saved acknowledged watermark become
+        retained, unacknowledged entries again (a torn last line is cut off)
+        and numbering continues after the newest, or after the watermark when
+        compaction left the spool empty. A spool last written longer than
+        max_age_seconds ago is discarded. Returns the number of entries
+        recovered.
+        """
+        if self._fd is not None:
+            raise RuntimeError("Journal already open")
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return 0
+        if stat.st_mtime < time.time() - self.max_age_seconds:
+            return 0
+
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        data = os.pread(fd, stat.st_size, 0)
+        entries: deque[JournalEntry] = deque()
+        offset = 0
+        while (end := data.find(b"\n", offset)) != -1:
+            try:
+                seq = codec.loads(data[offset:end]).get("seq")
+            except (codec.JSONDecodeError, AttributeError):
+                seq = None
+            if not isinstance(seq, int) or (entries and seq <= entries[-1].seq):
+                break
+            # Entry times were not spooled; the file's mtime bounds them
+            entries.append(JournalEntry(seq, stat.st_mtime, offset, end + 1 - offset))
+            offset = end + 1
+        os.ftruncate(fd, offset)
+
+        self._fd = fd
+        self._end = offset
+        self._entries = entries
+        if entries:
+            self.last_seq = entries[-1].seq
+            self.acked_seq = max(entries[0].seq - 1, min(self._load_acked(), self.last_seq))
+            while entries and entries[0].seq <= self.acked_seq:
+                entries.popleft()
+        else:
+            # Everything was acknowledged and compacted away; only the
+            # watermark remembers how far numbering had got
+            self.last_seq = self.acked_seq = self._load_acked()
+        self._enforce_limits(time.time())
+        return len(entries)
+
+    def advance(self, seq: int) -> None:
+        """Continue numbering after seq, e.g. one a previous process had reached."""
+        if seq > self.last_seq:
+            if not self._entries:
+                self.acked_seq = seq
+            self.last_seq = seq
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._acked_fd is not None:
+            os.close(self._acked_fd)
+            self._acked_fd = None
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+            self._end = 0
+            # A fresh spool starts a new numbering; an old watermark means nothing
+            self._save_acked()
+        return self._fd
+
+    def _load_acked(self) -> int:
+        try:
+            return int(self.acked_path.read_bytes())
+        except (OSError, ValueError):
+            return 0
+
+    def _save_acked(self) -> None:
+        """Overwrite the sidecar with acked_seq, fixed width so no truncation is needed."""
+        if self._acked_fd is None:
+            self._acked_fd = os.open(self.acked_path, os.O_RDWR | os.O_CREAT, 0o600)
+        os.pwrite(self._acked_fd, b"%020d" % self.acked_seq, 0)
+
+    def _enforce_limits(self, now: float) -> None:
+        cutoff = now - self.max_age_seconds
+        entries = self._entries
+        while entries and (entries[0].created_at < cutoff or self.retained_bytes > self.max_bytes):
+            entries.popleft()
+            self.evicted += 1
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if self._fd is None:
+            return
+        live_start = self._entries[0].offset if self._entries else self._end
+        if live_start < self.COMPACT_MIN_BYTES or live_start < self._end - live_start:
+            return
+
+        data = os.pread(self._fd, self._end - live_start, live_start)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        try:
+            os.write(fd, data)
+            tmp_path.replace(self.path)
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(self._fd)
+        self._fd = fd
+        self._end = len(data)
+        self._entries = deque(e._replace(offset=e.offset - live_start) for e in self._entries)
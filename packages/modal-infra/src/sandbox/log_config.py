@@ -14,10 +14,11 @@ Usage:
     log.error("bridge.error", exc=e, attempt=3)
 """
 
-import json
 import logging
 from typing import Any
 
+from . import codec
+
 # Standard LogRecord attributes to exclude from extra fields.
 # Built from a blank LogRecord's __dict__ plus our custom underscore-prefixed attrs.
 _STANDARD_ATTRS = {
@@ -70,7 +71,7 @@ class JSONFormatter(logging.Formatter):
             output["error_type"] = type(exc).__qualname__
             output["error_message"] = str(exc)
             output["error_stack"] = self.formatException(record.exc_info)[-2000:]
-        return json.dumps(output, default=str)
+        return codec.dumps(output, default=str)
 
 
 def configure_logging() -> None:
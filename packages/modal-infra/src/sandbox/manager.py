@@ -11,20 +11,36 @@ Updated: 2026-01-15 to fix Sandbox.create API
 """
 
 import json
+import os
 import time
 from dataclasses import dataclass
+from typing import Any
 
 import modal
 
-from ..app import app, llm_secrets
+from ..app import app, inspect_volume, llm_secrets
 from ..images.base import base_image
+from .git_mirror import MIRROR_ROOT, mirror_path
 from .log_config import get_logger
+from .setup_cache import SETUP_CACHE_ROOT, cache_dir
 from .types import SandboxStatus, SessionConfig
 
 log = get_logger("manager")
 
 DEFAULT_SANDBOX_TIMEOUT_SECONDS = 7200  # 2 hours
 
+# Mount path -> volume, as modal.Sandbox.create takes them
+SandboxVolumes = dict[str | os.PathLike[Any], modal.Volume | modal.CloudBucketMount]
+
+# Where sandboxes mount their own repository's setup cache
+SETUP_CACHE_MOUNT = "/setup-cache"
+
+# Setup cache builders exit on their own; this only bounds a stuck setup script
+SETUP_CACHE_BUILD_TIMEOUT_SECONDS = 1800
+
+# Where fresh sandboxes mount their own repository's git mirror
+GIT_MIRROR_MOUNT = "/git-mirror"
+
 
 @dataclass
 class SandboxConfig:
@@ -73,7 +89,7 @@ class SandboxManager:
     - Maintain warm pools for high-volume repos
     """
 
-    def __init__(self):
+    def __init__(self) -> None:
         self._warm_pools: dict[str, list[SandboxHandle]] = {}
 
     def _get_repo_key(self, repo_owner: str, repo_name: str) -> str:
@@ -105,7 +121,7 @@ class SandboxManager:
             sandbox_id = f"sandbox-{config.repo_owner}-{config.repo_name}-{int(time.time() * 1000)}"
 
         # Prepare environment variables (user vars first, system vars override)
-        env_vars: dict[str, str] = {}
+        env_vars: dict[str, str | None] = {}
 
         if config.user_env_vars:
             env_vars.update(config.user_env_vars)
@@ -129,12 +145,15 @@ class SandboxManager:
             env_vars["SESSION_CONFIG"] = config.session_config.model_dump_json()
 
         # Determine image to use
+        volumes: SandboxVolumes = {}
         if config.snapshot_id:
             # Restore from snapshot
             image = modal.Image.from_registry(f"open-inspect-snapshot:{config.snapshot_id}")
         else:
             # Use base image (would be repo-specific in production)
             image = base_image
+            # Fresh sandboxes clone from the repo's mirror and restore its cached setup results
+            self._mount_repo_data(config.repo_owner, config.repo_name, volumes, env_vars)
 
         # Create the sandbox
         # The entrypoint command is passed as positional args
@@ -148,7 +167,7 @@ class SandboxManager:
             timeout=config.timeout_seconds,
             workdir="/workspace",
             env=env_vars,
-            # Note: volumes parameter is not supported in Sandbox.create
+            volumes=volumes,
         )
 
         # Get Modal's internal object ID for API calls (snapshot, etc.)
@@ -173,6 +192,98 @@ class SandboxManager:
             modal_object_id=modal_object_id,
         )
 
+    async def create_setup_cache_builder(
+        self,
+        repo_owner: str,
+        repo_name: str,
+        github_app_token: str | None = None,
+        branch: str = "main",
+    ) -> modal.Sandbox:
+        """
+        Create a sandbox that runs the repo's setup script and publishes its setup cache.
+
+        The builder clones the repo and runs the setup script with no agent and
+        no control plane connection, then exits. It is the only sandbox that
+        mounts the repository's setup cache writable; session sandboxes mount it
+        read-only, so nothing an agent does can end up in another session.
+
+        Args:
+            repo_owner: GitHub repository owner
+            repo_name: GitHub repository name
+            github_app_token: GitHub App token for cloning private repos
+            branch: Branch whose setup results are cached
+
+        Returns:
+            The builder sandbox; it terminates on its own once the cache is published
+        """
+        cache = cache_dir(repo_owner, repo_name, SETUP_CACHE_ROOT)
+        cache.mkdir(parents=True, exist_ok=True)
+        # The sandbox mounts the directory by path, so it has to exist on the volume
+        inspect_volume.commit()
+
+        env_vars: dict[str, str | None] = {
+            "PYTHONUNBUFFERED": "1",
+            "SANDBOX_ID": f"setup-cache-{repo_owner}-{repo_name}-{int(time.time() * 1000)}",
+            "REPO_OWNER": repo_owner,
+            "REPO_NAME": repo_name,
+            "SESSION_CONFIG": json.dumps({"branch": branch}),
+            "SETUP_CACHE_BUILD": "true",
+        }
+        if github_app_token:
+            env_vars["GITHUB_APP_TOKEN"] = github_app_token
+
+        volumes: SandboxVolumes = {}
+        self._mount_repo_data(repo_owner, repo_name, volumes, env_vars, cache_writable=True)
+
+        sandbox = modal.Sandbox.create(
+            "python",
+            "-m",
+            "sandbox.entrypoint",
+            image=base_image,
+            app=app,
+            timeout=SETUP_CACHE_BUILD_TIMEOUT_SECONDS,
+            workdir="/workspace",
+            env=env_vars,
+            volumes=volumes,
+        )
+        log.info(
+            "setup_cache.build_start",
+            repo_owner=repo_owner,
+            repo_name=repo_name,
+            modal_object_id=sandbox.object_id,
+        )
+        return sandbox
+
+    def _mount_repo_data(
+        self,
+        repo_owner: str,
+        repo_name: str,
+        volumes: SandboxVolumes,
+        env_vars: dict[str, str | None],
+        cache_writable: bool = False,
+    ) -> None:
+        """Mount the repository's own git mirror and setup cache from the data volume.
+
+        Only those directories are mounted: the rest of the data volume holds
+        the snapshot registry and every other repository's code and setup
+        results.
+        """
+        # Clone from the repo's git mirror when the scheduler has built one
+        mirror = mirror_path(repo_owner, repo_name, MIRROR_ROOT)
+        if mirror.is_dir():
+            volumes[GIT_MIRROR_MOUNT] = inspect_volume.with_mount_options(
+                read_only=True, sub_path=f"/{mirror.relative_to(MIRROR_ROOT.parent)}"
+            )
+            env_vars["GIT_MIRROR_PATH"] = GIT_MIRROR_MOUNT
+        # Restore the setup script's cached results once a builder has published some
+        cache = cache_dir(repo_owner, repo_name, SETUP_CACHE_ROOT)
+        if cache.is_dir():
+            volumes[SETUP_CACHE_MOUNT] = inspect_volume.with_mount_options(
+                read_only=not cache_writable,
+                sub_path=f"/{cache.relative_to(SETUP_CACHE_ROOT.parent)}",
+            )
+            env_vars["SETUP_CACHE_DIR"] = SETUP_CACHE_MOUNT
+
     async def warm_sandbox(
         self,
         repo_owner: str,
@@ -330,7 +441,7 @@ class SandboxManager:
         image = modal.Image.from_id(snapshot_image_id)
 
         # Prepare environment variables (user vars first, system vars override)
-        env_vars: dict[str, str] = {}
+        env_vars: dict[str, str | None] = {}
 
         if user_env_vars:
             env_vars.update(user_env_vars)
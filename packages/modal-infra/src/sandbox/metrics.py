@@ -0,0 +1,224 @@
+"""
+In-process metrics for the sandbox bridge.
+
+Counters, gauges and fixed-bucket histograms that are cheap enough to update
+on every event: an observation is an attribute increment (plus a bisect for
+histograms) on a series object the caller can hold on to. Series with one
+label are created on first use of ``labels(value)`` and cached.
+
+The registry renders the Prometheus text exposition format, served on a
+localhost port by ``serve_metrics`` for the supervisor to scrape, and a
+compact summary dict that the bridge attaches to its heartbeats.
+"""
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Iterator
+from typing import Any, Self
+
+# Seconds; suits socket sends and OpenCode round trips
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; suits time-to-first-token and whole prompts (up to PROMPT_MAX_DURATION)
+DURATION_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 5400.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    kind = "counter"
+    __slots__ = ("_children", "help", "label", "name", "value")
+
+    def __init__(self, name: str, help: str, label: str | None = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.value = 0.0
+        self._children: dict[str, Self] = {}
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def labels(self, value: str) -> Self:
+        child = self._children.get(value)
+        if child is None:
+            child = self._children[value] = type(self)(self.name, self.help)
+        return child
+
+    def series(self) -> Iterator[tuple[str, "Counter"]]:
+        if self.label is None:
+            yield "", self
+        else:
+            for value, child in self._children.items():
+                yield f'{self.label}="{_escape(value)}"', child
+
+    def lines(self, labels: str) -> Iterator[str]:
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{self.name}{suffix} {_format(self.value)}"
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class Histogram:
+    """Distribution of observations over fixed upper bounds."""
+
+    kind = "histogram"
+    __slots__ = ("_children", "buckets", "count", "counts", "help", "label", "name", "sum")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        label: str | None = None,
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        # counts[i] holds observations in (buckets[i-1], buckets[i]]; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._children: dict[str, Histogram] = {}
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def labels(self, value: str) -> "Histogram":
+        child = self._children.get(value)
+        if child is None:
+            child = self._children[value] = Histogram(self.name, self.help, self.buckets)
+        return child
+
+    def series(self) -> Iterator[tuple[str, "Histogram"]]:
+        if self.label is None:
+            yield "", self
+        else:
+            for value, child in self._children.items():
+                yield f'{self.label}="{_escape(value)}"', child
+
+    def lines(self, labels: str) -> Iterator[str]:
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts, strict=False):
+            cumulative += count
+            yield f'{self.name}_bucket{{{prefix}le="{_format(bound)}"}} {cumulative}'
+        yield f'{self.name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{self.name}_sum{suffix} {_format(self.sum)}"
+        yield f"{self.name}_count{suffix} {self.count}"
+
+    def snapshot(self) -> dict[str, float]:
+        return {"count": self.count, "sum": round(self.sum, 6)}
+
+
+Metric = Counter | Histogram
+
+
+class MetricsRegistry:
+    """Named collection of metrics with Prometheus text and summary output."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, help: str, label: str | None = None) -> Counter:
+        return self._register(Counter(name, help, label))
+
+    def gauge(self, name: str, help: str, label: str | None = None) -> Gauge:
+        return self._register(Gauge(name, help, label))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        label: str | None = None,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, buckets, label))
+
+    def _register[M: Metric](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, series in metric.series():
+                lines.extend(series.lines(labels))
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        """Current values keyed by metric name, and by label value for labeled metrics.
+
+        Histograms are reduced to their count and sum.
+        """
+        summary: dict[str, Any] = {}
+        for name, metric in self._metrics.items():
+            if metric.label is None:
+                summary[name] = metric.snapshot()
+            elif metric._children:
+                summary[name] = {
+                    value: child.snapshot() for value, child in metric._children.items()
+                }
+        return summary
+
+
+async def serve_metrics(registry: MetricsRegistry, host: str, port: int) -> asyncio.Server:
+    """Serve ``GET /metrics`` over plain HTTP/1.0."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            while (await asyncio.wait_for(reader.readline(), timeout=5.0)) not in (
+                b"\r\n",
+                b"\n",
+                b"",
+            ):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.0 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
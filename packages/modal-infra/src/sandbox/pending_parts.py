@@ -0,0 +1,111 @@
+"""
+Byte-bounded buffer for prompt stream parts awaiting correlation.
+
+OpenCode can emit a part before the message.updated event that tells the
+bridge which prompt the part's message belongs to. Those parts are held here,
+keyed by OpenCode message ID, until the message is correlated (or the prompt
+ends). Parts are kept in memory up to a byte budget; beyond it they are
+spilled to an anonymous temp file, and only once the spill budget is also
+exhausted are further parts dropped.
+"""
+
+import os
+import tempfile
+from typing import IO, Any, NamedTuple
+
+from . import codec
+
+
+class BufferedPart(NamedTuple):
+    # part/delta are None while the entry lives in the spill file
+    part: dict[str, Any] | None
+    delta: Any
+    offset: int
+    size: int
+
+
+class PendingParts:
+    """Per-message FIFO of (part, delta) pairs with memory and spill budgets.
+
+    Usage:
+        pending = PendingParts(max_memory_bytes=4 << 20, max_spill_bytes=64 << 20)
+        pending.add(msg_id, part, delta)     # False once both budgets are spent
+        for part, delta in pending.pop(msg_id):
+            ...                              # in arrival order
+        pending.close()
+    """
+
+    def __init__(self, max_memory_bytes: int = 4 << 20, max_spill_bytes: int = 64 << 20):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.memory_bytes = 0
+        self.spilled = 0
+        self.dropped = 0
+        self._by_msg: dict[str, list[BufferedPart]] = {}
+        self._count = 0
+        self._spill_live = 0
+        self._spill_end = 0
+        self._spill_file: IO[bytes] | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, msg_id: str, part: dict[str, Any], delta: Any) -> bool:
+        """Buffer a part for msg_id. Returns False if it had to be dropped."""
+        data = codec.dumps_bytes([part, delta])
+        size = len(data)
+        if self.memory_bytes + size <= self.max_memory_bytes:
+            entry = BufferedPart(part, delta, -1, size)
+            self.memory_bytes += size
+        elif self._spill_end + size <= self.max_spill_bytes:
+            fd = self._open_spill()
+            os.pwrite(fd, data, self._spill_end)
+            entry = BufferedPart(None, None, self._spill_end, size)
+            self._spill_end += size
+            self._spill_live += 1
+            self.spilled += 1
+        else:
+            self.dropped += 1
+            return False
+        self._by_msg.setdefault(msg_id, []).append(entry)
+        self._count += 1
+        return True
+
+    def pop(self, msg_id: str) -> list[tuple[dict[str, Any], Any]]:
+        """Remove and return the parts buffered for msg_id, oldest first."""
+        entries = self._by_msg.pop(msg_id, None)
+        if not entries:
+            return []
+        self._count -= len(entries)
+        parts: list[tuple[dict[str, Any], Any]] = []
+        for entry in entries:
+            if entry.part is not None:
+                self.memory_bytes -= entry.size
+                parts.append((entry.part, entry.delta))
+            else:
+                assert self._spill_file is not None
+                part, delta = codec.loads(
+                    os.pread(self._spill_file.fileno(), entry.size, entry.offset)
+                )
+                self._spill_live -= 1
+                parts.append((part, delta))
+        if self._spill_file is not None and not self._spill_live and self._spill_end:
+            # Nothing live on disk any more: reclaim the space
+            self._spill_file.truncate(0)
+            self._spill_end = 0
+        return parts
+
+    def close(self) -> None:
+        self._by_msg.clear()
+        self._count = 0
+        self.memory_bytes = 0
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._spill_live = 0
+        self._spill_end = 0
+
+    def _open_spill(self) -> int:
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="bridge-parts-", buffering=0)  # noqa: SIM115
+        return self._spill_file.fileno()
@@ -0,0 +1,305 @@
+"""
+Content-addressed cache for the results of a repository's setup script.
+
+``.openinspect/setup.sh`` usually spends its minutes reinstalling the same
+dependencies from the same lockfiles. A repository opts in by listing what
+the script produces in ``.openinspect/cache-paths``; those paths, plus
+``node_modules`` and ``.venv``, are kept as a tar archive keyed on
+everything that decides them (the script, the lockfiles, the list of cached
+paths, the repository path and the base image version). When the key
+matches, the archive is unpacked into the checkout instead of running the
+script. Anything else the script did (global installs, files outside the
+repository, services it started) does not happen on a hit, which is why
+caching is opt-in.
+
+Each repository has its own cache directory, named by owner and repo.
+Archives are published only by a builder sandbox that runs the setup script
+with no agent (see ``SandboxManager.create_setup_cache_builder``); session
+sandboxes mount their repository's directory read-only and only restore.
+Restores extract into the checkout, never above it.
+
+Archives are written under a temporary name and renamed into place, so a
+concurrent reader sees either no archive or a complete one.
+
+After a successful build the builder also records a fingerprint of the
+setup inputs at the commit it built (their git blob IDs and the base image
+version). The scheduler computes the same fingerprint from the repository's
+git mirror and starts a builder only when the two differ.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import platform
+import shutil
+import subprocess
+from pathlib import Path
+
+from .log_config import StructuredLogger
+
+# Produced by most setup scripts; archived whenever they exist
+DEFAULT_ARTIFACT_PATHS = ("node_modules", ".venv")
+
+# Dependency lockfiles at the repository root that feed the cache key
+LOCKFILES = (
+    "pnpm-lock.yaml",
+    "yarn.lock",
+    "package-lock.json",
+    "bun.lockb",
+    "bun.lock",
+    "uv.lock",
+    "poetry.lock",
+    "Pipfile.lock",
+    "requirements.txt",
+    "Gemfile.lock",
+    "go.sum",
+    "Cargo.lock",
+)
+
+# The setup script itself, relative to the repo root
+SETUP_SCRIPT = ".openinspect/setup.sh"
+
+# Extra paths to archive, one per line, relative to the repo root. Its
+# presence turns caching on for the repository.
+CACHE_PATHS_FILE = ".openinspect/cache-paths"
+
+# Per-repository cache directories on the data volume
+SETUP_CACHE_ROOT = Path("/data/setup-cache")
+
+# Fingerprint of the setup inputs of the last successful build, in the cache directory
+INPUTS_FILE = "inputs"
+
+
+def inputs_fingerprint(git_dir: Path, rev: str) -> str | None:
+    """Fingerprint of the files that feed the cache key at rev, or None if git fails.
+
+    Reads blob IDs from the object database, so it works the same on a
+    builder's checkout and on a bare mirror without checking anything out.
+    """
+    paths = (SETUP_SCRIPT, *LOCKFILES, CACHE_PATHS_FILE)
+    try:
+        result = subprocess.run(
+            ["git", "--git-dir", str(git_dir), "ls-tree", rev, "--", *paths],
+            capture_output=True,
+            check=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    digest = hashlib.sha256(result.stdout)
+    digest.update(f"\0{os.environ.get('SANDBOX_VERSION', '')}\0{platform.machine()}".encode())
+    return digest.hexdigest()[:32]
+
+
+def cache_dir(repo_owner: str, repo_name: str, root: Path = SETUP_CACHE_ROOT) -> Path:
+    """Location of the setup cache for a repository."""
+    return root / repo_owner.lower() / repo_name.lower()
+
+
+class SetupCache:
+    """Setup script artifacts of one repository, stored as archives in root.
+
+    Usage:
+        cache = SetupCache(Path("/setup-cache"), log)
+        if cache.enabled(repo_path):
+            key = cache.key(repo_path, setup_script)
+            if not await cache.restore(repo_path, key):
+                ...run the script...
+    """
+
+    # Archives kept; older ones are deleted on publish
+    KEEP_PER_REPO = 3
+    TAR_TIMEOUT = 600.0
+
+    def __init__(self, root: Path, log: StructuredLogger):
+        self.root = root
+        self.log = log
+
+    def enabled(self, repo_path: Path) -> bool:
+        """Whether the repository opted in to caching its setup results."""
+        return (repo_path / CACHE_PATHS_FILE).is_file()
+
+    def key(self, repo_path: Path, setup_script: Path) -> str:
+        """Hash of everything that determines what the setup script produces."""
+        digest = hashlib.sha256()
+
+        def add(label: str, data: bytes) -> None:
+            digest.update(f"{label}\0{len(data)}\0".encode())
+            digest.update(data)
+
+        add("repo", str(repo_path).encode())
+        add("image", os.environ.get("SANDBOX_VERSION", "").encode())
+        add("machine", platform.machine().encode())
+        add("script", setup_script.read_bytes())
+        for name in (*LOCKFILES, CACHE_PATHS_FILE):
+            path = repo_path / name
+            if path.is_file():
+                add(name, path.read_bytes())
+        return digest.hexdigest()[:32]
+
+    def artifact_paths(self, repo_path: Path) -> list[Path]:
+        """Existing directories and files to archive, relative to repo_path.
+
+        Declared paths that are absolute or resolve outside the checkout are
+        ignored: a restore only ever writes inside the repository.
+        """
+        declared: list[str] = []
+        with contextlib.suppress(OSError):
+            for line in (repo_path / CACHE_PATHS_FILE).read_text().splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    declared.append(line)
+
+        root = repo_path.resolve()
+        paths: list[Path] = []
+        for name in (*DEFAULT_ARTIFACT_PATHS, *declared):
+            if Path(name).is_absolute():
+                continue
+            path = (root / name).resolve()
+            # Only strictly inside the checkout, including through symlinks
+            if path == root or not path.is_relative_to(root):
+                continue
+            relative = path.relative_to(root)
+            if path.exists() and relative not in paths:
+                paths.append(relative)
+        return paths
+
+    def built_inputs(self) -> str | None:
+        """Inputs fingerprint recorded by the last successful build, if any."""
+        try:
+            return (self.root / INPUTS_FILE).read_text().strip() or None
+        except OSError:
+            return None
+
+    def record_inputs(self, fingerprint: str) -> None:
+        """Record the inputs fingerprint a build has just made the cache current for."""
+        partial = self.root / f".{INPUTS_FILE}.{os.getpid()}.partial"
+        try:
+            partial.write_text(fingerprint)
+            partial.replace(self.root / INPUTS_FILE)
+        except OSError as e:
+            self.log.warn("setup.cache_inputs_error", exc=e)
+            partial.unlink(missing_ok=True)
+
+    def has(self, key: str) -> bool:
+        """Whether an archive for key has been published."""
+        return self._archive(key) is not None
+
+    def _archive(self, key: str) -> Path | None:
+        for suffix in (".tar.zst", ".tar.gz"):
+            archive = self.root / f"{key}{suffix}"
+            if archive.is_file():
+                return archive
+        return None
+
+    async def restore(self, repo_path: Path, key: str) -> bool:
+        """Unpack the archive for key into repo_path; False on a miss or failure."""
+        archive = self._archive(key)
+        if archive is None:
+            self.log.info("setup.cache_miss", key=key)
+            return False
+
+        compressor = ["--zstd"] if archive.name.endswith(".zst") else ["--gzip"]
+        if compressor == ["--zstd"] and not shutil.which("zstd"):
+            self.log.warn("setup.cache_restore_error", key=key, reason="zstd_missing")
+            return False
+
+        returncode, members = await self._tar("-t", *compressor, "-f", str(archive), tail=None)
+        if returncode != 0:
+            output = "\n".join(members.splitlines()[-20:])
+            self.log.warn("setup.cache_restore_error", key=key, exit_code=returncode, output=output)
+            return False
+        # Extraction is rooted at the checkout; no member may climb out of it
+        unsafe = next((m for m in members.splitlines() if not _is_safe_member(m)), None)
+        if unsafe is not None:
+            self.log.warn(
+                "setup.cache_restore_error", key=key, reason="unsafe_member", member=unsafe
+            )
+            return False
+
+        returncode, output = await self._tar(
+            "-x", *compressor, "-f", str(archive), "-C", str(repo_path)
+        )
+        if returncode != 0:
+            self.log.warn("setup.cache_restore_error", key=key, exit_code=returncode, output=output)
+            return False
+        return True
+
+    async def publish(self, repo_path: Path, key: str) -> int | None:
+        """Archive the setup artifacts under key; returns the archive size in bytes.
+
+        Returns None if there was nothing to archive or archiving failed.
+        """
+        paths = self.artifact_paths(repo_path)
+        if not paths:
+            self.log.debug("setup.cache_skip", key=key, reason="no_artifacts")
+            return None
+
+        use_zstd = shutil.which("zstd") is not None
+        archive = self.root / f"{key}{'.tar.zst' if use_zstd else '.tar.gz'}"
+        partial = archive.with_name(f".{archive.name}.{os.getpid()}.partial")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            returncode, output = await self._tar(
+                "-c",
+                "--use-compress-program=zstd -T0 -3" if use_zstd else "--gzip",
+                "-f",
+                str(partial),
+                "-C",
+                str(repo_path),
+                "--",
+                *(str(path) for path in paths),
+            )
+            if returncode != 0:
+                self.log.warn(
+                    "setup.cache_publish_error", key=key, exit_code=returncode, output=output
+                )
+                return None
+            with partial.open("rb") as f:
+                os.fsync(f.fileno())
+            partial.replace(archive)
+            size = archive.stat().st_size
+        except OSError as e:
+            self.log.warn("setup.cache_publish_error", key=key, exc=e)
+            return None
+        finally:
+            partial.unlink(missing_ok=True)
+
+        self._prune()
+        return size
+
+    def _prune(self) -> None:
+        """Delete all but the KEEP_PER_REPO most recently published archives."""
+        archives: list[tuple[float, Path]] = []
+        for path in self.root.glob("*.tar.*"):
+            # Another sandbox may be pruning the same directory
+            with contextlib.suppress(OSError):
+                if not path.name.startswith("."):
+                    archives.append((path.stat().st_mtime, path))
+        archives.sort(reverse=True)
+        for _, stale in archives[self.KEEP_PER_REPO :]:
+            stale.unlink(missing_ok=True)
+
+    async def _tar(self, *args: str, tail: int | None = 20) -> tuple[int, str]:
+        """Run tar; returns its exit code and the last tail lines of output (None: all)."""
+        process = await asyncio.create_subprocess_exec(
+            "tar",
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.TAR_TIMEOUT)
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, "timed out"
+        lines = stdout.decode(errors="replace").splitlines()
+        return process.returncode or 0, "\n".join(lines[-tail:] if tail else lines)
+
+
+def _is_safe_member(name: str) -> bool:
+    """Whether an archive member stays inside the directory it is extracted into."""
+    path = Path(name)
+    return bool(name) and not path.is_absolute() and ".." not in path.parts
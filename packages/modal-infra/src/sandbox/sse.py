@@ -0,0 +1,139 @@
+"""
+Incremental Server-Sent Events parser.
+
+Implements the event stream interpretation from the HTML spec
+(https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation):
+CR, LF and CRLF line endings, ``event``/``data``/``id``/``retry`` fields,
+comment lines and a leading byte order mark.
+
+The parser works on raw bytes and keeps a cursor into a single buffer, so
+each byte is scanned once no matter how the stream is chunked. Every run of
+complete lines is decoded and split in one pass; line terminators are ASCII
+and can never fall inside a multi-byte UTF-8 sequence, so decoding up to the
+last terminator is equivalent to running an incremental decoder over the
+stream.
+"""
+
+import re
+from dataclasses import dataclass
+
+_LINE_END = re.compile("\r\n|\r|\n")
+_BOM = b"\xef\xbb\xbf"
+
+
+@dataclass
+class SSEEvent:
+    """A dispatched Server-Sent Event."""
+
+    data: str
+    event: str = "message"
+    id: str | None = None
+    retry: int | None = None
+
+
+class SSEParser:
+    """Incremental SSE parser fed with byte chunks.
+
+    Usage:
+        parser = SSEParser()
+        async for chunk in response.aiter_bytes():
+            for event in parser.feed(chunk):
+                handle(event.data)
+
+    Each byte is scanned once: the cursor remembers how far an incomplete
+    trailing line has already been searched for a terminator.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._scan_pos = 0
+        self._skip_lf = False
+        self._started = False
+        self._data: list[str] = []
+        self._event_type = ""
+        self.last_event_id: str | None = None
+        self.retry: int | None = None
+
+    def feed(self, chunk: bytes) -> list[SSEEvent]:
+        """Consume a chunk and return the events it completes."""
+        buffer = self._buffer
+        buffer += chunk
+        events: list[SSEEvent] = []
+
+        if not self._started:
+            if len(buffer) < len(_BOM) and _BOM.startswith(bytes(buffer)):
+                return events
+            if buffer.startswith(_BOM):
+                del buffer[: len(_BOM)]
+            self._started = True
+
+        pos = 0
+        if self._skip_lf and buffer:
+            # The previous chunk ended with CR; a leading LF completes that CRLF
+            if buffer[0] == 0x0A:
+                pos = 1
+            self._skip_lf = False
+
+        # Only the bytes added since the last call can hold a new terminator
+        scan_from = max(pos, self._scan_pos)
+        end = max(buffer.rfind(b"\n", scan_from), buffer.rfind(b"\r", scan_from))
+        if end < 0:
+            if pos:
+                del buffer[:pos]
+            self._scan_pos = len(buffer)
+            return events
+
+        if buffer[end] == 0x0D and end == len(buffer) - 1:
+            # A trailing CR may be the first half of a CRLF split across chunks
+            self._skip_lf = True
+        text = buffer[pos : end + 1].decode("utf-8", errors="replace")
+        del buffer[: end + 1]
+        self._scan_pos = len(buffer)
+
+        lines = _LINE_END.split(text) if "\r" in text else text.split("\n")
+        # The text ends with a terminator, so the last split element is always empty
+        for line in lines[:-1]:
+            if line.startswith("data:"):
+                # Fast path for the overwhelmingly common field
+                self._data.append(line[6:] if line.startswith("data: ") else line[5:])
+                continue
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _process_line(self, line: str) -> SSEEvent | None:
+        if not line:
+            return self._dispatch()
+        if line[0] == ":":
+            return None
+
+        field, sep, value = line.partition(":")
+        if sep and value.startswith(" "):
+            value = value[1:]
+
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event_type = value
+        elif field == "id":
+            if "\0" not in value:
+                self.last_event_id = value
+        elif field == "retry":
+            if value.isascii() and value.isdigit():
+                self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> SSEEvent | None:
+        if not self._data:
+            self._event_type = ""
+            return None
+        event = SSEEvent(
+            data="\n".join(self._data),
+            event=self._event_type or "message",
+            id=self.last_event_id,
+            retry=self.retry,
+        )
+        self._data = []
+        self._event_type = ""
+        return event
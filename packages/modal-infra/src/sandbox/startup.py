@@ -0,0 +1,107 @@
+"""
+Sandbox startup expressed as a dependency graph of phases.
+
+Startup phases (git sync, setup script, OpenCode, bridge, ...) used to run
+strictly one after another, so cold start cost the sum of all of them. Each
+phase now declares the phases it needs, and runs as soon as those have
+finished; cold start costs the longest dependency chain instead. The graph
+records when every phase started and finished so that chain (the critical
+path) can be reported.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, NamedTuple
+
+
+class PhaseTiming(NamedTuple):
+    # Milliseconds since the graph started running
+    start_ms: int
+    end_ms: int
+
+    @property
+    def duration_ms(self) -> int:
+        return self.end_ms - self.start_ms
+
+
+class StartupGraph:
+    """Named async phases with declared dependencies.
+
+    Usage:
+        graph = StartupGraph()
+        graph.add("git_sync", perform_git_sync)
+        graph.add("opencode", start_opencode, after=("git_sync",))
+        results = await graph.run()     # phase name -> return value
+        graph.critical_path()           # ["git_sync", "opencode"]
+
+    If a phase raises, the phases still running are cancelled and the
+    exception propagates from run().
+    """
+
+    def __init__(self) -> None:
+        self._phases: dict[str, tuple[Callable[[], Awaitable[Any]], tuple[str, ...]]] = {}
+        self.timings: dict[str, PhaseTiming] = {}
+
+    def add(
+        self, name: str, run: Callable[[], Awaitable[Any]], after: tuple[str, ...] = ()
+    ) -> None:
+        if name in self._phases:
+            raise ValueError(f"Duplicate startup phase: {name}")
+        for dependency in after:
+            if dependency not in self._phases:
+                # Dependencies must be added first, which also rules out cycles
+                raise ValueError(f"Startup phase {name} depends on unknown phase {dependency}")
+        self._phases[name] = (run, after)
+
+    async def run(self) -> dict[str, Any]:
+        """Run every phase once its dependencies are done; return their results by name."""
+        started = time.monotonic()
+        tasks: dict[str, asyncio.Task[Any]] = {}
+
+        async def run_phase(name: str) -> Any:
+            run, after = self._phases[name]
+            if after:
+                await asyncio.gather(*(tasks[dependency] for dependency in after))
+            start_ms = int((time.monotonic() - started) * 1000)
+            try:
+                return await run()
+            finally:
+                self.timings[name] = PhaseTiming(start_ms, int((time.monotonic() - started) * 1000))
+
+        for name in self._phases:
+            tasks[name] = asyncio.create_task(run_phase(name), name=f"startup:{name}")
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    def critical_path(self) -> list[str]:
+        """The chain of phases that determined when startup finished, first to last.
+
+        Starts from the phase that finished last and repeatedly steps to the
+        dependency that finished last, i.e. the one the phase waited for.
+        """
+        if not self.timings:
+            return []
+        # Ties (phases finishing in the same millisecond) go to the phase added
+        # later, which is the dependent one when the two are related
+        order = {phase: index for index, phase in enumerate(self._phases)}
+
+        def finished_last(phases: list[str]) -> str:
+            return max(phases, key=lambda phase: (self.timings[phase].end_ms, order[phase]))
+
+        name = finished_last(list(self.timings))
+        path = [name]
+        while True:
+            finished = [dep for dep in self._phases[name][1] if dep in self.timings]
+            if not finished:
+                break
+            name = finished_last(finished)
+            path.append(name)
+        path.reverse()
+        return path
@@ -0,0 +1,98 @@
+"""
+Frame encoding for the sandbox -> control plane WebSocket.
+
+By default every event is a text frame holding JSON. When the control plane
+opts in at ready time, the bridge may send binary frames instead:
+
+    byte 0      flags: FLAG_DEFLATE (0x01) payload is raw DEFLATE (RFC 1951)
+                       FLAG_MSGPACK (0x02) payload is MessagePack, else UTF-8 JSON
+    bytes 1..   payload
+
+Only frames at least ``compress_threshold`` bytes long are deflated, so the
+small token updates that make up most of the traffic stay cheap to produce
+and to read. With msgpack negotiated every frame is binary; with deflate only,
+small frames remain plain JSON text.
+
+Each frame is compressed independently (no shared context), so the receiver
+can decode any frame on its own, e.g. with ``DecompressionStream("deflate-raw")``.
+"""
+
+import zlib
+from typing import Any
+
+from . import codec
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FLAG_DEFLATE = 0x01
+FLAG_MSGPACK = 0x02
+
+MSGPACK_AVAILABLE = msgpack is not None
+
+
+class FrameEncoder:
+    """Encode outbound events for the negotiated transport mode."""
+
+    def __init__(
+        self,
+        deflate: bool = False,
+        use_msgpack: bool = False,
+        compress_threshold: int = 1024,
+        compress_level: int = 1,
+        window_bits: int = 12,
+        mem_level: int = 5,
+    ):
+        if use_msgpack and msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        self.deflate = deflate
+        self.use_msgpack = use_msgpack
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self.window_bits = window_bits
+        self.mem_level = mem_level
+
+    @property
+    def binary(self) -> bool:
+        return self.deflate or self.use_msgpack
+
+    def encode(self, obj: Any) -> str | bytes:
+        """Encode one event (or a batch list) into a single frame."""
+        if not self.binary:
+            return codec.dumps(obj)
+
+        if self.use_msgpack:
+            payload: bytes = msgpack.packb(obj, default=str)
+            flags = FLAG_MSGPACK
+        else:
+            payload = codec.dumps_bytes(obj)
+            flags = 0
+
+        if self.deflate and len(payload) >= self.compress_threshold:
+            compressor = zlib.compressobj(
+                self.compress_level, zlib.DEFLATED, -self.window_bits, self.mem_level
+            )
+            payload = compressor.compress(payload) + compressor.flush()
+            flags |= FLAG_DEFLATE
+        elif not self.use_msgpack:
+            # Small JSON frames stay text so they cost nothing extra to read
+            return payload.decode()
+
+        return bytes((flags,)) + payload
+
+
+def decode_frame(frame: str | bytes) -> Any:
+    """Decode a frame produced by FrameEncoder."""
+    if isinstance(frame, str):
+        return codec.loads(frame)
+    flags = frame[0]
+    payload = frame[1:]
+    if flags & FLAG_DEFLATE:
+        payload = zlib.decompress(payload, -15)
+    if flags & FLAG_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.unpackb(payload)
+    return codec.loads(payload)
@@ -3,6 +3,8 @@ Scheduled image builder for repository snapshots.
 
 This module handles:
 - Periodic rebuilding of repository images (every 30 minutes)
+- Keeping a bare git mirror of every registered repo on the volume
+- Publishing setup script caches for repos that opt in to them
 - Cloning repos with GitHub App authentication
 - Running setup/build commands to prime caches
 - Creating filesystem snapshots for fast sandbox startup
@@ -15,9 +17,22 @@ import os
 import subprocess
 import time
 from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import modal
 
 from ..app import app, function_image, github_app_secrets, inspect_volume
 from ..images.base import base_image
+from ..sandbox.git_mirror import mirror_clone_url, refresh_mirror
+from ..sandbox.log_config import get_logger
+from ..sandbox.setup_cache import (
+    CACHE_PATHS_FILE,
+    SETUP_CACHE_ROOT,
+    SetupCache,
+    cache_dir,
+    inputs_fingerprint,
+)
 
 
 def _generate_github_app_token() -> str:
@@ -124,12 +139,30 @@ def build_repo_image(
 
         print(f"[builder] Cloning {repo_owner}/{repo_name}...")
 
-        # Clone repository
+        # Clone repository, from the volume's mirror when it can be refreshed
+        clone_start = time.time()
+        try:
+            mirror = refresh_mirror(repo_owner, repo_name, clone_url, default_branch).path
+        except Exception as e:
+            print(f"[builder] Git mirror unavailable, cloning from GitHub: {e}")
+            mirror = None
+        source = mirror_clone_url(mirror) if mirror else clone_url
         subprocess.run(
-            ["git", "clone", "--depth=1", f"--branch={default_branch}", clone_url, repo_path],
+            ["git", "clone", "--depth=1", f"--branch={default_branch}", source, repo_path],
             check=True,
             capture_output=True,
         )
+        if mirror:
+            subprocess.run(
+                ["git", "remote", "set-url", "origin", clone_url],
+                cwd=repo_path,
+                check=True,
+                capture_output=True,
+            )
+        print(
+            f"[builder] Cloned from {'mirror' if mirror else 'GitHub'} "
+            f"in {time.time() - clone_start:.1f}s"
+        )
 
         # Get current SHA
         result = subprocess.run(
@@ -392,6 +425,111 @@ def rebuild_repo_images():
     return results
 
 
+@app.function(
+    image=base_image,
+    schedule=modal.Cron("*/15 * * * *"),
+    volumes={"/data": inspect_volume},
+    secrets=[github_app_secrets],
+    timeout=1800,
+)
+def refresh_git_mirrors() -> dict[str, Any]:
+    """
+    Scheduled function to bring the git mirror of every registered repository up to date.
+
+    Each refresh is an incremental fetch, so this stays cheap even for large
+    repositories. Sandboxes created between refreshes fetch the remaining
+    delta from GitHub themselves.
+    """
+    # Lazy imports to avoid pydantic at module load time
+    from ..registry.store import SnapshotStore
+
+    repos = SnapshotStore().list_repositories()
+    token = _generate_github_app_token()
+    refreshed = failed = 0
+    repo_results: list[dict[str, Any]] = []
+
+    cache_builds = []
+    for repo in repos:
+        try:
+            refresh = refresh_mirror(
+                repo.owner,
+                repo.name,
+                _get_clone_url(repo.owner, repo.name, token),
+                repo.default_branch,
+            )
+        except Exception as e:
+            print(f"[scheduler] Failed to refresh mirror for {repo.owner}/{repo.name}: {e}")
+            failed += 1
+            repo_results.append({"owner": repo.owner, "name": repo.name, "status": "error"})
+            continue
+
+        refreshed += 1
+        if _setup_cache_stale(repo.owner, repo.name, refresh.path, repo.default_branch):
+            cache_builds.append(repo)
+        repo_results.append(
+            {
+                "owner": repo.owner,
+                "name": repo.name,
+                "status": "created" if refresh.created else "updated",
+                "duration_ms": refresh.duration_ms,
+            }
+        )
+
+    # Make the new objects visible to sandboxes created from now on
+    inspect_volume.commit()
+    for repo in cache_builds:
+        build_setup_cache.spawn(repo.owner, repo.name, repo.default_branch)
+    print(f"[scheduler] Mirror refresh complete: {refreshed} refreshed, {failed} failed")
+    return {"refreshed": refreshed, "failed": failed, "repos": repo_results}
+
+
+def _setup_cache_stale(repo_owner: str, repo_name: str, mirror: Path, branch: str) -> bool:
+    """Whether the repo opts in to a setup cache whose last build predates its current inputs.
+
+    Opting in means a cache-paths file on the branch (see sandbox/setup_cache.py).
+    This runs on the sandbox base image, so the image version in the
+    fingerprint matches the builders'.
+    """
+    result = subprocess.run(
+        ["git", "--git-dir", str(mirror), "cat-file", "-e", f"{branch}:{CACHE_PATHS_FILE}"],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return False
+    fingerprint = inputs_fingerprint(mirror, branch)
+    cache = SetupCache(cache_dir(repo_owner, repo_name, SETUP_CACHE_ROOT), get_logger("scheduler"))
+    return fingerprint is None or fingerprint != cache.built_inputs()
+
+
+@app.function(
+    image=function_image,
+    volumes={"/data": inspect_volume},
+    secrets=[github_app_secrets],
+    timeout=1800,
+)
+async def build_setup_cache(
+    repo_owner: str, repo_name: str, default_branch: str = "main"
+) -> dict[str, Any]:
+    """
+    Publish a repository's setup cache from a builder sandbox.
+
+    The builder clones the repo and runs its setup script without an agent;
+    session sandboxes only ever read what it publishes.
+    """
+    # Lazy imports to avoid pydantic at module load time
+    from ..sandbox.manager import SandboxManager
+
+    sandbox = await SandboxManager().create_setup_cache_builder(
+        repo_owner, repo_name, _generate_github_app_token(), default_branch
+    )
+    await sandbox.wait.aio(raise_on_termination=False)
+    print(
+        f"[scheduler] Setup cache build for {repo_owner}/{repo_name} "
+        f"exited with {sandbox.returncode}"
+    )
+    return {"owner": repo_owner, "name": repo_name, "exit_code": sandbox.returncode}
+
+
 @app.function(
     image=function_image,
     volumes={"/data": inspect_volume},
@@ -3,6 +3,7 @@
 from typing import Any
 
 import httpx
+import pytest
 
 
 class MockResponse:
@@ -23,3 +24,13 @@ class MockResponse:
                 request=httpx.Request("GET", "http://test"),
                 response=httpx.Response(self.status_code),
             )
+
+
+@pytest.fixture(autouse=True)
+def isolated_event_journal(tmp_path, monkeypatch):
+    """Give every bridge created in a test its own journal, in-flight record and setup marker."""
+    from src.sandbox.bridge import AgentBridge
+
+    monkeypatch.setattr(AgentBridge, "JOURNAL_PATH", tmp_path / "bridge-events.journal")
+    monkeypatch.setattr(AgentBridge, "INFLIGHT_PATH", tmp_path / "bridge-inflight-prompt.json")
+    monkeypatch.setattr(AgentBridge, "SETUP_PENDING_PATH", tmp_path / "sandbox-setup-pending")
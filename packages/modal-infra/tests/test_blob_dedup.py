@@ -0,0 +1,98 @@
+"""Tests for content-addressed dedup of large event payloads."""
+
+import pytest
+
+from src.sandbox.blobs import BlobCache, blob_digest
+from src.sandbox.bridge import AgentBridge
+
+OUTPUT = "def main():\n    pass\n" * 400
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.capabilities = {"blob_dedup", "event_journal"}
+    yield bridge
+    bridge.journal.close()
+
+
+def _tool_call(call_id: str, output: str = OUTPUT) -> dict:
+    return {
+        "type": "tool_call",
+        "tool": "read",
+        "callId": call_id,
+        "status": "completed",
+        "output": output,
+        "messageId": "m1",
+    }
+
+
+class TestBlobCache:
+    def test_in_flight_blobs_are_known_and_promoted_on_ack(self):
+        cache = BlobCache(max_entries=2)
+        cache.sent("a", seq=1)
+        cache.sent("b", seq=5)
+
+        cache.ack(3)
+
+        assert cache.known("a")
+        assert cache.known("b")
+        cache.drop_in_flight()
+        assert cache.known("a")
+        assert not cache.known("b")
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = BlobCache(max_entries=2)
+        for seq, digest in enumerate(["a", "b"], start=1):
+            cache.sent(digest, seq)
+        cache.ack(2)
+        cache.known("a")
+        cache.sent("c", 3)
+
+        cache.ack(3)
+
+        assert cache.known("a")
+        assert not cache.known("b")
+        assert cache.known("c")
+
+
+class TestBridgeBlobDedup:
+    async def test_repeated_output_sent_once(self, bridge: AgentBridge):
+        await bridge._send_event(_tool_call("c1"))
+        await bridge._send_event(_tool_call("c2"))
+
+        events = bridge.journal.replay()
+        digest = blob_digest(OUTPUT)
+        assert [e["type"] for e in events] == ["blob", "tool_call", "tool_call"]
+        assert events[0] == {**events[0], "hash": digest, "data": OUTPUT}
+        assert all(e["blobRefs"] == {"output": digest} for e in events[1:])
+        assert all("output" not in e for e in events[1:])
+
+    async def test_small_payloads_stay_inline(self, bridge: AgentBridge):
+        await bridge._send_event(_tool_call("c1", output="ok"))
+
+        [event] = bridge.journal.replay()
+        assert event["output"] == "ok"
+        assert "blobRefs" not in event
+
+    async def test_blob_miss_resends_payload(self, bridge: AgentBridge):
+        await bridge._send_event(_tool_call("c1"))
+        await bridge._handle_command({"type": "ack", "seq": 2})
+
+        await bridge._handle_command({"type": "blob_miss", "hash": blob_digest(OUTPUT)})
+        await bridge._send_event(_tool_call("c2"))
+
+        assert [e["type"] for e in bridge.journal.replay()] == ["blob", "tool_call"]
+
+    async def test_not_negotiated_keeps_payloads_inline(self, bridge: AgentBridge):
+        bridge.capabilities = set()
+
+        await bridge._send_event(_tool_call("c1"))
+
+        [event] = bridge.journal.replay()
+        assert event["output"] == OUTPUT
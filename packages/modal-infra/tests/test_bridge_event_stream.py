@@ -0,0 +1,303 @@
+"""Tests for the bridge's session-wide OpenCode event subscription."""
+
+import asyncio
+import contextlib
+from typing import Any
+
+import httpx
+import pytest
+
+from src.sandbox.bridge import (
+    AgentBridge,
+    OpenCodeIdentifier,
+    PromptStreamState,
+    SSEConnectionError,
+)
+from tests.conftest import MockResponse
+from tests.test_bridge_sse import create_sse_event
+
+
+class LiveSSEResponse:
+    """SSE response that stays open and yields whatever the client feeds it."""
+
+    def __init__(self, client: "LiveSSEClient"):
+        self.status_code = 200
+        self._client = client
+
+    async def aiter_bytes(self):
+        while True:
+            chunk = await self._client.chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk.encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class LiveSSEClient:
+    """Mock HTTP client backed by a long-lived SSE stream."""
+
+    def __init__(self):
+        self.chunks: asyncio.Queue[str | Exception] = asyncio.Queue()
+        self.stream_calls = 0
+        self.post_urls: list[str] = []
+
+    def feed(self, event_type: str, properties: dict) -> None:
+        self.chunks.put_nowait(create_sse_event(event_type, properties))
+
+    async def post(self, url: str, json: dict | None = None, timeout: float = 30.0) -> Any:
+        self.post_urls.append(url)
+        return MockResponse(204)
+
+    async def get(self, url: str, timeout: float = 10.0) -> Any:
+        return MockResponse(200, [])
+
+    def stream(self, method: str, url: str, timeout: Any = None):
+        self.stream_calls += 1
+        return LiveSSEResponse(self)
+
+
+@pytest.fixture
+async def bridge():
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.http_client = LiveSSEClient()
+    bridge.EVENT_STREAM_BACKOFF_BASE = 0.01
+    yield bridge
+    if bridge._event_stream_task:
+        bridge._event_stream_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await bridge._event_stream_task
+
+
+def _feed_reply(client: LiveSSEClient, parent_id: str, text: str, msg_id: str) -> None:
+    client.feed(
+        "message.updated",
+        {
+            "info": {
+                "id": msg_id,
+                "role": "assistant",
+                "sessionID": "oc-session-123",
+                "parentID": parent_id,
+            }
+        },
+    )
+    client.feed(
+        "message.part.updated",
+        {
+            "part": {
+                "type": "text",
+                "id": f"part-{msg_id}",
+                "sessionID": "oc-session-123",
+                "messageID": msg_id,
+                "text": text,
+            }
+        },
+    )
+    client.feed("session.idle", {"sessionID": "oc-session-123"})
+
+
+async def _run_prompt(bridge: AgentBridge, message_id: str) -> list[dict]:
+    return [e async for e in bridge._stream_opencode_response_sse(message_id, "prompt")]
+
+
+class TestPersistentSubscription:
+    async def test_one_subscription_serves_multiple_prompts(self, bridge, monkeypatch):
+        client = bridge.http_client
+
+        for n in (1, 2):
+            oc_id = f"msg_test_{n}"
+            monkeypatch.setattr(
+                OpenCodeIdentifier, "ascending", classmethod(lambda cls, prefix, i=oc_id: i)
+            )
+            _feed_reply(client, oc_id, f"answer {n}", f"oc-msg-{n}")
+            events = await _run_prompt(bridge, f"cp-msg-{n}")
+
+            tokens = [e for e in events if e["type"] == "token"]
+            assert tokens[-1]["content"] == f"answer {n}"
+            assert tokens[-1]["messageId"] == f"cp-msg-{n}"
+
+        assert client.stream_calls == 1
+        assert bridge._event_subscribers == []
+
+    async def test_tracks_session_status_between_prompts(self, bridge):
+        await bridge._ensure_event_stream()
+
+        bridge.http_client.feed(
+            "session.status", {"sessionID": "oc-session-123", "status": {"type": "busy"}}
+        )
+        await asyncio.sleep(0.01)
+        assert bridge.opencode_session_status == "busy"
+
+        bridge.http_client.feed("session.idle", {"sessionID": "oc-session-123"})
+        await asyncio.sleep(0.01)
+        assert bridge.opencode_session_status == "idle"
+
+    async def test_read_error_exhausting_resume_budget_fails_prompt(self, bridge):
+        client = bridge.http_client
+        bridge.SSE_RESUME_MAX_ATTEMPTS = 0
+        client.chunks.put_nowait(httpx.ReadError("connection reset"))
+
+        with pytest.raises(SSEConnectionError, match="SSE read error"):
+            await _run_prompt(bridge, "cp-msg-1")
+
+        await asyncio.wait_for(bridge._event_stream_connected.wait(), timeout=1.0)
+        assert client.stream_calls == 2
+        assert bridge.metrics.sse_resumptions.labels("exhausted").value == 1
+
+
+class MessageAPIClient(LiveSSEClient):
+    """LiveSSEClient whose message API serves a fixed list of messages."""
+
+    def __init__(self, messages: list[dict]):
+        super().__init__()
+        self.messages = messages
+
+    async def get(self, url: str, timeout: float = 10.0) -> Any:
+        if "?limit=" in url:
+            return MockResponse(200, self.messages)
+        msg_id = url.rsplit("/", 1)[-1]
+        return MockResponse(200, next(m for m in self.messages if m["info"]["id"] == msg_id))
+
+
+class TestResume:
+    @pytest.fixture(autouse=True)
+    def fixed_message_id(self, monkeypatch):
+        monkeypatch.setattr(
+            OpenCodeIdentifier, "ascending", classmethod(lambda cls, prefix: "msg_test")
+        )
+
+    async def test_read_error_resumes_prompt(self, bridge):
+        client = bridge.http_client
+        client.chunks.put_nowait(httpx.ReadError("connection reset"))
+
+        prompt = asyncio.create_task(_run_prompt(bridge, "cp-msg-1"))
+        while client.stream_calls < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(bridge._event_stream_connected.wait(), timeout=1.0)
+        await asyncio.sleep(0.01)
+        _feed_reply(client, "msg_test", "still here", "oc-msg-1")
+
+        events = await asyncio.wait_for(prompt, timeout=2.0)
+
+        tokens = [e for e in events if e["type"] == "token"]
+        assert tokens[-1]["content"] == "still here"
+        assert tokens[-1]["messageId"] == "cp-msg-1"
+        assert bridge.metrics.sse_resumptions.labels("resumed").value == 1
+
+    async def test_resume_replays_missed_parts_and_detects_finish(self, bridge):
+        client = MessageAPIClient(
+            [
+                {
+                    "info": {
+                        "id": "oc-msg-1",
+                        "role": "assistant",
+                        "parentID": "msg_test",
+                        "finish": "stop",
+                        "time": {"created": 1, "completed": 2},
+                    },
+                    "parts": [
+                        {
+                            "id": "part-1",
+                            "type": "text",
+                            "messageID": "oc-msg-1",
+                            "sessionID": "oc-session-123",
+                            "text": "finished while disconnected",
+                            "time": {"start": 1, "end": 2},
+                        }
+                    ],
+                }
+            ]
+        )
+        bridge.http_client = client
+        client.chunks.put_nowait(httpx.ReadError("connection reset"))
+
+        events = await asyncio.wait_for(_run_prompt(bridge, "cp-msg-1"), timeout=2.0)
+
+        tokens = [e for e in events if e["type"] == "token"]
+        assert [t["content"] for t in tokens] == ["finished while disconnected"]
+        assert bridge.metrics.sse_resumptions.labels("resumed").value == 1
+
+    async def test_repeated_resumes_emit_steps_and_tools_once(self, bridge):
+        def part(part_id: str, part_type: str, **fields: Any) -> dict:
+            return {
+                "id": part_id,
+                "type": part_type,
+                "messageID": "oc-msg-1",
+                "sessionID": "oc-session-123",
+                **fields,
+            }
+
+        bridge.http_client = MessageAPIClient(
+            [
+                {
+                    "info": {"id": "oc-msg-1", "role": "assistant", "parentID": "msg_test"},
+                    "parts": [
+                        part("step-1", "step-start"),
+                        part(
+                            "tool-1",
+                            "tool",
+                            tool="bash",
+                            callID="call-1",
+                            state={"status": "completed", "input": {}, "output": "ok"},
+                        ),
+                        part("step-2", "step-finish", reason="tool-calls"),
+                    ],
+                }
+            ]
+        )
+        queue = bridge._subscribe_events()
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = []
+        for attempt in (1, 2):
+            events += [e async for e in bridge._resume_prompt_stream(state, queue, "x", attempt)]
+
+        assert [e["type"] for e in events] == ["step_start", "tool_call", "step_finish"]
+        bridge._unsubscribe_events(queue)
+
+    async def test_stale_reconnect_errors_are_dropped(self, bridge):
+        queue = bridge._subscribe_events()
+        await bridge._ensure_event_stream()
+        queue.put_nowait(SSEConnectionError("old failure"))
+        queue.put_nowait({"type": "server.heartbeat"})
+
+        state = PromptStreamState("cp-msg-1", "msg_test")
+        [e async for e in bridge._resume_prompt_stream(state, queue, "x", 1)]
+
+        assert bridge._drain_queue(queue) == [{"type": "server.heartbeat"}]
+        bridge._unsubscribe_events(queue)
+
+
+class TestSubscribers:
+    async def test_unsubscribe_drains_queue(self, bridge):
+        queue = bridge._subscribe_events()
+        queue.put_nowait({"type": "server.heartbeat"})
+
+        bridge._unsubscribe_events(queue)
+
+        assert queue.empty()
+        assert queue not in bridge._event_subscribers
+
+    async def test_connect_failure_surfaces_as_sse_error(self, bridge):
+        class FailingClient(LiveSSEClient):
+            def stream(self, method: str, url: str, timeout: Any = None):
+                self.stream_calls += 1
+                response = LiveSSEResponse(self)
+                response.status_code = 503
+                return response
+
+        bridge.http_client = FailingClient()
+        bridge.HTTP_CONNECT_TIMEOUT = 0.1
+
+        with pytest.raises(SSEConnectionError, match="503"):
+            await bridge._ensure_event_stream()
@@ -0,0 +1,312 @@
+"""Tests for the bridge's FIFO prompt queue."""
+
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.events: list[dict[str, Any]] = []
+
+    async def capture(event: dict[str, Any]) -> None:
+        bridge.events.append(event)
+
+    bridge._send_event = capture
+    return bridge
+
+
+class GatedPrompts:
+    """Fake _handle_prompt whose prompts finish only when released."""
+
+    def __init__(self) -> None:
+        self.started: list[str] = []
+        self.contents: list[str] = []
+        self.gates: dict[str, asyncio.Event] = {}
+
+    def gate(self, message_id: str) -> asyncio.Event:
+        return self.gates.setdefault(message_id, asyncio.Event())
+
+    async def __call__(self, cmd: dict[str, Any], queued: Any = None) -> None:
+        self.started.append(cmd["messageId"])
+        self.contents.append(cmd.get("content", ""))
+        await self.gate(cmd["messageId"]).wait()
+
+
+def _prompt(message_id: str, content: str = "hi", **extra: Any) -> dict[str, Any]:
+    return {"type": "prompt", "messageId": message_id, "content": content, **extra}
+
+
+class TestPromptQueue:
+    async def test_prompts_run_one_at_a_time_in_order(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+
+        tasks = [await bridge._handle_command(_prompt(f"msg-{n}")) for n in range(3)]
+        await asyncio.sleep(0)
+        assert prompts.started == ["msg-0"]
+
+        for n in range(3):
+            prompts.gate(f"msg-{n}").set()
+            await tasks[n]
+            await asyncio.sleep(0)
+
+        assert prompts.started == ["msg-0", "msg-1", "msg-2"]
+        assert bridge._current_prompt_task is None
+
+    async def test_queued_prompts_are_announced_with_position(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+
+        first = await bridge._handle_command(_prompt("msg-1"))
+        await bridge._handle_command(_prompt("msg-2"))
+        await bridge._handle_command(_prompt("msg-3"))
+        await asyncio.sleep(0)
+
+        queued = [e for e in bridge.events if e["type"] == "prompt_queued"]
+        assert queued == [
+            {"type": "prompt_queued", "messageId": "msg-2", "position": 1},
+            {"type": "prompt_queued", "messageId": "msg-3", "position": 2},
+        ]
+        assert bridge.metrics.prompt_queue_depth.value == 2
+
+        prompts.gate("msg-1").set()
+        await first
+        await asyncio.sleep(0)
+        assert bridge.metrics.prompt_queue_depth.value == 1
+
+        for gate in ("msg-2", "msg-3"):
+            prompts.gate(gate).set()
+
+    async def test_stop_with_message_id_drops_only_queued_prompt(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+        bridge._request_opencode_stop = AsyncMock()
+
+        running = await bridge._handle_command(_prompt("msg-1"))
+        queued = await bridge._handle_command(_prompt("msg-2"))
+        await asyncio.sleep(0)
+
+        await bridge._handle_command({"type": "stop", "messageId": "msg-2"})
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        await asyncio.sleep(0)
+
+        assert not running.done()
+        assert len(bridge._prompt_queue) == 0
+        bridge._request_opencode_stop.assert_not_awaited()
+        assert {
+            "type": "execution_complete",
+            "messageId": "msg-2",
+            "success": False,
+            "error": "Task was cancelled",
+        } in bridge.events
+
+        prompts.gate("msg-1").set()
+        await running
+        assert prompts.started == ["msg-1"]
+
+    async def test_stop_without_message_id_leaves_queue_waiting(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+        bridge._request_opencode_stop = AsyncMock()
+
+        running = await bridge._handle_command(_prompt("msg-1"))
+        queued = await bridge._handle_command(_prompt("msg-2"))
+        await asyncio.sleep(0)
+
+        await bridge._handle_command({"type": "stop"})
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        await asyncio.sleep(0)
+
+        assert prompts.started == ["msg-1", "msg-2"]
+        assert bridge._current_prompt_task is queued
+        bridge._request_opencode_stop.assert_awaited_once()
+
+        prompts.gate("msg-2").set()
+        await queued
+
+    async def test_stop_for_finished_prompt_is_ignored(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+        bridge._request_opencode_stop = AsyncMock()
+
+        running = await bridge._handle_command(_prompt("msg-2"))
+        await asyncio.sleep(0)
+
+        await bridge._handle_command({"type": "stop", "messageId": "msg-1"})
+        assert not running.done()
+        bridge._request_opencode_stop.assert_not_awaited()
+
+        await bridge._handle_command({"type": "stop", "messageId": "msg-2"})
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        bridge._request_opencode_stop.assert_awaited_once()
+
+    async def test_mergeable_follow_up_joins_waiting_prompt(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+
+        running = await bridge._handle_command(_prompt("msg-1"))
+        await asyncio.sleep(0)
+        waiting = await bridge._handle_command(_prompt("msg-2", "first"))
+        merged = await bridge._handle_command(_prompt("msg-3", "second", mergeable=True))
+
+        assert merged is None
+        assert len(bridge._prompt_queue) == 1
+        assert {
+            "type": "prompt_queued",
+            "messageId": "msg-3",
+            "mergedInto": "msg-2",
+            "position": 1,
+        } in bridge.events
+
+        prompts.gate("msg-1").set()
+        prompts.gate("msg-2").set()
+        await running
+        await waiting
+
+        assert prompts.started == ["msg-1", "msg-2"]
+        assert prompts.contents[1] == "first\n\nsecond"
+
+    async def test_follow_up_with_other_model_is_not_merged(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        bridge._handle_prompt = prompts
+
+        running = await bridge._handle_command(_prompt("msg-1"))
+        await asyncio.sleep(0)
+        waiting = await bridge._handle_command(_prompt("msg-2", model="a"))
+        separate = await bridge._handle_command(_prompt("msg-3", model="b", mergeable=True))
+
+        assert separate is not None
+        assert len(bridge._prompt_queue) == 2
+
+        for task, gate in ((running, "msg-1"), (waiting, "msg-2"), (separate, "msg-3")):
+            prompts.gate(gate).set()
+            await task
+
+
+class TestMergedPrompts:
+    async def _merge(self, bridge: AgentBridge, prompts: Any) -> tuple[asyncio.Task, asyncio.Task]:
+        """Run msg-1, then queue msg-2 with msg-3 merged into it."""
+        bridge._handle_prompt = prompts
+        running = await bridge._handle_command(_prompt("msg-1"))
+        await asyncio.sleep(0)
+        waiting = await bridge._handle_command(_prompt("msg-2", "first"))
+        await bridge._handle_command(_prompt("msg-3", "second", mergeable=True))
+        return running, waiting
+
+    async def test_every_merged_id_gets_execution_complete(self, bridge: AgentBridge):
+        bridge.opencode_session_id = "oc-session"
+        real_handle_prompt = bridge._handle_prompt
+
+        async def no_output(*args: Any):
+            return
+            yield
+
+        bridge._stream_opencode_response_sse = no_output
+        gate = asyncio.Event()
+
+        async def handle_prompt(cmd: dict[str, Any], queued: Any = None) -> None:
+            if cmd["messageId"] == "msg-1":
+                await gate.wait()
+            await real_handle_prompt(cmd, queued)
+
+        running, waiting = await self._merge(bridge, handle_prompt)
+        gate.set()
+        await running
+        await waiting
+
+        completes = {e["messageId"]: e for e in bridge.events if e["type"] == "execution_complete"}
+        assert set(completes) == {"msg-1", "msg-2", "msg-3"}
+        assert completes["msg-3"]["success"] is True
+        assert completes["msg-3"]["mergedInto"] == "msg-2"
+        assert "mergedInto" not in completes["msg-2"]
+
+    async def test_cancelled_merged_prompt_completes_every_id(self, bridge: AgentBridge):
+        bridge._request_opencode_stop = AsyncMock()
+        prompts = GatedPrompts()
+        running, waiting = await self._merge(bridge, prompts)
+        prompts.gate("msg-1").set()
+        await running
+        await asyncio.sleep(0)
+
+        await bridge._handle_command({"type": "stop", "messageId": "msg-2"})
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await asyncio.sleep(0)
+
+        cancelled = [
+            e["messageId"]
+            for e in bridge.events
+            if e["type"] == "execution_complete" and e["error"] == "Task was cancelled"
+        ]
+        assert cancelled == ["msg-2", "msg-3"]
+
+    async def test_stopping_queued_merged_id_removes_only_its_content(self, bridge: AgentBridge):
+        prompts = GatedPrompts()
+        running, waiting = await self._merge(bridge, prompts)
+
+        await bridge._handle_command({"type": "stop", "messageId": "msg-2"})
+
+        assert not waiting.done()
+        assert {
+            "type": "execution_complete",
+            "messageId": "msg-2",
+            "success": False,
+            "error": "Task was cancelled",
+        } in bridge.events
+
+        prompts.gate("msg-1").set()
+        prompts.gate("msg-3").set()
+        await running
+        await waiting
+        assert prompts.started == ["msg-1", "msg-3"]
+        assert prompts.contents[1] == "second"
+
+    async def test_stopping_id_merged_into_running_prompt_is_ignored(self, bridge: AgentBridge):
+        bridge._request_opencode_stop = AsyncMock()
+        prompts = GatedPrompts()
+        running, waiting = await self._merge(bridge, prompts)
+        prompts.gate("msg-1").set()
+        await running
+        await asyncio.sleep(0)
+        assert prompts.started == ["msg-1", "msg-2"]
+
+        await bridge._handle_command({"type": "stop", "messageId": "msg-3"})
+
+        assert not waiting.done()
+        bridge._request_opencode_stop.assert_not_awaited()
+        prompts.gate("msg-2").set()
+        await waiting
+
+    async def test_timeline_includes_time_spent_queued(self, bridge: AgentBridge):
+        timelines: dict[str, dict[str, int]] = {}
+        prompts = GatedPrompts()
+
+        async def record(cmd: dict[str, Any], queued: Any = None) -> None:
+            timelines[cmd["messageId"]] = queued.timeline.marks
+            await prompts(cmd, queued)
+
+        bridge._handle_prompt = record
+        running = await bridge._handle_command(_prompt("msg-1"))
+        waiting = await bridge._handle_command(_prompt("msg-2"))
+        await asyncio.sleep(0.05)
+        prompts.gate("msg-1").set()
+        prompts.gate("msg-2").set()
+        await running
+        await waiting
+
+        assert timelines["msg-2"]["received"] == 0
+        assert timelines["msg-2"]["dequeued"] >= 40
@@ -0,0 +1,265 @@
+"""Tests for reattaching to an in-flight prompt after a bridge restart."""
+
+import asyncio
+import contextlib
+from typing import Any
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge
+from src.sandbox.inflight import InflightPrompt
+from tests.conftest import MockResponse
+from tests.test_bridge_event_stream import LiveSSEClient
+
+
+class ReattachClient(LiveSSEClient):
+    """LiveSSEClient with a fixed message list and session status map."""
+
+    def __init__(self, messages: list[dict], statuses: dict[str, Any]):
+        super().__init__()
+        self.messages = messages
+        self.statuses = statuses
+
+    async def get(self, url: str, timeout: float = 10.0) -> Any:
+        if url.endswith("/session/status"):
+            return MockResponse(200, self.statuses)
+        if "?limit=" in url:
+            return MockResponse(200, self.messages)
+        msg_id = url.rsplit("/", 1)[-1]
+        return MockResponse(200, next(m for m in self.messages if m["info"]["id"] == msg_id))
+
+
+@pytest.fixture
+async def bridge():
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.EVENT_STREAM_BACKOFF_BASE = 0.01
+    yield bridge
+    if bridge._event_stream_task:
+        bridge._event_stream_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await bridge._event_stream_task
+    bridge.journal.close()
+
+
+def _record(**overrides: Any) -> InflightPrompt:
+    fields = {
+        "message_id": "cp-msg-1",
+        "opencode_session_id": "oc-session-123",
+        "opencode_message_id": "msg_test",
+        "last_seq": 40,
+        "text_offsets": {"part-1": 5},
+        "settled_part_ids": ["part-0"],
+        "step_part_ids": [],
+        "tool_states": [],
+    }
+    return InflightPrompt(**{**fields, **overrides})
+
+
+def _assistant_message(text: str, finished: bool) -> dict:
+    info: dict[str, Any] = {
+        "id": "oc-msg-1",
+        "role": "assistant",
+        "parentID": "msg_test",
+        "time": {"created": 1},
+    }
+    if finished:
+        info["finish"] = "stop"
+        info["time"]["completed"] = 2
+    return {
+        "info": info,
+        "parts": [
+            {
+                "id": "part-0",
+                "type": "text",
+                "messageID": "oc-msg-1",
+                "sessionID": "oc-session-123",
+                "text": "Already sent.",
+                "time": {"start": 1, "end": 1},
+            },
+            {
+                "id": "part-1",
+                "type": "text",
+                "messageID": "oc-msg-1",
+                "sessionID": "oc-session-123",
+                "text": text,
+                "time": {"start": 1, "end": 2} if finished else {"start": 1},
+            },
+        ],
+    }
+
+
+class TestInflightPrompt:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "inflight.json"
+        _record().save(path)
+
+        assert InflightPrompt.load(path) == _record()
+
+    def test_unreadable_record_is_ignored(self, tmp_path):
+        path = tmp_path / "inflight.json"
+        assert InflightPrompt.load(path) is None
+        path.write_text("{not json")
+        assert InflightPrompt.load(path) is None
+        path.write_text('{"message_id": "x"}')
+        assert InflightPrompt.load(path) is None
+
+
+class TestRecording:
+    async def test_record_written_before_prompt_and_cleared_after(self, bridge: AgentBridge):
+        class RecordingClient(LiveSSEClient):
+            record: InflightPrompt | None = None
+
+            async def post(self, url: str, json: dict | None = None, timeout: float = 30.0):
+                self.record = InflightPrompt.load(AgentBridge.INFLIGHT_PATH)
+                self.feed("session.idle", {"sessionID": "oc-session-123"})
+                return await super().post(url, json, timeout)
+
+        client = bridge.http_client = RecordingClient()
+
+        [e async for e in bridge._stream_opencode_response_sse("cp-msg-1", "prompt")]
+
+        assert client.record is not None
+        assert client.record.message_id == "cp-msg-1"
+        assert client.record.opencode_session_id == "oc-session-123"
+        assert not AgentBridge.INFLIGHT_PATH.exists()
+
+
+class TestReattach:
+    async def test_finished_prompt_sends_only_unsent_text(self, bridge: AgentBridge):
+        bridge.capabilities = {"token_delta"}
+        bridge.http_client = ReattachClient([_assistant_message("Hello world", True)], {})
+        _record().save(AgentBridge.INFLIGHT_PATH)
+
+        await bridge._reattach_inflight_prompt()
+        await asyncio.wait_for(bridge._current_prompt_task, timeout=2.0)
+
+        events = bridge.journal.replay()
+        tokens = [e for e in events if e["type"] == "token"]
+        assert tokens[0]["delta"] == " world"
+        assert tokens[0]["offset"] == 5
+        assert tokens[0]["messageId"] == "cp-msg-1"
+        assert tokens[0]["seq"] == 41
+        complete = [e for e in events if e["type"] == "execution_complete"]
+        assert complete[0]["messageId"] == "cp-msg-1"
+        assert complete[0]["success"] is True
+        assert not AgentBridge.INFLIGHT_PATH.exists()
+        assert bridge.metrics.sse_resumptions.labels("reattached").value == 1
+
+    async def test_steps_and_tools_sent_before_restart_are_not_resent(self, bridge: AgentBridge):
+        message = _assistant_message("Hello world", True)
+        message["parts"][:0] = [
+            {"id": "step-1", "type": "step-start", "sessionID": "oc-session-123"},
+            {
+                "id": "tool-1",
+                "type": "tool",
+                "tool": "bash",
+                "callID": "call-1",
+                "sessionID": "oc-session-123",
+                "state": {"status": "completed", "input": {}, "output": "ok"},
+            },
+            {"id": "step-2", "type": "step-finish", "sessionID": "oc-session-123"},
+        ]
+        bridge.http_client = ReattachClient([message], {})
+        _record(
+            step_part_ids=["step-1", "step-2"],
+            tool_states=["oc-session-123/call-1/completed"],
+        ).save(AgentBridge.INFLIGHT_PATH)
+
+        await bridge._reattach_inflight_prompt()
+        await asyncio.wait_for(bridge._current_prompt_task, timeout=2.0)
+
+        types = [e["type"] for e in bridge.journal.replay()]
+        assert types == ["token", "execution_complete"]
+
+    async def test_busy_prompt_keeps_streaming(self, bridge: AgentBridge):
+        client = ReattachClient(
+            [_assistant_message("Hello", False)], {"oc-session-123": {"type": "busy"}}
+        )
+        bridge.http_client = client
+        _record().save(AgentBridge.INFLIGHT_PATH)
+
+        await bridge._reattach_inflight_prompt()
+        task = bridge._current_prompt_task
+        while client.stream_calls < 1 or not bridge._event_stream_connected.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        assert not task.done()
+
+        client.feed(
+            "message.part.updated",
+            {
+                "part": {
+                    "id": "part-1",
+                    "type": "text",
+                    "messageID": "oc-msg-1",
+                    "sessionID": "oc-session-123",
+                    "text": "Hello again",
+                }
+            },
+        )
+        client.feed("session.idle", {"sessionID": "oc-session-123"})
+        await asyncio.wait_for(task, timeout=2.0)
+
+        tokens = [e for e in bridge.journal.replay() if e["type"] == "token"]
+        assert tokens[0]["content"] == "Hello again"
+
+    async def _busy_reattached_prompt(self, bridge: AgentBridge) -> asyncio.Task[None]:
+        client = ReattachClient(
+            [_assistant_message("Hello", False)], {"oc-session-123": {"type": "busy"}}
+        )
+        bridge.http_client = client
+        _record().save(AgentBridge.INFLIGHT_PATH)
+        await bridge._reattach_inflight_prompt()
+        task = bridge._current_prompt_task
+        while client.stream_calls < 1 or not bridge._event_stream_connected.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        return task
+
+    async def test_record_survives_bridge_cancelling_the_prompt(self, bridge: AgentBridge):
+        task = await self._busy_reattached_prompt(bridge)
+
+        # What the bridge's own shutdown does to running prompts
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+        record = InflightPrompt.load(AgentBridge.INFLIGHT_PATH)
+        assert record is not None
+        assert record.message_id == "cp-msg-1"
+        assert record.last_seq == bridge.journal.last_seq
+
+    async def test_stop_clears_record(self, bridge: AgentBridge):
+        task = await self._busy_reattached_prompt(bridge)
+
+        await bridge._handle_stop("cp-msg-1")
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+        assert not AgentBridge.INFLIGHT_PATH.exists()
+
+    async def test_prompt_opencode_never_saw_completes(self, bridge: AgentBridge):
+        bridge.http_client = ReattachClient([], {})
+        _record().save(AgentBridge.INFLIGHT_PATH)
+
+        await bridge._reattach_inflight_prompt()
+        await asyncio.wait_for(bridge._current_prompt_task, timeout=2.0)
+
+        events = bridge.journal.replay()
+        assert [e["type"] for e in events] == ["execution_complete"]
+        assert events[0]["seq"] == 41
+
+    async def test_record_for_other_session_is_discarded(self, bridge: AgentBridge):
+        _record(opencode_session_id="oc-session-old").save(AgentBridge.INFLIGHT_PATH)
+
+        await bridge._reattach_inflight_prompt()
+
+        assert bridge._current_prompt_task is None
+        assert not AgentBridge.INFLIGHT_PATH.exists()
+        assert bridge.journal.last_seq == 0
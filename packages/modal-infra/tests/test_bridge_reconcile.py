@@ -0,0 +1,157 @@
+"""Tests for targeted final-state reconciliation after a prompt finishes."""
+
+from typing import Any
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge, OpenCodeIdentifier
+from tests.conftest import MockResponse
+from tests.test_bridge_sse import MockHttpClient, create_sse_event
+
+SESSION_URL = "http://localhost:4096/session/oc-session-123"
+
+
+class RoutedHttpClient(MockHttpClient):
+    """MockHttpClient whose GET responses are looked up by URL."""
+
+    def __init__(self, routes: dict[str, Any] | None = None):
+        super().__init__()
+        self.routes = routes or {}
+        self.get_urls: list[str] = []
+
+    async def get(self, url: str, timeout: float = 10.0) -> Any:
+        self.get_urls.append(url)
+        return self.routes.get(url, MockResponse(404))
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.http_client = RoutedHttpClient()
+    return bridge
+
+
+@pytest.fixture
+def opencode_message_id(monkeypatch) -> str:
+    message_id = "msg_test"
+    monkeypatch.setattr(
+        OpenCodeIdentifier, "ascending", classmethod(lambda cls, prefix: message_id)
+    )
+    return message_id
+
+
+def _assistant(msg_id: str, parent_id: str, completed: bool) -> str:
+    info: dict[str, Any] = {
+        "id": msg_id,
+        "role": "assistant",
+        "sessionID": "oc-session-123",
+        "parentID": parent_id,
+        "time": {"created": 1},
+    }
+    if completed:
+        info["time"]["completed"] = 2
+    return create_sse_event("message.updated", {"info": info})
+
+
+def _text(msg_id: str, text: str, ended: bool) -> str:
+    part: dict[str, Any] = {
+        "id": f"part-{msg_id}",
+        "type": "text",
+        "sessionID": "oc-session-123",
+        "messageID": msg_id,
+        "text": text,
+        "time": {"start": 1},
+    }
+    if ended:
+        part["time"]["end"] = 2
+    return create_sse_event("message.part.updated", {"part": part})
+
+
+IDLE = create_sse_event("session.idle", {"sessionID": "oc-session-123"})
+
+
+async def _run(bridge: AgentBridge) -> list[dict]:
+    return [e async for e in bridge._stream_opencode_response_sse("cp-msg-1", "prompt")]
+
+
+class TestTargetedReconciliation:
+    async def test_skips_fetch_when_stream_saw_completed_state(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.http_client.sse_events = [
+            _assistant("oc-1", opencode_message_id, completed=False),
+            _text("oc-1", "Done.", ended=True),
+            _assistant("oc-1", opencode_message_id, completed=True),
+            IDLE,
+        ]
+
+        await _run(bridge)
+
+        assert bridge.http_client.get_urls == []
+        assert bridge.metrics.reconciles.labels("skipped").value == 1
+
+    async def test_fetches_only_incomplete_messages(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.http_client.sse_events = [
+            _assistant("oc-1", opencode_message_id, completed=False),
+            _text("oc-1", "Step one.", ended=True),
+            _assistant("oc-1", opencode_message_id, completed=True),
+            _assistant("oc-2", opencode_message_id, completed=False),
+            _text("oc-2", "Hel", ended=False),
+            IDLE,
+        ]
+        bridge.http_client.routes[f"{SESSION_URL}/message/oc-2"] = MockResponse(
+            200,
+            {
+                "info": {"id": "oc-2", "role": "assistant", "parentID": opencode_message_id},
+                "parts": [{"id": "part-oc-2", "type": "text", "text": "Hello"}],
+            },
+        )
+
+        events = await _run(bridge)
+
+        assert bridge.http_client.get_urls == [f"{SESSION_URL}/message/oc-2"]
+        assert [e["content"] for e in events if e["type"] == "token"][-1] == "Hello"
+        assert bridge.metrics.reconciles.labels("changed").value == 1
+
+    async def test_falls_back_to_recent_window_on_fetch_error(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.http_client.sse_events = [
+            _assistant("oc-1", opencode_message_id, completed=False),
+            _text("oc-1", "Hi", ended=False),
+            IDLE,
+        ]
+        window_url = f"{SESSION_URL}/message?limit={bridge.RECONCILE_RECENT_MESSAGES}"
+        bridge.http_client.routes[window_url] = MockResponse(
+            200,
+            [
+                {
+                    "info": {"id": "oc-1", "role": "assistant", "parentID": opencode_message_id},
+                    "parts": [{"id": "part-oc-1", "type": "text", "text": "Hi"}],
+                }
+            ],
+        )
+
+        await _run(bridge)
+
+        assert bridge.http_client.get_urls == [f"{SESSION_URL}/message/oc-1", window_url]
+        assert bridge.metrics.reconciles.labels("unchanged").value == 1
+
+    async def test_no_correlated_messages_scans_recent_window(self, bridge: AgentBridge):
+        events = [
+            e async for e in bridge._fetch_final_message_state("cp-msg-1", "msg_x", {}, set(), None)
+        ]
+
+        assert events == []
+        assert bridge.http_client.get_urls == [
+            f"{SESSION_URL}/message?limit={bridge.RECONCILE_RECENT_MESSAGES}"
+        ]
+        assert bridge.metrics.reconciles.labels("error").value == 1
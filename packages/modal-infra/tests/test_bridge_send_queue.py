@@ -0,0 +1,146 @@
+"""Tests for the bridge's single-writer outbound queue and event coalescing."""
+
+import asyncio
+import contextlib
+import json
+
+import pytest
+from websockets import State
+
+from src.sandbox.bridge import AgentBridge
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a websockets ClientConnection."""
+
+    def __init__(self):
+        self.state = State.OPEN
+        self.frames: list[str] = []
+
+    async def send(self, frame: str) -> None:
+        self.frames.append(frame)
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.ws = FakeWebSocket()
+    return bridge
+
+
+@contextlib.asynccontextmanager
+async def running_writer(bridge: AgentBridge):
+    task = asyncio.create_task(bridge._writer_loop(bridge.ws))
+    try:
+        yield
+        await asyncio.wait_for(bridge._outbound.join(), timeout=1.0)
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+def _token(content: str, part_id: str = "part-1", message_id: str = "m1") -> dict:
+    return {"type": "token", "content": content, "partId": part_id, "messageId": message_id}
+
+
+def _delta(delta: str, offset: int, part_id: str = "part-1") -> dict:
+    return {
+        "type": "token",
+        "delta": delta,
+        "offset": offset,
+        "partId": part_id,
+        "messageId": "m1",
+    }
+
+
+class TestCoalesceEvents:
+    def test_cumulative_tokens_keep_latest(self):
+        result = AgentBridge._coalesce_events([_token("a"), _token("ab"), _token("abc")])
+        assert result == [_token("abc")]
+
+    def test_different_parts_not_merged(self):
+        events = [_token("a", "p1"), _token("b", "p2")]
+        assert AgentBridge._coalesce_events(events) == events
+
+    def test_legacy_tokens_without_part_id_not_merged(self):
+        events = [
+            {"type": "token", "content": "first part", "messageId": "m1"},
+            {"type": "token", "content": "second", "messageId": "m1"},
+        ]
+        assert AgentBridge._coalesce_events(events) == events
+
+    def test_non_adjacent_tokens_not_merged(self):
+        events = [_token("a"), {"type": "tool_call", "callId": "c1"}, _token("ab")]
+        assert AgentBridge._coalesce_events(events) == events
+
+    def test_deltas_concatenate(self):
+        result = AgentBridge._coalesce_events([_delta("lo", 3), _delta(" wo", 5), _delta("rld", 8)])
+        assert result == [_delta("lo world", 3)]
+
+    def test_delta_appends_to_full_resync(self):
+        full = {**_token("Hel"), "offset": 0}
+        result = AgentBridge._coalesce_events([full, _delta("lo", 3)])
+        assert len(result) == 1
+        assert result[0]["content"] == "Hello"
+        assert result[0]["offset"] == 0
+        assert "delta" not in result[0]
+
+    def test_delta_gap_not_merged(self):
+        events = [_delta("lo", 3), _delta("x", 10)]
+        assert AgentBridge._coalesce_events(events) == events
+
+
+class TestWriterLoop:
+    async def test_events_sent_individually_without_batch_capability(self, bridge: AgentBridge):
+        bridge.send_coalesce_window = 0.01
+        async with running_writer(bridge):
+            await bridge._send_event({"type": "step_start", "messageId": "m1"})
+            await bridge._send_event({"type": "step_finish", "messageId": "m1"})
+
+        assert [json.loads(f)["type"] for f in bridge.ws.frames] == ["step_start", "step_finish"]
+
+    async def test_batches_into_json_array_when_negotiated(self, bridge: AgentBridge):
+        bridge.capabilities = {"event_batch"}
+        bridge.send_coalesce_window = 0.05
+        async with running_writer(bridge):
+            await bridge._send_event({"type": "step_start", "messageId": "m1"})
+            await bridge._send_event(_token("a"))
+            await bridge._send_event(_token("ab"))
+
+        assert len(bridge.ws.frames) == 1
+        batch = json.loads(bridge.ws.frames[0])
+        assert [e["type"] for e in batch] == ["step_start", "token"]
+        assert batch[1]["content"] == "ab"
+        assert all(e["sandboxId"] == "test-sandbox" for e in batch)
+
+    async def test_send_event_drops_when_socket_closed(self, bridge: AgentBridge):
+        bridge.ws.state = State.CLOSED
+        await bridge._send_event({"type": "heartbeat"})
+        assert bridge._outbound.empty()
+
+    async def test_full_queue_applies_backpressure(self, bridge: AgentBridge):
+        bridge._outbound = asyncio.Queue(maxsize=1)
+        await bridge._send_event({"type": "heartbeat"})
+
+        blocked = asyncio.create_task(bridge._send_event({"type": "heartbeat"}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        bridge._outbound.get_nowait()
+        bridge._outbound.task_done()
+        await asyncio.wait_for(blocked, timeout=1.0)
+
+    async def test_discard_outbound_empties_queue(self, bridge: AgentBridge):
+        await bridge._send_event({"type": "heartbeat"})
+        await bridge._send_event({"type": "heartbeat"})
+
+        bridge._discard_outbound()
+
+        assert bridge._outbound.empty()
+        await asyncio.wait_for(bridge._outbound.join(), timeout=1.0)
@@ -28,10 +28,10 @@ class MockSSEResponse:
         self.status_code = status_code
         self._events = events
 
-    async def aiter_text(self) -> AsyncIterator[str]:
-        """Yield SSE events as text chunks."""
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield SSE events as byte chunks."""
         for event in self._events:
-            yield event
+            yield event.encode()
             await asyncio.sleep(0)  # Allow other tasks to run
 
     async def __aenter__(self):
@@ -931,11 +931,11 @@ class DelayedMockSSEResponse:
         self.status_code = status_code
         self._events_with_delays = events_with_delays
 
-    async def aiter_text(self) -> AsyncIterator[str]:
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
         for event, delay in self._events_with_delays:
             if delay > 0:
                 await asyncio.sleep(delay)
-            yield event
+            yield event.encode()
 
     async def __aenter__(self):
         return self
@@ -951,9 +951,9 @@ class HangingMockSSEResponse:
         self.status_code = status_code
         self._initial_events = initial_events
 
-    async def aiter_text(self) -> AsyncIterator[str]:
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
         for event in self._initial_events:
-            yield event
+            yield event.encode()
             await asyncio.sleep(0)
         # Hang forever (will be interrupted by timeout)
         await asyncio.sleep(3600)
@@ -1189,7 +1189,7 @@ class TestPromptMaxDuration:
                 pass
 
         assert any(url.endswith("/stop") for url in http_client.post_urls)
-        assert any(url.endswith("/message") for url in http_client.get_urls)
+        assert any("/message?limit=" in url for url in http_client.get_urls)
 
 
 class TestSubtaskStreaming:
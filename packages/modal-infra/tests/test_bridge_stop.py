@@ -9,7 +9,7 @@ import asyncio
 import contextlib
 import json
 from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -52,9 +52,9 @@ class MockSSEResponse:
         self.status_code = status_code
         self._events = events
 
-    async def aiter_text(self):
+    async def aiter_bytes(self):
         for event in self._events:
-            yield event
+            yield event.encode()
             await asyncio.sleep(0)
 
     async def __aenter__(self):
@@ -177,13 +177,15 @@ class TestHandleStop:
         await asyncio.sleep(0)
 
     @pytest.mark.asyncio
-    async def test_older_prompt_completion_does_not_clear_newer_task(self, bridge: AgentBridge):
-        """Completing an older prompt must not clear a newer _current_prompt_task."""
+    async def test_newer_prompt_waits_for_older_to_complete(self, bridge: AgentBridge):
+        """Prompts run one at a time; a newer prompt becomes current after the older one."""
         old_can_finish = asyncio.Event()
         new_can_finish = asyncio.Event()
+        started: list[str] = []
 
-        async def fake_handle_prompt(cmd: dict[str, Any]) -> None:
+        async def fake_handle_prompt(cmd: dict[str, Any], queued: Any = None) -> None:
             message_id = cmd.get("messageId")
+            started.append(message_id)
             if message_id == "msg-old":
                 await old_can_finish.wait()
             elif message_id == "msg-new":
@@ -192,6 +194,7 @@ class TestHandleStop:
                 raise AssertionError(f"Unexpected messageId: {message_id}")
 
         bridge._handle_prompt = fake_handle_prompt
+        bridge._send_event = AsyncMock()
 
         old_task = await bridge._handle_command(
             {
@@ -210,17 +213,21 @@ class TestHandleStop:
             }
         )
         assert new_task is not None
-        assert bridge._current_prompt_task is new_task
+        await asyncio.sleep(0)
+        assert bridge._current_prompt_task is old_task
+        assert started == ["msg-old"]
 
         old_can_finish.set()
         await old_task
         await asyncio.sleep(0)
 
         assert bridge._current_prompt_task is new_task
+        assert started == ["msg-old", "msg-new"]
 
         new_can_finish.set()
         await new_task
         await asyncio.sleep(0)
+        assert bridge._current_prompt_task is None
 
     @pytest.mark.asyncio
     async def test_cancelled_task_sends_execution_complete(self, bridge: AgentBridge):
@@ -238,8 +245,8 @@ class TestHandleStop:
         class HangingSSEResponse:
             status_code = 200
 
-            async def aiter_text(self):
-                yield create_sse_event("server.connected", {})
+            async def aiter_bytes(self):
+                yield create_sse_event("server.connected", {}).encode()
                 await asyncio.sleep(3600)
 
             async def __aenter__(self):
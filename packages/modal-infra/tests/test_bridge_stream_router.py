@@ -0,0 +1,209 @@
+"""Tests for the table-driven prompt stream router."""
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge, OpenCodeIdentifier, PromptStreamState
+from src.sandbox.pending_parts import PendingParts
+from tests.conftest import MockResponse
+from tests.test_bridge_sse import MockHttpClient, create_sse_event
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.http_client = MockHttpClient()
+    return bridge
+
+
+@pytest.fixture
+def opencode_message_id(monkeypatch) -> str:
+    message_id = "msg_test"
+    monkeypatch.setattr(
+        OpenCodeIdentifier, "ascending", classmethod(lambda cls, prefix: message_id)
+    )
+    return message_id
+
+
+def _part_event(session_id: str, msg_id: str, part_type: str = "text") -> str:
+    return create_sse_event(
+        "message.part.updated",
+        {
+            "part": {
+                "id": f"part-{msg_id}",
+                "type": part_type,
+                "sessionID": session_id,
+                "messageID": msg_id,
+                "text": "x",
+            }
+        },
+    )
+
+
+class TestPromptStreamState:
+    def test_uses_slots(self):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+        with pytest.raises(AttributeError):
+            state.unexpected = True  # type: ignore[attr-defined]
+
+    def test_unreconciled_is_none_without_correlated_messages(self):
+        assert PromptStreamState("cp-msg-1", "msg_test").unreconciled_msg_ids() is None
+
+
+class TestRouting:
+    async def test_foreign_session_events_never_reach_handlers(
+        self, bridge: AgentBridge, opencode_message_id: str, monkeypatch
+    ):
+        calls: list[str] = []
+        original = bridge._sse_handlers["message.part.updated"]
+
+        def spy(state, props):
+            calls.append(props["part"]["sessionID"])
+            return original(state, props)
+
+        bridge._sse_handlers["message.part.updated"] = spy
+        bridge.http_client.sse_events = [
+            _part_event("ses-other", "oc-other"),
+            _part_event("oc-session-123", "oc-msg-1"),
+            create_sse_event("session.idle", {"sessionID": "oc-session-123"}),
+        ]
+
+        [e async for e in bridge._stream_opencode_response_sse("cp-msg-1", "prompt")]
+
+        assert calls == ["oc-session-123"]
+
+    async def test_foreign_message_updates_never_reach_handlers(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        calls: list[str] = []
+        original = bridge._sse_handlers["message.updated"]
+
+        def spy(state, props):
+            calls.append(props["info"]["sessionID"])
+            return original(state, props)
+
+        bridge._sse_handlers["message.updated"] = spy
+        info = {"id": "oc-msg-1", "role": "assistant", "parentID": opencode_message_id}
+        bridge.http_client.sse_events = [
+            create_sse_event("message.updated", {"info": {**info, "sessionID": "ses-other"}}),
+            create_sse_event("message.updated", {"info": {**info, "sessionID": "oc-session-123"}}),
+            create_sse_event("session.idle", {"sessionID": "oc-session-123"}),
+        ]
+
+        [e async for e in bridge._stream_opencode_response_sse("cp-msg-1", "prompt")]
+
+        assert calls == ["oc-session-123"]
+
+    async def test_child_text_is_not_buffered(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+        state.child_session_ids.add("child-1")
+
+        events = bridge._on_part_updated(
+            state,
+            {"part": {"type": "text", "sessionID": "child-1", "messageID": "m", "text": "x"}},
+        )
+
+        assert events == []
+        assert len(state.pending_parts) == 0
+
+    async def test_unknown_event_types_are_ignored(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.http_client.sse_events = [
+            create_sse_event("file.watcher.updated", {"file": "a.py"}),
+            create_sse_event("session.idle", {"sessionID": "oc-session-123"}),
+        ]
+
+        events = [e async for e in bridge._stream_opencode_response_sse("cp-msg-1", "prompt")]
+
+        assert events == []
+
+
+def _text_part(part_id: str, text: str, ended: bool = False) -> dict:
+    part = {
+        "id": part_id,
+        "type": "text",
+        "sessionID": "oc-session-123",
+        "messageID": "oc-1",
+        "text": text,
+        "time": {"start": 1},
+    }
+    if ended:
+        part["time"]["end"] = 2
+    return part
+
+
+class TestBoundedState:
+    def test_ended_text_part_is_evicted(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        bridge._handle_prompt_part(state, _text_part("p1", "Hello"), None)
+        assert state.text_bytes == 5
+        events = bridge._handle_prompt_part(state, _text_part("p1", "Hello world", True), None)
+
+        assert events[-1]["content"] == "Hello world"
+        assert state.cumulative_text == {}
+        assert state.text_bytes == 0
+        assert state.peak_bytes == len("Hello world")
+
+    def test_updates_after_end_are_not_resent(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+        bridge._handle_prompt_part(state, _text_part("p1", "Done.", True), None)
+
+        assert bridge._handle_prompt_part(state, _text_part("p1", "Done.", True), None) == []
+
+    def test_tool_states_deduplicated_by_stable_key(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+        part = {
+            "type": "tool",
+            "tool": "bash",
+            "callID": "call-1",
+            "sessionID": "oc-session-123",
+            "state": {"status": "running", "input": {}},
+        }
+
+        first = bridge._handle_prompt_part(state, part, None)
+        second = bridge._handle_prompt_part(state, part, None)
+
+        assert len(first) == 1
+        assert second == []
+        assert state.emitted_tool_states == {"oc-session-123/call-1/running"}
+
+    async def test_reconcile_skips_evicted_parts(self, bridge: AgentBridge):
+        bridge.http_client.get_responses = [
+            MockResponse(
+                200,
+                [
+                    {
+                        "info": {"id": "oc-1", "role": "assistant", "parentID": "msg_x"},
+                        "parts": [{"id": "part-1", "type": "text", "text": "Final text"}],
+                    }
+                ],
+            )
+        ]
+
+        events = [
+            e
+            async for e in bridge._fetch_final_message_state(
+                "cp-msg-1", "msg_x", {}, None, None, settled_part_ids={"part-1"}
+            )
+        ]
+
+        assert events == []
+
+    def test_buffered_parts_spill_instead_of_dropping(self, bridge: AgentBridge):
+        state = PromptStreamState(
+            "cp-msg-1", "msg_test", PendingParts(max_memory_bytes=64, max_spill_bytes=1 << 20)
+        )
+        for n in range(20):
+            bridge._buffer_prompt_part(state, "oc-1", _text_part(f"p{n}", "x" * 40), None)
+
+        assert state.pending_parts.spilled > 0
+        assert state.pending_parts.dropped == 0
+        assert len(state.pending_parts.pop("oc-1")) == 20
+        state.pending_parts.close()
@@ -0,0 +1,135 @@
+"""Tests for the per-prompt latency timeline."""
+
+import asyncio
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge, OpenCodeIdentifier, PromptTimeline
+from tests.conftest import MockResponse
+from tests.test_bridge_sse import MockHttpClient, create_sse_event
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.http_client = MockHttpClient()
+    return bridge
+
+
+@pytest.fixture
+def sent_events(bridge: AgentBridge) -> list[dict]:
+    sent: list[dict] = []
+
+    async def capture_send(event: dict) -> None:
+        sent.append(event)
+
+    bridge._send_event = capture_send
+    return sent
+
+
+def _turn(opencode_message_id: str) -> list[str]:
+    def part(part: dict) -> str:
+        base = {"sessionID": "oc-session-123", "messageID": "oc-1"}
+        return create_sse_event("message.part.updated", {"part": {**base, **part}})
+
+    return [
+        create_sse_event(
+            "message.updated",
+            {
+                "info": {
+                    "id": "oc-1",
+                    "role": "assistant",
+                    "sessionID": "oc-session-123",
+                    "parentID": opencode_message_id,
+                }
+            },
+        ),
+        part({"id": "p0", "type": "step-start"}),
+        part({"id": "p1", "type": "text", "text": "Hi"}),
+        part(
+            {
+                "id": "p2",
+                "type": "tool",
+                "tool": "bash",
+                "callID": "c1",
+                "state": {"status": "running", "input": {"command": "ls"}},
+            }
+        ),
+        create_sse_event("session.idle", {"sessionID": "oc-session-123"}),
+    ]
+
+
+class TestPromptTimeline:
+    def test_mark_records_first_occurrence_only(self):
+        timeline = PromptTimeline()
+
+        assert timeline.mark("first_token")
+        assert not timeline.mark("first_token")
+        assert list(timeline.marks) == ["received", "first_token"]
+
+    async def test_execution_complete_carries_ordered_milestones(
+        self, bridge: AgentBridge, sent_events: list[dict], monkeypatch
+    ):
+        monkeypatch.setattr(
+            OpenCodeIdentifier, "ascending", classmethod(lambda cls, prefix: "msg_test")
+        )
+        bridge.http_client.sse_events = _turn("msg_test")
+
+        await bridge._handle_prompt({"messageId": "cp-msg-1", "content": "hi", "model": "m"})
+
+        [complete] = [e for e in sent_events if e["type"] == "execution_complete"]
+        timeline = complete["timeline"]
+        assert list(timeline) == [
+            "received",
+            "session_ready",
+            "sse_connected",
+            "prompt_accepted",
+            "first_step_start",
+            "first_token",
+            "first_tool_call",
+            "idle",
+            "complete",
+        ]
+        assert list(timeline.values()) == sorted(timeline.values())
+        assert bridge.metrics.time_to_first_token.labels("m").count == 1
+
+    async def test_failed_prompt_still_reports_timeline(
+        self, bridge: AgentBridge, sent_events: list[dict]
+    ):
+        bridge.http_client.post_responses = [MockResponse(500, text="boom")]
+
+        await bridge._handle_prompt({"messageId": "cp-msg-1", "content": "hi"})
+
+        [complete] = [e for e in sent_events if e["type"] == "execution_complete"]
+        assert complete["success"] is False
+        assert "prompt_accepted" not in complete["timeline"]
+        assert "complete" in complete["timeline"]
+
+    async def test_prompt_waits_for_setup_script(
+        self, bridge: AgentBridge, sent_events: list[dict], monkeypatch
+    ):
+        monkeypatch.setattr(
+            OpenCodeIdentifier, "ascending", classmethod(lambda cls, prefix: "msg_test")
+        )
+        bridge.http_client.sse_events = _turn("msg_test")
+        bridge.SETUP_POLL_INTERVAL = 0.01
+        bridge.SETUP_PENDING_PATH.touch()
+
+        prompt = asyncio.create_task(
+            bridge._handle_prompt({"messageId": "cp-msg-1", "content": "hi"})
+        )
+        await asyncio.sleep(0.05)
+        assert not prompt.done()
+        assert bridge.http_client._post_call_count == 0
+
+        bridge.SETUP_PENDING_PATH.unlink()
+        await asyncio.wait_for(prompt, timeout=1.0)
+
+        [complete] = [e for e in sent_events if e["type"] == "execution_complete"]
+        assert list(complete["timeline"])[1:3] == ["session_ready", "setup_complete"]
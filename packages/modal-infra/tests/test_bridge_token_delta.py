@@ -0,0 +1,223 @@
+"""Tests for delta-encoded token streaming negotiated via the ready handshake."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge, OpenCodeIdentifier
+from tests.conftest import MockResponse
+from tests.test_bridge_sse import MockHttpClient, create_sse_event
+
+
+def _text_part(text: str, part_id: str = "part-1") -> dict:
+    return {
+        "type": "text",
+        "id": part_id,
+        "sessionID": "oc-session-123",
+        "messageID": "oc-msg-1",
+        "text": text,
+    }
+
+
+def _delta_events(opencode_message_id: str, deltas: list[str]) -> list[str]:
+    events = [
+        create_sse_event(
+            "message.updated",
+            {
+                "info": {
+                    "id": "oc-msg-1",
+                    "role": "assistant",
+                    "sessionID": "oc-session-123",
+                    "parentID": opencode_message_id,
+                }
+            },
+        )
+    ]
+    text = ""
+    for delta in deltas:
+        text += delta
+        events.append(
+            create_sse_event("message.part.updated", {"part": _text_part(text), "delta": delta})
+        )
+    events.append(create_sse_event("session.idle", {"sessionID": "oc-session-123"}))
+    return events
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.http_client = MockHttpClient()
+    return bridge
+
+
+@pytest.fixture
+def opencode_message_id(monkeypatch) -> str:
+    message_id = "msg_test"
+    monkeypatch.setattr(
+        OpenCodeIdentifier,
+        "ascending",
+        classmethod(lambda cls, prefix: message_id),
+    )
+    return message_id
+
+
+async def _collect_tokens(bridge: AgentBridge) -> list[dict]:
+    events = []
+    async for event in bridge._stream_opencode_response_sse("cp-msg-1", "Test prompt"):
+        events.append(event)
+    return [e for e in events if e["type"] == "token"]
+
+
+class TestReadyAck:
+    async def test_capabilities_empty_until_acked(self, bridge: AgentBridge):
+        assert bridge.capabilities == set()
+
+    async def test_ack_enables_supported_capabilities_only(self, bridge: AgentBridge):
+        await bridge._handle_command(
+            {"type": "ready_ack", "capabilities": ["token_delta", "teleport"]}
+        )
+        assert bridge.capabilities == {"token_delta"}
+
+    async def test_malformed_ack_enables_nothing(self, bridge: AgentBridge):
+        await bridge._handle_command({"type": "ready_ack", "capabilities": "token_delta"})
+        assert bridge.capabilities == set()
+
+
+class TestDeltaTokens:
+    async def test_legacy_mode_sends_cumulative_text(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.http_client.sse_events = _delta_events(opencode_message_id, ["Hel", "lo"])
+
+        tokens = await _collect_tokens(bridge)
+
+        assert [t["content"] for t in tokens] == ["Hel", "Hello"]
+        assert all("delta" not in t for t in tokens)
+
+    async def test_delta_mode_sends_suffix_with_offset(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.capabilities = {"token_delta"}
+        bridge.http_client.sse_events = _delta_events(opencode_message_id, ["Hel", "lo", " world"])
+
+        tokens = await _collect_tokens(bridge)
+
+        assert tokens[0] == {
+            "type": "token",
+            "content": "Hel",
+            "partId": "part-1",
+            "offset": 0,
+            "messageId": "cp-msg-1",
+        }
+        assert [(t["offset"], t["delta"]) for t in tokens[1:]] == [(3, "lo"), (5, " world")]
+
+    async def test_offsets_use_utf16_code_units(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.capabilities = {"token_delta"}
+        bridge.http_client.sse_events = _delta_events(opencode_message_id, ["a😀", "b"])
+
+        tokens = await _collect_tokens(bridge)
+
+        # The emoji is a surrogate pair in UTF-16, so "a😀" has JS length 3
+        assert tokens[1]["offset"] == 3
+        assert tokens[1]["delta"] == "b"
+
+    async def test_periodic_full_resync(
+        self, bridge: AgentBridge, opencode_message_id: str, monkeypatch
+    ):
+        monkeypatch.setattr(AgentBridge, "TOKEN_RESYNC_INTERVAL", 3)
+        bridge.capabilities = {"token_delta"}
+        bridge.http_client.sse_events = _delta_events(
+            opencode_message_id, ["a", "b", "c", "d", "e"]
+        )
+
+        tokens = await _collect_tokens(bridge)
+
+        kinds = ["full" if "content" in t else "delta" for t in tokens]
+        assert kinds == ["full", "delta", "delta", "full", "delta"]
+        assert tokens[3]["content"] == "abcd"
+
+    async def test_resync_command_resends_full_text(
+        self, bridge: AgentBridge, opencode_message_id: str
+    ):
+        bridge.capabilities = {"token_delta"}
+        await bridge._handle_command({"type": "token_resync"})
+        bridge.http_client.sse_events = _delta_events(opencode_message_id, ["Hi"])
+
+        tokens = await _collect_tokens(bridge)
+
+        assert tokens == [
+            {
+                "type": "token",
+                "content": "Hi",
+                "partId": "part-1",
+                "offset": 0,
+                "messageId": "cp-msg-1",
+            }
+        ]
+        assert bridge._token_resync_requested is False
+
+
+class TestFinalStateCorrection:
+    async def test_final_state_sends_suffix_only(self, bridge: AgentBridge):
+        bridge.capabilities = {"token_delta"}
+        bridge.http_client = AsyncMock()
+        bridge.http_client.get = AsyncMock(
+            return_value=MockResponse(
+                200,
+                [
+                    {
+                        "info": {"id": "oc-msg-1", "role": "assistant", "parentID": "msg_x"},
+                        "parts": [{"id": "part-1", "type": "text", "text": "Hello world"}],
+                    }
+                ],
+            )
+        )
+        cumulative_text = {"part-1": "Hello"}
+
+        events = [
+            e async for e in bridge._fetch_final_message_state("cp-msg-1", "msg_x", cumulative_text)
+        ]
+
+        assert events == [
+            {
+                "type": "token",
+                "delta": " world",
+                "partId": "part-1",
+                "offset": 5,
+                "messageId": "cp-msg-1",
+            }
+        ]
+        assert cumulative_text["part-1"] == "Hello world"
+
+    async def test_final_state_rewritten_text_sends_full(self, bridge: AgentBridge):
+        bridge.capabilities = {"token_delta"}
+        bridge.http_client = AsyncMock()
+        bridge.http_client.get = AsyncMock(
+            return_value=MockResponse(
+                200,
+                [
+                    {
+                        "info": {"id": "oc-msg-1", "role": "assistant", "parentID": "msg_x"},
+                        "parts": [{"id": "part-1", "type": "text", "text": "Goodbye world"}],
+                    }
+                ],
+            )
+        )
+
+        events = [
+            e
+            async for e in bridge._fetch_final_message_state(
+                "cp-msg-1", "msg_x", {"part-1": "Hello"}
+            )
+        ]
+
+        assert events[0]["content"] == "Goodbye world"
+        assert "delta" not in events[0]
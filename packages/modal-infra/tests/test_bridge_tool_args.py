@@ -0,0 +1,91 @@
+"""Tests for sending tool-call arguments once per call."""
+
+import hashlib
+
+import pytest
+
+from src.sandbox import codec
+from src.sandbox.bridge import AgentBridge, PromptStreamState
+
+WRITE_ARGS = {"filePath": "/workspace/app.py", "content": "print('hi')\n" * 100}
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.capabilities = {"tool_args_once"}
+    return bridge
+
+
+def _tool(status: str, args: dict, call_id: str = "call-1") -> dict:
+    return {
+        "type": "tool",
+        "tool": "write",
+        "callID": call_id,
+        "sessionID": "oc-session-123",
+        "messageID": "oc-1",
+        "state": {"status": status, "input": args, "output": ""},
+    }
+
+
+def _run(bridge: AgentBridge, state: PromptStreamState, *parts: dict) -> list[dict]:
+    events = []
+    for part in parts:
+        events.extend(bridge._handle_prompt_part(state, part, None))
+    return events
+
+
+class TestToolArgsOnce:
+    def test_args_sent_only_with_first_event(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(
+            bridge,
+            state,
+            _tool("pending", WRITE_ARGS),
+            _tool("running", WRITE_ARGS),
+            _tool("completed", WRITE_ARGS),
+        )
+
+        expected_hash = hashlib.sha256(codec.dumps_bytes(WRITE_ARGS)).hexdigest()[:16]
+        assert events[0]["args"] == WRITE_ARGS
+        assert ["args" in e for e in events] == [True, False, False]
+        assert {e["argsHash"] for e in events} == {expected_hash}
+        assert state.tool_args_hashes == {}
+
+    def test_changed_args_are_resent(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(
+            bridge,
+            state,
+            _tool("pending", {"filePath": "/workspace/app.py"}),
+            _tool("running", WRITE_ARGS),
+        )
+
+        assert events[1]["args"] == WRITE_ARGS
+        assert events[0]["argsHash"] != events[1]["argsHash"]
+
+    async def test_resync_command_resends_args(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+        _run(bridge, state, _tool("pending", WRITE_ARGS))
+
+        await bridge._handle_command({"type": "tool_args_resync"})
+        events = _run(bridge, state, _tool("running", WRITE_ARGS))
+
+        assert events[0]["args"] == WRITE_ARGS
+
+    def test_legacy_events_always_carry_args(self, bridge: AgentBridge):
+        bridge.capabilities = set()
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(bridge, state, _tool("pending", WRITE_ARGS), _tool("running", WRITE_ARGS))
+
+        assert [e["args"] for e in events] == [WRITE_ARGS, WRITE_ARGS]
+        assert "argsHash" not in events[0]
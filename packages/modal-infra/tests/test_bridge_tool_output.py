@@ -0,0 +1,111 @@
+"""Tests for throttled streaming of running tool output."""
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge, PromptStreamState
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.opencode_session_id = "oc-session-123"
+    bridge.capabilities = {"tool_output_stream"}
+    bridge.TOOL_OUTPUT_FLUSH_INTERVAL = 0.0
+    return bridge
+
+
+def _tool(status: str, output: str = "", call_id: str = "call-1") -> dict:
+    return {
+        "type": "tool",
+        "tool": "bash",
+        "callID": call_id,
+        "sessionID": "oc-session-123",
+        "messageID": "oc-1",
+        "state": {"status": status, "input": {"command": "make test"}, "output": output},
+    }
+
+
+def _run(bridge: AgentBridge, state: PromptStreamState, *parts: dict) -> list[dict]:
+    events = []
+    for part in parts:
+        events.extend(bridge._handle_prompt_part(state, part, None))
+    return events
+
+
+class TestToolOutputStream:
+    def test_running_updates_send_appended_output_only(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(
+            bridge,
+            state,
+            _tool("running", "a\n"),
+            _tool("running", "a\nb\n"),
+            _tool("running", "a\nb\nc\n"),
+        )
+
+        assert events[0]["type"] == "tool_call"
+        assert [(e["offset"], e["delta"]) for e in events[1:]] == [(2, "b\n"), (4, "c\n")]
+
+    def test_legacy_control_plane_sees_one_running_event(self, bridge: AgentBridge):
+        bridge.capabilities = set()
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(bridge, state, _tool("running", "a"), _tool("running", "ab"))
+
+        assert [e["type"] for e in events] == ["tool_call"]
+
+    def test_throttled_until_interval_or_size(self, bridge: AgentBridge):
+        bridge.TOOL_OUTPUT_FLUSH_INTERVAL = 60.0
+        bridge.TOOL_OUTPUT_FLUSH_CHARS = 10
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(
+            bridge,
+            state,
+            _tool("running"),
+            _tool("running", "abc"),
+            _tool("running", "abcdef"),
+            _tool("running", "abcdefghijkl"),
+        )
+
+        assert [e.get("delta") for e in events[1:]] == ["abcdefghijkl"]
+
+    def test_head_and_tail_cap(self, bridge: AgentBridge):
+        bridge.TOOL_OUTPUT_HEAD_CHARS = 4
+        bridge.TOOL_OUTPUT_TAIL_CHARS = 3
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(
+            bridge,
+            state,
+            _tool("running"),
+            _tool("running", "abcdefgh"),
+            _tool("running", "abcdefghijkl"),
+        )
+
+        first, second = events[1:]
+        assert (first["delta"], first["tail"], first["omitted"]) == ("abcd", "fgh", 1)
+        assert "delta" not in second
+        assert (second["tail"], second["omitted"]) == ("jkl", 5)
+
+    def test_rewritten_output_restarts_at_zero(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(bridge, state, _tool("running", "progress 50%"), _tool("running", "done"))
+
+        assert (events[-1]["offset"], events[-1]["delta"]) == (0, "done")
+
+    def test_completion_releases_progress(self, bridge: AgentBridge):
+        state = PromptStreamState("cp-msg-1", "msg_test")
+
+        events = _run(bridge, state, _tool("running", "a"), _tool("completed", "ab"))
+
+        assert [e["status"] for e in events] == ["running", "completed"]
+        assert events[-1]["output"] == "ab"
+        assert state.tool_outputs == {}
@@ -0,0 +1,92 @@
+"""Tests for creating and warming the OpenCode session before the bridge reports ready."""
+
+from typing import Any
+
+import httpx
+import pytest
+
+from src.sandbox.bridge import AgentBridge
+from tests.conftest import MockResponse
+
+
+class WarmupClient:
+    """Mock HTTP client recording session creation and warm-up requests."""
+
+    def __init__(self, get_status: int = 200, fail_paths: tuple[str, ...] = ()):
+        self.get_status = get_status
+        self.fail_paths = fail_paths
+        self.get_urls: list[str] = []
+        self.post_urls: list[str] = []
+
+    async def post(self, url: str, json: dict | None = None, timeout: float = 30.0) -> Any:
+        self.post_urls.append(url)
+        return MockResponse(200, {"id": "oc-session-new"})
+
+    async def get(self, url: str, timeout: float = 10.0) -> Any:
+        self.get_urls.append(url)
+        if url.endswith(self.fail_paths):
+            raise httpx.ConnectError("connection refused")
+        return MockResponse(self.get_status, {})
+
+
+@pytest.fixture
+def bridge(tmp_path) -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.session_id_file = tmp_path / "opencode-session-id"
+    bridge.http_client = WarmupClient()
+    return bridge
+
+
+class TestSessionWarmup:
+    async def test_creates_session_and_warms_opencode(self, bridge: AgentBridge):
+        await bridge._warm_opencode_session()
+
+        assert bridge.opencode_session_id == "oc-session-new"
+        assert bridge.session_id_file.read_text() == "oc-session-new"
+        assert bridge.http_client.post_urls == ["http://localhost:4096/session"]
+        assert sorted(bridge.http_client.get_urls) == sorted(
+            f"http://localhost:4096{path}" for path in AgentBridge.SESSION_WARMUP_PATHS
+        )
+        assert bridge.session_warm is True
+
+    async def test_existing_session_is_reused(self, bridge: AgentBridge):
+        bridge.opencode_session_id = "oc-session-123"
+
+        await bridge._warm_opencode_session()
+
+        assert bridge.opencode_session_id == "oc-session-123"
+        assert bridge.http_client.post_urls == []
+        assert bridge.session_warm is True
+
+    async def test_failed_warmup_request_leaves_session_cold(self, bridge: AgentBridge):
+        bridge.http_client = WarmupClient(fail_paths=("/mcp",))
+
+        await bridge._warm_opencode_session()
+
+        assert bridge.opencode_session_id == "oc-session-new"
+        assert bridge.session_warm is False
+
+    async def test_session_creation_failure_is_not_fatal(self, bridge: AgentBridge):
+        class FailingClient(WarmupClient):
+            async def post(self, url: str, json: dict | None = None, timeout: float = 30.0):
+                return MockResponse(500)
+
+        bridge.http_client = FailingClient()
+
+        await bridge._warm_opencode_session()
+
+        assert bridge.opencode_session_id is None
+        assert bridge.session_warm is False
+
+    async def test_zero_timeout_skips_warmup_requests(self, bridge: AgentBridge):
+        bridge.session_warmup_timeout = 0.0
+
+        await bridge._warm_opencode_session()
+
+        assert bridge.http_client.get_urls == []
+        assert bridge.session_warm is True
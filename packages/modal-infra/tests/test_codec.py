@@ -0,0 +1,63 @@
+"""Tests for the sandbox JSON codec and its backend fallbacks."""
+
+import importlib
+import json
+import sys
+
+import pytest
+
+from src.sandbox import codec
+
+_BACKEND_BLOCKS = {
+    "orjson": [],
+    "msgspec": ["orjson"],
+    "json": ["orjson", "msgspec"],
+}
+
+
+@pytest.fixture(params=list(_BACKEND_BLOCKS))
+def backend(request, monkeypatch):
+    """Reload the codec with faster backends hidden, restoring it afterwards."""
+    for name in _BACKEND_BLOCKS[request.param]:
+        monkeypatch.setitem(sys.modules, name, None)
+    importlib.reload(codec)
+    try:
+        if request.param != codec.BACKEND:
+            pytest.skip(f"{request.param} not installed")
+        yield codec
+    finally:
+        monkeypatch.undo()
+        importlib.reload(codec)
+
+
+class TestCodec:
+    def test_round_trip(self, backend):
+        event = {"type": "token", "content": "héllo 😀", "offset": 3, "nested": [1, None, True]}
+        assert backend.loads(backend.dumps(event)) == event
+        assert backend.loads(backend.dumps_bytes(event)) == event
+
+    def test_output_is_compact_and_stdlib_compatible(self, backend):
+        event = {"a": 1, "b": [1, 2], "c": "ü"}
+        assert json.loads(backend.dumps(event)) == event
+        assert backend.dumps(event) == '{"a":1,"b":[1,2],"c":"ü"}'
+
+    def test_loads_accepts_bytes(self, backend):
+        assert backend.loads(b'{"x": 1}') == {"x": 1}
+
+    def test_invalid_json_raises_json_decode_error(self, backend):
+        with pytest.raises(json.JSONDecodeError):
+            backend.loads("{not json")
+
+    def test_default_for_unserializable_values(self, backend):
+        class Opaque:
+            def __str__(self) -> str:
+                return "opaque"
+
+        assert backend.loads(backend.dumps({"v": Opaque()}, default=str)) == {"v": "opaque"}
+
+    def test_unserializable_without_default_raises_type_error(self, backend):
+        with pytest.raises(TypeError):
+            backend.dumps({"v": object()})
+
+    def test_big_int_falls_back_to_stdlib(self, backend):
+        assert backend.loads(backend.dumps({"v": 1 << 70})) == {"v": 1 << 70}
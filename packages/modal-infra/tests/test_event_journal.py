@@ -0,0 +1,340 @@
+"""Tests for the outbound event journal and replay across reconnects."""
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from websockets import State
+
+from src.sandbox.bridge import AgentBridge
+from src.sandbox.journal import EventJournal
+from tests.test_bridge_send_queue import FakeWebSocket, running_writer
+
+
+@pytest.fixture
+def journal(tmp_path) -> EventJournal:
+    journal = EventJournal(tmp_path / "events.journal", max_bytes=1 << 20, max_age_seconds=60)
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.send_coalesce_window = 0.0
+    yield bridge
+    bridge.journal.close()
+
+
+def _sent_events(ws: FakeWebSocket) -> list[dict]:
+    events = []
+    for frame in ws.frames:
+        decoded = json.loads(frame)
+        events.extend(decoded if isinstance(decoded, list) else [decoded])
+    return events
+
+
+class TestEventJournal:
+    def test_append_stamps_monotonic_seq(self, journal: EventJournal):
+        events = [{"type": "token", "n": i} for i in range(3)]
+        assert [journal.append(e) for e in events] == [1, 2, 3]
+        assert [e["seq"] for e in events] == [1, 2, 3]
+        assert journal.path.read_bytes().count(b"\n") == 3
+
+    def test_replay_returns_unacked_in_order(self, journal: EventJournal):
+        for i in range(5):
+            journal.append({"type": "token", "n": i})
+        journal.ack(2)
+
+        assert [e["seq"] for e in journal.replay()] == [3, 4, 5]
+        assert [e["seq"] for e in journal.replay(after_seq=4)] == [5]
+
+    def test_ack_never_moves_backwards_or_past_last_seq(self, journal: EventJournal):
+        journal.append({"type": "a"})
+        journal.ack(10)
+        assert journal.acked_seq == 1
+        journal.ack(0)
+        assert journal.acked_seq == 1
+
+    def test_size_cap_evicts_oldest(self, tmp_path):
+        journal = EventJournal(tmp_path / "j", max_bytes=200, max_age_seconds=60)
+        for i in range(10):
+            journal.append({"type": "token", "content": "x" * 40, "n": i})
+
+        assert journal.retained_bytes <= 200
+        assert journal.evicted > 0
+        assert journal.replay()[-1]["n"] == 9
+        journal.close()
+
+    def test_age_cap_evicts_stale_entries(self, journal: EventJournal, monkeypatch):
+        journal.append({"type": "old"})
+        now = time.time()
+        monkeypatch.setattr("src.sandbox.journal.time.time", lambda: now + 120)
+        journal.append({"type": "new"})
+
+        assert [e["type"] for e in journal.replay()] == ["new"]
+
+    def test_compaction_keeps_retained_entries_readable(self, journal: EventJournal, monkeypatch):
+        monkeypatch.setattr(EventJournal, "COMPACT_MIN_BYTES", 100)
+        for i in range(20):
+            journal.append({"type": "token", "n": i})
+        size_before = journal.path.stat().st_size
+
+        journal.ack(18)
+
+        assert journal.path.stat().st_size < size_before
+        assert [e["n"] for e in journal.replay()] == [18, 19]
+        journal.append({"type": "token", "n": 20})
+        assert [e["n"] for e in journal.replay()] == [18, 19, 20]
+
+
+class TestJournalRecovery:
+    def test_recover_continues_numbering_and_replays(self, tmp_path):
+        path = tmp_path / "events.journal"
+        old = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        for i in range(3):
+            old.append({"type": "token", "n": i})
+        old.close()
+
+        journal = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert journal.recover() == 3
+
+        assert journal.last_seq == 3
+        assert journal.acked_seq == 0
+        assert journal.append({"type": "token", "n": 3}) == 4
+        assert [e["n"] for e in journal.replay()] == [0, 1, 2, 3]
+        journal.close()
+
+    def test_recover_does_not_replay_acked_events(self, tmp_path):
+        path = tmp_path / "events.journal"
+        old = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        for i in range(3):
+            old.append({"type": "token", "n": i})
+        old.ack(2)
+        old.close()
+
+        journal = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert journal.recover() == 1
+
+        assert journal.acked_seq == 2
+        assert [e["n"] for e in journal.replay()] == [2]
+        journal.ack(3)
+        journal.close()
+
+        restarted = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert restarted.recover() == 0
+        assert restarted.replay() == []
+        assert restarted.append({"type": "token"}) == 4
+        restarted.close()
+
+    def test_recover_after_compaction_keeps_numbering(self, tmp_path):
+        path = tmp_path / "events.journal"
+        old = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        old.COMPACT_MIN_BYTES = 0
+        for _ in range(3):
+            old.append({"type": "token"})
+        old.ack(3)
+        old.close()
+        assert path.stat().st_size == 0
+
+        journal = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert journal.recover() == 0
+
+        assert (journal.last_seq, journal.acked_seq) == (3, 3)
+        assert journal.append({"type": "token"}) == 4
+        journal.close()
+
+    def test_fresh_spool_resets_acked_watermark(self, tmp_path):
+        path = tmp_path / "events.journal"
+        old = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        for _ in range(5):
+            old.append({"type": "token"})
+        old.ack(5)
+        old.close()
+
+        # Not recovered: numbering starts over, and so must the watermark
+        fresh = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        fresh.append({"type": "token"})
+        fresh.close()
+
+        journal = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert journal.recover() == 1
+        journal.close()
+
+    def test_recover_cuts_off_torn_line(self, tmp_path):
+        path = tmp_path / "events.journal"
+        path.write_bytes(b'{"type":"token","seq":1}\n{"type":"tok')
+
+        journal = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert journal.recover() == 1
+
+        journal.append({"type": "token"})
+        assert [e["seq"] for e in journal.replay()] == [1, 2]
+        journal.close()
+
+    def test_recover_discards_stale_spool(self, tmp_path):
+        path = tmp_path / "events.journal"
+        path.write_bytes(b'{"type":"token","seq":7}\n')
+        stale = time.time() - 120
+        os.utime(path, (stale, stale))
+
+        journal = EventJournal(path, max_bytes=1 << 20, max_age_seconds=60)
+        assert journal.recover() == 0
+
+        assert journal.append({"type": "token"}) == 1
+        journal.close()
+
+    def test_recover_without_spool(self, journal: EventJournal):
+        assert journal.recover() == 0
+        assert journal.last_seq == 0
+
+
+class TestBridgeJournal:
+    async def test_events_while_disconnected_are_journaled(self, bridge: AgentBridge):
+        await bridge._send_event({"type": "token", "content": "a", "messageId": "m1"})
+        await bridge._send_event({"type": "heartbeat"})
+
+        assert [e["type"] for e in bridge.journal.replay()] == ["token"]
+        assert bridge._outbound.empty()
+
+    async def test_ready_ack_replays_after_control_plane_last_seq(self, bridge: AgentBridge):
+        for i in range(4):
+            await bridge._send_event({"type": "tool_call", "callId": f"c{i}", "messageId": "m1"})
+        bridge.ws = FakeWebSocket()
+        bridge._replay_pending = True
+
+        async with running_writer(bridge):
+            # Live event produced before the ack must not overtake the backlog
+            await bridge._send_event({"type": "execution_complete", "messageId": "m1"})
+            await bridge._handle_command(
+                {"type": "ready_ack", "capabilities": ["event_journal"], "lastSeq": 2}
+            )
+
+        assert [e["seq"] for e in _sent_events(bridge.ws)] == [3, 4, 5]
+        assert bridge._replay_pending is False
+
+    async def test_ack_command_trims_journal(self, bridge: AgentBridge):
+        bridge.capabilities = {"event_journal"}
+        for _ in range(3):
+            await bridge._send_event({"type": "step_start", "messageId": "m1"})
+
+        await bridge._handle_command({"type": "ack", "seq": 2})
+
+        assert [e["seq"] for e in bridge.journal.replay()] == [3]
+
+    async def test_legacy_control_plane_gets_backlog_after_timeout(self, bridge: AgentBridge):
+        bridge.READY_ACK_TIMEOUT = 0.01
+        await bridge._send_event({"type": "step_start", "messageId": "m1"})
+        bridge.ws = FakeWebSocket()
+        bridge._replay_pending = True
+
+        async with running_writer(bridge):
+            await bridge._replay_after_timeout()
+
+        assert [e["type"] for e in _sent_events(bridge.ws)] == ["step_start"]
+        # Without event_journal, a completed send acknowledges the event
+        assert bridge.journal.pending == 0
+
+    async def test_late_ready_ack_does_not_replay_twice(self, bridge: AgentBridge):
+        bridge.READY_ACK_TIMEOUT = 0
+        bridge._outbound = asyncio.Queue(maxsize=1)
+        for _ in range(4):
+            await bridge._send_event({"type": "step_start", "messageId": "m1"})
+        bridge.ws = FakeWebSocket()
+        bridge._replay_pending = True
+
+        # The fallback replay blocks on the full queue when ready_ack arrives
+        bridge._replay_timeout_task = asyncio.create_task(bridge._replay_after_timeout())
+        while bridge._outbound.empty():
+            await asyncio.sleep(0)
+        ack = asyncio.create_task(bridge._handle_command({"type": "ready_ack"}))
+        await asyncio.sleep(0.01)
+        async with running_writer(bridge):
+            await asyncio.wait_for(asyncio.gather(bridge._replay_timeout_task, ack), 1.0)
+
+        assert [e["seq"] for e in _sent_events(bridge.ws)] == [1, 2, 3, 4]
+
+    async def test_ready_ack_cancels_replay_timeout(self, bridge: AgentBridge):
+        bridge._replay_timeout_task = asyncio.create_task(bridge._replay_after_timeout())
+
+        await bridge._handle_command({"type": "ready_ack"})
+        await asyncio.sleep(0)
+
+        assert bridge._replay_timeout_task.cancelled()
+
+    async def test_replay_stops_when_socket_closes(self, bridge: AgentBridge):
+        await bridge._send_event({"type": "step_start", "messageId": "m1"})
+        bridge.ws = FakeWebSocket()
+        bridge.ws.state = State.CLOSED
+        bridge._replay_pending = True
+
+        await asyncio.wait_for(bridge._resume_delivery(), timeout=1.0)
+
+        assert bridge._replay_pending is True
+        assert bridge.journal.pending == 1
+
+
+class DroppingWebSocket(FakeWebSocket):
+    """Connection that delivers the given commands and then drops."""
+
+    def __init__(self, commands: list[dict]):
+        super().__init__()
+        self.commands = commands
+        self.protocol = SimpleNamespace(extensions=[])
+
+    async def __aiter__(self):
+        for cmd in self.commands:
+            yield json.dumps(cmd)
+            await asyncio.sleep(0)
+        self.state = State.CLOSED
+
+
+class TestPromptAcrossReconnect:
+    async def test_running_prompt_survives_dropped_connection(self, bridge, monkeypatch):
+        release = asyncio.Event()
+
+        async def slow_prompt(cmd, queued=None):
+            await release.wait()
+            await bridge._send_event({"type": "execution_complete", "messageId": cmd["messageId"]})
+
+        bridge._handle_prompt = slow_prompt
+        ws = DroppingWebSocket([{"type": "prompt", "messageId": "msg-1", "content": "hi"}])
+
+        @contextlib.asynccontextmanager
+        async def connect(*args, **kwargs):
+            yield ws
+
+        monkeypatch.setattr("src.sandbox.bridge.websockets.connect", connect)
+        await bridge._connect_and_run()
+
+        [task] = bridge._prompt_tasks
+        assert bridge.ws is None and not task.done()
+
+        release.set()
+        await task
+        assert [e["type"] for e in bridge.journal.replay()][-1] == "execution_complete"
+
+    async def test_shutdown_cancels_prompt_tasks(self, bridge, monkeypatch):
+        bridge._handle_prompt = lambda cmd, queued=None: asyncio.Event().wait()
+        task = await bridge._handle_command({"type": "prompt", "messageId": "msg-1"})
+
+        async def connect_and_shut_down():
+            bridge.shutdown_event.set()
+
+        monkeypatch.setattr(bridge, "_connect_and_run", connect_and_shut_down)
+        monkeypatch.setattr(bridge, "_warm_opencode_session", lambda: asyncio.sleep(0))
+        monkeypatch.setattr(bridge, "_reattach_inflight_prompt", lambda: asyncio.sleep(0))
+        monkeypatch.setattr(bridge, "_event_stream_loop", lambda: asyncio.sleep(0))
+        monkeypatch.setattr(bridge, "_start_metrics_server", lambda: asyncio.sleep(0))
+        await bridge.run()
+
+        assert task.cancelled()
@@ -0,0 +1,190 @@
+"""Tests for narrow git fetches during sandbox sync."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.sandbox.entrypoint import SandboxSupervisor
+from src.sandbox.fetch_plan import (
+    SHALLOW_FETCH_DEPTH,
+    FetchPlan,
+    current_branch,
+    fetch_stats,
+    pack_files,
+    plan_fetch,
+)
+from tests.test_git_mirror import _commit, _git
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git("init", "-q", "-b", "main", str(repo))
+    _commit(repo, "README.md")
+    _git("branch", "feature", cwd=repo)
+    _git("branch", "unrelated", cwd=repo)
+    _git("tag", "v1", cwd=repo)
+    return repo
+
+
+@pytest.fixture
+def clone(upstream, tmp_path):
+    repo = tmp_path / "clone"
+    _git("clone", "-q", "--depth", "1", f"file://{upstream}", str(repo))
+    return repo
+
+
+class TestPlanFetch:
+    def test_shallow_clone_fetches_tracked_branch_without_depth(self, clone):
+        [plan] = plan_fetch(clone, "main")
+
+        assert plan == FetchPlan(("main",), None)
+        assert plan.args() == [
+            "-c",
+            "fetch.unpackLimit=1",
+            "fetch",
+            "--no-tags",
+            "--progress",
+            "origin",
+            "+refs/heads/main:refs/remotes/origin/main",
+        ]
+
+    def test_shallow_clone_bounds_untracked_base_branch(self, clone):
+        tracked, untracked = plan_fetch(clone, "feature")
+
+        assert tracked == FetchPlan(("main",), None)
+        assert untracked == FetchPlan(("feature",), SHALLOW_FETCH_DEPTH)
+        assert f"--depth={SHALLOW_FETCH_DEPTH}" in untracked.args()
+
+    def test_tracked_and_untracked_branches_are_fetched_separately(self, clone):
+        _git("checkout", "-q", "-b", "unrelated", cwd=clone)
+        _git("fetch", "-q", "origin", "unrelated:refs/remotes/origin/unrelated", cwd=clone)
+
+        assert plan_fetch(clone, "feature") == [
+            FetchPlan(("unrelated",), None),
+            FetchPlan(("feature",), SHALLOW_FETCH_DEPTH),
+        ]
+
+    def test_full_clone_fetches_without_depth(self, upstream, tmp_path):
+        repo = tmp_path / "full"
+        _git("clone", "-q", str(upstream), str(repo))
+
+        assert plan_fetch(repo, "feature") == [FetchPlan(("feature", "main"), None)]
+
+    def test_working_branch_included_once_origin_knows_it(self, clone):
+        _git("checkout", "-q", "-b", "feature", cwd=clone)
+        assert [p.branches for p in plan_fetch(clone, "main")] == [("main",)]
+
+        _git("fetch", "-q", "origin", "feature:refs/remotes/origin/feature", cwd=clone)
+        assert [p.branches for p in plan_fetch(clone, "main")] == [("main", "feature")]
+
+        _git("pack-refs", "--all", cwd=clone)
+        assert [p.branches for p in plan_fetch(clone, "main")] == [("main", "feature")]
+
+    def test_detached_head_has_no_working_branch(self, clone):
+        _git("checkout", "-q", "--detach", cwd=clone)
+
+        assert current_branch(clone) is None
+        assert [p.branches for p in plan_fetch(clone, "main")] == [("main",)]
+
+
+class TestFetchStats:
+    def test_counts_server_objects_and_new_pack_bytes(self, clone):
+        packs_before = pack_files(clone)
+        pack_dir = clone / ".git" / "objects" / "pack"
+        (pack_dir / "pack-new.pack").write_bytes(b"x" * 320)
+        stderr = (
+            "remote: Enumerating objects: 4, done.\n"
+            "remote: Counting objects:  50% (2/4)\r"
+            "remote: Total 3 (delta 1), reused 0 (delta 0), pack-reused 0\n"
+        )
+
+        assert fetch_stats(clone, packs_before, stderr) == (3, 320)
+
+    def test_no_op_fetch_is_zero(self, clone):
+        assert fetch_stats(clone, pack_files(clone), "") == (0, 0)
+
+
+class TestSupervisorFetch:
+    def _make_supervisor(self, repo, branch="main") -> SandboxSupervisor:
+        with patch.dict("os.environ", {"REPO_OWNER": "acme", "REPO_NAME": "app"}):
+            sup = SandboxSupervisor()
+        sup.repo_path = repo
+        sup.session_config = {"branch": branch}
+        return sup
+
+    async def test_fetches_only_session_branch_without_tags(self, upstream, clone):
+        _commit(upstream, "CHANGELOG.md")
+        _git("tag", "v2", cwd=upstream)
+        sup = self._make_supervisor(clone)
+
+        stats = await sup._fetch_session_branches()
+
+        assert stats is not None and stats.objects > 0 and stats.bytes > 0
+        assert sup.fetch_stats == stats
+        assert _git("rev-parse", "origin/main", cwd=clone) == _git(
+            "rev-parse", "HEAD", cwd=upstream
+        )
+        remote_refs = _git("for-each-ref", "--format=%(refname)", cwd=clone).splitlines()
+        assert "refs/remotes/origin/unrelated" not in remote_refs
+        assert "refs/tags/v2" not in remote_refs
+
+    async def test_unchanged_upstream_transfers_nothing(self, upstream, tmp_path):
+        for n in range(30):
+            _commit(upstream, f"file-{n}.txt")
+        clone = tmp_path / "deep-upstream-clone"
+        _git("clone", "-q", "--depth", "1", f"file://{upstream}", str(clone))
+        sup = self._make_supervisor(clone)
+
+        assert await sup._fetch_session_branches() == (0, 0)
+        assert _git("rev-list", "--count", "HEAD", cwd=clone) == "1"
+
+    async def test_new_commits_stay_connected_to_shallow_history(self, upstream, clone):
+        for n in range(3):
+            _commit(upstream, f"file-{n}.txt")
+        sup = self._make_supervisor(clone)
+
+        await sup._fetch_session_branches()
+
+        assert _git("rev-list", "--count", "HEAD..origin/main", cwd=clone) == "3"
+        assert _git("rev-list", "--count", "origin/main", cwd=clone) == "4"
+
+    async def test_null_branch_defaults_to_main(self, clone):
+        sup = self._make_supervisor(clone, branch=None)
+
+        assert await sup._fetch_session_branches() == (0, 0)
+
+    async def test_failed_fetch_returns_none(self, clone):
+        sup = self._make_supervisor(clone, branch="does-not-exist")
+
+        assert await sup._fetch_session_branches() is None
+
+    async def test_restored_snapshot_checks_freshness_in_background(self, clone):
+        sup = self._make_supervisor(clone)
+        released = asyncio.Event()
+
+        async def slow_check():
+            await released.wait()
+
+        sup._quick_git_fetch = slow_check
+
+        assert await sup._sync_restored_snapshot() is True
+        assert sup.git_sync_complete.is_set()
+        assert not sup._freshness_task.done()
+        assert _git("remote", "get-url", "origin", cwd=clone) == "https://github.com/acme/app.git"
+
+        released.set()
+        await sup._freshness_task
+
+    async def test_quick_fetch_reports_commits_behind(self, upstream, clone):
+        _commit(upstream, "CHANGELOG.md")
+        sup = self._make_supervisor(clone)
+
+        with patch.object(sup.log, "info") as log_info:
+            await sup._quick_git_fetch()
+
+        status = [c for c in log_info.call_args_list if c.args[0] == "git.snapshot_status"]
+        assert status[0].kwargs["commits_behind"] == 1
+        assert status[0].kwargs["fetch_objects"] > 0
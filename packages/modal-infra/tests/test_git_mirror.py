@@ -0,0 +1,175 @@
+"""Tests for the per-repository git mirrors used to speed up clones."""
+
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.sandbox.entrypoint import SandboxSupervisor
+from src.sandbox.git_mirror import mirror_clone_url, mirror_path, refresh_mirror
+from src.sandbox.manager import GIT_MIRROR_MOUNT, SandboxConfig, SandboxManager
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def _git(*args: str, cwd=None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True, env=GIT_ENV
+    ).stdout.strip()
+
+
+def _commit(repo, name: str) -> str:
+    (repo / name).write_text(name)
+    _git("add", name, cwd=repo)
+    _git("-c", "commit.gpgsign=false", "commit", "-q", "-m", name, cwd=repo)
+    return _git("rev-parse", "HEAD", cwd=repo)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git("init", "-q", "-b", "main", str(repo))
+    _commit(repo, "README.md")
+    return repo
+
+
+class TestRefreshMirror:
+    def test_creates_bare_mirror(self, upstream, tmp_path):
+        root = tmp_path / "mirrors"
+
+        refresh = refresh_mirror("Acme", "App", str(upstream), root=root)
+
+        assert refresh.created is True
+        assert refresh.path == root / "acme" / "app.git"
+        assert _git("rev-parse", "--is-bare-repository", cwd=refresh.path) == "true"
+        assert _git("rev-parse", "HEAD", cwd=refresh.path) == _git(
+            "rev-parse", "HEAD", cwd=upstream
+        )
+        # Only the mirror itself is left behind, no staging directories
+        assert [p.name for p in (root / "acme").iterdir()] == ["app.git"]
+
+    def test_incremental_refresh_picks_up_new_commits(self, upstream, tmp_path):
+        root = tmp_path / "mirrors"
+        refresh_mirror("acme", "app", str(upstream), root=root)
+        head = _commit(upstream, "CHANGELOG.md")
+
+        refresh = refresh_mirror("acme", "app", str(upstream), root=root)
+
+        assert refresh.created is False
+        assert _git("rev-parse", "refs/heads/main", cwd=refresh.path) == head
+
+    def test_clone_url_is_not_stored(self, upstream, tmp_path):
+        refresh = refresh_mirror("acme", "app", str(upstream), root=tmp_path / "mirrors")
+
+        config = (refresh.path / "config").read_text()
+        assert "remote" not in config
+        assert str(upstream) not in config
+
+    def test_failed_fetch_leaves_no_mirror(self, tmp_path):
+        root = tmp_path / "mirrors"
+
+        with pytest.raises(subprocess.CalledProcessError):
+            refresh_mirror("acme", "app", str(tmp_path / "missing"), root=root)
+
+        assert list((root / "acme").iterdir()) == []
+
+
+class TestCloneFromMirror:
+    def _make_supervisor(self, tmp_path) -> SandboxSupervisor:
+        with patch.dict("os.environ", {"REPO_OWNER": "acme", "REPO_NAME": "app"}):
+            sup = SandboxSupervisor()
+        sup.repo_path = tmp_path / "workspace" / "app"
+        return sup
+
+    async def test_shallow_clone_owns_its_objects(self, upstream, tmp_path):
+        _commit(upstream, "CHANGELOG.md")
+        mirror = refresh_mirror("acme", "app", str(upstream), root=tmp_path / "mirrors").path
+        sup = self._make_supervisor(tmp_path)
+
+        assert await sup._clone_from_mirror(mirror) is True
+
+        assert (sup.repo_path / "CHANGELOG.md").exists()
+        assert _git("rev-list", "--count", "HEAD", cwd=sup.repo_path) == "1"
+        assert not (sup.repo_path / ".git" / "objects" / "info" / "alternates").exists()
+        assert _git("remote", "get-url", "origin", cwd=sup.repo_path) == mirror_clone_url(mirror)
+
+    async def test_missing_mirror_falls_back(self, tmp_path):
+        sup = self._make_supervisor(tmp_path)
+
+        assert await sup._clone_from_mirror(tmp_path / "mirrors" / "acme" / "app.git") is False
+        assert not sup.repo_path.exists()
+
+    async def test_failed_clone_removes_partial_checkout(self, tmp_path):
+        broken = tmp_path / "broken.git"
+        broken.mkdir()
+        sup = self._make_supervisor(tmp_path)
+
+        assert await sup._clone_from_mirror(broken) is False
+        assert not sup.repo_path.exists()
+
+
+class TestSandboxMirrorMount:
+    @pytest.fixture
+    def mirror_root(self, monkeypatch, tmp_path):
+        root = tmp_path / "data" / "git-mirrors"
+        monkeypatch.setattr("src.sandbox.manager.MIRROR_ROOT", root)
+        return root
+
+    @pytest.fixture
+    def data_volume(self, monkeypatch):
+        volume = MagicMock()
+        monkeypatch.setattr("src.sandbox.manager.inspect_volume", volume)
+        return volume
+
+    async def _create(self, monkeypatch) -> dict:
+        captured = {}
+
+        def fake_create(*args, **kwargs):
+            captured.update(kwargs)
+
+            class FakeSandbox:
+                object_id = "obj-123"
+                stdout = None
+
+            return FakeSandbox()
+
+        monkeypatch.setattr("src.sandbox.manager.modal.Sandbox.create", fake_create)
+        await SandboxManager().create_sandbox(SandboxConfig(repo_owner="Acme", repo_name="App"))
+        return captured
+
+    async def test_mounts_only_this_repos_mirror(self, monkeypatch, mirror_root, data_volume):
+        for owner, name in (("acme", "app"), ("other", "private")):
+            mirror_path(owner, name, mirror_root).mkdir(parents=True)
+
+        captured = await self._create(monkeypatch)
+
+        # The sandbox sees acme/app.git, read-only, and nothing above or beside it
+        data_volume.with_mount_options.assert_called_once_with(
+            read_only=True, sub_path="/git-mirrors/acme/app.git"
+        )
+        mounted = [
+            path
+            for path, volume in captured["volumes"].items()
+            if volume is data_volume or volume is data_volume.with_mount_options.return_value
+        ]
+        assert mounted == [GIT_MIRROR_MOUNT]
+        assert captured["env"]["GIT_MIRROR_PATH"] == GIT_MIRROR_MOUNT
+
+    async def test_no_mount_without_mirror(self, monkeypatch, mirror_root, data_volume):
+        mirror_path("other", "private", mirror_root).mkdir(parents=True)
+
+        captured = await self._create(monkeypatch)
+
+        data_volume.with_mount_options.assert_not_called()
+        assert data_volume not in captured["volumes"].values()
+        assert "GIT_MIRROR_PATH" not in captured["env"]
+
+
+def test_mirror_path_is_case_insensitive(tmp_path):
+    assert mirror_path("Acme", "WebApp", tmp_path) == mirror_path("acme", "webapp", tmp_path)
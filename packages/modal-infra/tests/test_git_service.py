@@ -0,0 +1,115 @@
+"""Tests for the bridge's asynchronous git service."""
+
+import asyncio
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge
+from src.sandbox.git import GitCommandError, GitService
+from src.sandbox.log_config import get_logger
+from src.sandbox.types import GitUser
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    return tmp_path
+
+
+@pytest.fixture
+def git(workspace) -> GitService:
+    return GitService(workspace, get_logger("test"))
+
+
+def _config(workspace, key: str) -> str:
+    return subprocess.run(
+        ["git", "config", "--local", key],
+        cwd=workspace / "repo",
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+class TestGitService:
+    async def test_discovers_repository_once(self, git: GitService, workspace):
+        assert git.repo_dir == workspace / "repo"
+        with patch.object(type(workspace), "glob", side_effect=AssertionError("re-globbed")):
+            assert git.repo_dir == workspace / "repo"
+
+    async def test_no_repository(self, tmp_path):
+        git = GitService(tmp_path, get_logger("test"))
+
+        assert git.repo_dir is None
+        assert await git.set_identity(GitUser(name="A", email="a@example.com")) is False
+        with pytest.raises(FileNotFoundError):
+            await git.run("status")
+
+    async def test_set_identity_writes_config(self, git: GitService, workspace):
+        changed = await git.set_identity(GitUser(name="Ada", email="ada@example.com"))
+
+        assert changed
+        assert _config(workspace, "user.name") == "Ada"
+        assert _config(workspace, "user.email") == "ada@example.com"
+
+    async def test_unchanged_identity_runs_no_git(self, git: GitService):
+        user = GitUser(name="Ada", email="ada@example.com")
+        await git.set_identity(user)
+
+        with patch("asyncio.create_subprocess_exec", side_effect=AssertionError("ran git")):
+            assert await git.set_identity(user) is False
+
+    async def test_only_changed_keys_are_written(self, git: GitService, workspace):
+        subprocess.run(
+            ["git", "config", "--local", "user.email", "ada@example.com"],
+            cwd=workspace / "repo",
+            check=True,
+        )
+        calls: list[tuple] = []
+        real_exec = asyncio.create_subprocess_exec
+
+        async def spy(*args, **kwargs):
+            calls.append(args)
+            return await real_exec(*args, **kwargs)
+
+        with patch("asyncio.create_subprocess_exec", side_effect=spy):
+            await git.set_identity(GitUser(name="Ada", email="ada@example.com"))
+
+        writes = [c for c in calls if "--get-regexp" not in c]
+        assert writes == [("git", "config", "--local", "user.name", "Ada")]
+
+    async def test_failed_command_raises(self, git: GitService):
+        with pytest.raises(GitCommandError) as exc_info:
+            await git.run("rev-parse", "--verify", "does-not-exist")
+
+        assert exc_info.value.returncode != 0
+
+    async def test_timeout_kills_process(self, git: GitService):
+        with pytest.raises(GitCommandError) as exc_info:
+            await git.run("-c", "alias.hang=!sleep 5", "hang", timeout=0.1)
+
+        assert exc_info.value.returncode is None
+
+
+class TestBridgeGit:
+    async def test_push_without_repository_reports_error(self, tmp_path):
+        bridge = AgentBridge(
+            sandbox_id="test-sandbox",
+            session_id="test-session",
+            control_plane_url="http://localhost:8787",
+            auth_token="test-token",
+        )
+        bridge.git = GitService(tmp_path, bridge.log)
+        sent: list[dict] = []
+
+        async def capture_send(event: dict) -> None:
+            sent.append(event)
+
+        bridge._send_event = capture_send
+
+        await bridge._handle_push({"pushSpec": {"targetBranch": "main"}})
+
+        assert sent == [{"type": "push_error", "error": "No repository found"}]
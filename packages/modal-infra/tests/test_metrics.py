@@ -0,0 +1,111 @@
+"""Tests for the bridge metrics registry and its scrape endpoint."""
+
+import asyncio
+
+import pytest
+
+from src.sandbox.bridge import AgentBridge
+from src.sandbox.metrics import MetricsRegistry, serve_metrics
+from tests.test_bridge_send_queue import FakeWebSocket, running_writer
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+class TestRegistry:
+    def test_counter_and_labeled_counter_render(self, registry: MetricsRegistry):
+        frames = registry.counter("frames_total", "Frames sent")
+        events = registry.counter("events_total", "Events", label="type")
+        frames.inc()
+        frames.inc(2)
+        events.labels("session.idle").inc()
+        events.labels('we"ird').inc()
+
+        text = registry.render()
+
+        assert "# TYPE frames_total counter" in text
+        assert "frames_total 3" in text
+        assert 'events_total{type="session.idle"} 1' in text
+        assert 'events_total{type="we\\"ird"} 1' in text
+
+    def test_labels_returns_cached_series(self, registry: MetricsRegistry):
+        events = registry.counter("events_total", "Events", label="type")
+
+        assert events.labels("a") is events.labels("a")
+
+    def test_histogram_buckets_are_cumulative(self, registry: MetricsRegistry):
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        text = registry.render()
+
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_count 4" in text
+        assert "latency_seconds_sum 3.65" in text
+
+    def test_summary(self, registry: MetricsRegistry):
+        registry.gauge("depth", "Queue depth").set(7)
+        registry.histogram("duration_seconds", "Duration", label="model").labels("m").observe(2)
+        registry.counter("unused_total", "Never touched", label="kind")
+
+        assert registry.summary() == {
+            "depth": 7,
+            "duration_seconds": {"m": {"count": 1, "sum": 2}},
+        }
+
+    def test_duplicate_names_rejected(self, registry: MetricsRegistry):
+        registry.counter("frames_total", "Frames")
+        with pytest.raises(ValueError):
+            registry.gauge("frames_total", "Frames")
+
+
+class TestEndpoint:
+    async def test_serves_metrics_and_404s_other_paths(self, registry: MetricsRegistry):
+        registry.counter("frames_total", "Frames").inc()
+        server = await serve_metrics(registry, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def fetch(path: str) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+        try:
+            ok = await fetch("/metrics")
+            missing = await fetch("/")
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        assert ok.startswith(b"HTTP/1.0 200 OK")
+        assert b"frames_total 1" in ok
+        assert missing.startswith(b"HTTP/1.0 404")
+
+
+class TestBridgeMetrics:
+    async def test_writer_counts_frames_and_bytes(self):
+        bridge = AgentBridge(
+            sandbox_id="test-sandbox",
+            session_id="test-session",
+            control_plane_url="http://localhost:8787",
+            auth_token="test-token",
+        )
+        bridge.ws = FakeWebSocket()
+        bridge.send_coalesce_window = 0.0
+
+        async with running_writer(bridge):
+            await bridge._send_event({"type": "token", "content": "hi", "messageId": "m1"})
+
+        metrics = bridge.metrics
+        assert metrics.ws_frames_sent.value == 1
+        assert metrics.ws_bytes_sent.value == len(bridge.ws.frames[0])
+        assert metrics.send_latency.count == 1
+        bridge.journal.close()
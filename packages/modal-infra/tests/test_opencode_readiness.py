@@ -0,0 +1,131 @@
+"""Tests for detecting OpenCode readiness after the server process is spawned."""
+
+import asyncio
+import os
+import time
+from typing import Any, ClassVar
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from src.sandbox.entrypoint import SandboxSupervisor
+from tests.conftest import MockResponse
+
+
+def _make_supervisor() -> SandboxSupervisor:
+    with patch.dict("os.environ", {"SANDBOX_ID": "test-sandbox", "REPO_NAME": "app"}):
+        sup = SandboxSupervisor()
+    sup.opencode_process = MagicMock(returncode=None)
+    return sup
+
+
+class HealthClient:
+    """Stand-in for httpx.AsyncClient: refuses connections until healthy is set."""
+
+    instances: ClassVar[list["HealthClient"]] = []
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.healthy = False
+        self.probes = 0
+        HealthClient.instances.append(self)
+
+    async def __aenter__(self) -> "HealthClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        pass
+
+    async def get(self, url: str, timeout: float = 2.0) -> Any:
+        self.probes += 1
+        if not self.healthy:
+            raise httpx.ConnectError("connection refused")
+        return MockResponse(200, {"healthy": True})
+
+
+@pytest.fixture
+def health_client():
+    HealthClient.instances = []
+    with patch("src.sandbox.entrypoint.httpx.AsyncClient", HealthClient):
+        yield HealthClient
+
+
+class TestWaitForHealth:
+    async def test_probes_back_off_on_one_client(self, health_client):
+        sup = _make_supervisor()
+
+        async def become_healthy():
+            await asyncio.sleep(0.05)
+            health_client.instances[0].healthy = True
+
+        asyncio.create_task(become_healthy())
+        started = time.monotonic()
+        detected_by = await sup._wait_for_health()
+
+        assert detected_by == "probe"
+        assert len(health_client.instances) == 1
+        # 5ms doubling: a handful of probes, not one every 500ms
+        assert 3 <= health_client.instances[0].probes <= 8
+        assert time.monotonic() - started < 0.25
+
+    async def test_listening_line_triggers_immediate_probe(self, health_client):
+        sup = _make_supervisor()
+        sup.HEALTH_PROBE_INITIAL_INTERVAL = sup.HEALTH_PROBE_MAX_INTERVAL = 10.0
+
+        async def announce():
+            await asyncio.sleep(0.02)
+            health_client.instances[0].healthy = True
+            sup.opencode_listening.set()
+
+        asyncio.create_task(announce())
+        detected_by = await asyncio.wait_for(sup._wait_for_health(), timeout=1.0)
+
+        assert detected_by == "log"
+        assert health_client.instances[0].probes == 2
+
+    async def test_exited_process_fails_fast(self, health_client):
+        sup = _make_supervisor()
+        sup.opencode_process = MagicMock(returncode=1)
+
+        with pytest.raises(RuntimeError, match="exited with code 1"):
+            await asyncio.wait_for(sup._wait_for_health(), timeout=1.0)
+
+    async def test_times_out(self, health_client):
+        sup = _make_supervisor()
+
+        with (
+            patch.dict("os.environ", {"OPENCODE_HEALTH_TIMEOUT_SECONDS": "0.05"}),
+            pytest.raises(RuntimeError, match=r"within 0\.05s"),
+        ):
+            await sup._wait_for_health()
+
+
+class TestHealthCheckTimeout:
+    def test_default(self):
+        sup = _make_supervisor()
+        with patch.dict("os.environ"):
+            os.environ.pop("OPENCODE_HEALTH_TIMEOUT_SECONDS", None)
+            assert sup._health_check_timeout() == SandboxSupervisor.HEALTH_CHECK_TIMEOUT
+
+    @pytest.mark.parametrize(
+        ("value", "expected"), [("5", 5.0), ("not_a_number", 30.0), ("0", 30.0)]
+    )
+    def test_from_environment(self, value, expected):
+        sup = _make_supervisor()
+        with patch.dict("os.environ", {"OPENCODE_HEALTH_TIMEOUT_SECONDS": value}):
+            assert sup._health_check_timeout() == expected
+
+
+class TestListeningLine:
+    async def test_log_forwarder_sets_listening(self, capsys):
+        sup = _make_supervisor()
+        stdout = asyncio.StreamReader()
+        stdout.feed_data(b"INFO  starting\n")
+        stdout.feed_data(b"opencode server listening on http://0.0.0.0:4096\n")
+        stdout.feed_eof()
+        sup.opencode_process = MagicMock(returncode=None, stdout=stdout)
+
+        await sup._forward_opencode_logs()
+
+        assert sup.opencode_listening.is_set()
+        assert "[opencode] opencode server listening on" in capsys.readouterr().out
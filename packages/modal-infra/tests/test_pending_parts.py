@@ -0,0 +1,52 @@
+"""Tests for the byte-bounded buffer of uncorrelated prompt parts."""
+
+import pytest
+
+from src.sandbox.pending_parts import PendingParts
+
+
+def _part(msg_id: str, n: int, size: int = 10) -> dict:
+    return {"id": f"part-{n}", "type": "tool", "messageID": msg_id, "output": "x" * size}
+
+
+@pytest.fixture
+def pending() -> PendingParts:
+    pending = PendingParts(max_memory_bytes=300, max_spill_bytes=1000)
+    yield pending
+    pending.close()
+
+
+class TestPendingParts:
+    def test_pop_returns_parts_in_arrival_order(self, pending: PendingParts):
+        pending.add("m1", _part("m1", 1), None)
+        pending.add("m2", _part("m2", 2), "d")
+        pending.add("m1", _part("m1", 3), None)
+
+        assert [p["id"] for p, _ in pending.pop("m1")] == ["part-1", "part-3"]
+        assert pending.pop("m2") == [(_part("m2", 2), "d")]
+        assert len(pending) == 0
+        assert pending.memory_bytes == 0
+
+    def test_spills_past_memory_budget_and_keeps_order(self, pending: PendingParts):
+        for n in range(6):
+            assert pending.add("m1", _part("m1", n, size=60), None)
+
+        assert pending.spilled > 0
+        assert pending.memory_bytes <= pending.max_memory_bytes
+        assert [p["id"] for p, _ in pending.pop("m1")] == [f"part-{n}" for n in range(6)]
+
+    def test_drops_only_once_spill_budget_is_spent(self, pending: PendingParts):
+        results = [pending.add("m1", _part("m1", n, size=200), None) for n in range(8)]
+
+        accepted = results.index(False)
+        assert accepted > 1
+        assert results[accepted:] == [False] * (8 - accepted)
+        assert pending.dropped == results.count(False)
+        assert len(pending.pop("m1")) == results.count(True)
+
+    def test_spill_space_is_reclaimed_when_drained(self, pending: PendingParts):
+        accepted = sum(pending.add("m1", _part("m1", n, size=200), None) for n in range(8))
+        pending.pop("m1")
+
+        for n in range(accepted):
+            assert pending.add("m2", _part("m2", n, size=200), None)
@@ -0,0 +1,403 @@
+"""Tests for caching setup script results on the data volume."""
+
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.sandbox.entrypoint import SandboxSupervisor
+from src.sandbox.log_config import get_logger
+from src.sandbox.manager import SETUP_CACHE_MOUNT, SandboxConfig, SandboxManager
+from src.sandbox.setup_cache import SetupCache, cache_dir, inputs_fingerprint
+from src.scheduler.image_builder import _setup_cache_stale
+from tests.test_git_mirror import _commit, _git
+from tests.test_setup_script import _create_setup_script, _make_supervisor
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "app"
+    _create_setup_script(repo, "#!/bin/bash\nnpm ci\n")
+    (repo / "package-lock.json").write_text('{"lockfileVersion": 3}')
+    return repo
+
+
+@pytest.fixture
+def cache(tmp_path) -> SetupCache:
+    root = cache_dir("acme", "app", tmp_path / "setup-cache")
+    root.mkdir(parents=True)
+    return SetupCache(root, get_logger("test"))
+
+
+def _script(repo):
+    return repo / SandboxSupervisor.SETUP_SCRIPT_PATH
+
+
+class TestCacheKey:
+    def test_stable_for_unchanged_inputs(self, cache, repo):
+        assert cache.key(repo, _script(repo)) == cache.key(repo, _script(repo))
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda repo: (repo / "package-lock.json").write_text('{"lockfileVersion": 2}'),
+            lambda repo: (repo / "uv.lock").write_text("version = 1"),
+            lambda repo: _script(repo).write_text("#!/bin/bash\nnpm install\n"),
+            lambda repo: (repo / ".openinspect" / "cache-paths").write_text("build\n"),
+        ],
+    )
+    def test_changes_with_inputs(self, cache, repo, change):
+        before = cache.key(repo, _script(repo))
+        change(repo)
+        assert cache.key(repo, _script(repo)) != before
+
+    def test_changes_with_base_image(self, cache, repo):
+        with patch.dict(os.environ, {"SANDBOX_VERSION": "v40"}):
+            before = cache.key(repo, _script(repo))
+        with patch.dict(os.environ, {"SANDBOX_VERSION": "v41"}):
+            assert cache.key(repo, _script(repo)) != before
+
+
+def test_cache_dir_is_per_owner_and_repo(tmp_path):
+    assert cache_dir("Acme", "App", tmp_path) == tmp_path / "acme" / "app"
+    assert cache_dir("acme", "app", tmp_path) != cache_dir("other", "app", tmp_path)
+
+
+class TestArtifactPaths:
+    def test_only_paths_inside_the_checkout(self, cache, repo, tmp_path):
+        (repo / "node_modules").mkdir()
+        (repo / "build").mkdir()
+        (tmp_path / "global-cache").mkdir()
+        (repo / "escape").symlink_to(tmp_path / "global-cache")
+        (repo / ".openinspect" / "cache-paths").write_text(
+            f"# comment\nbuild\n{tmp_path / 'global-cache'}\n../global-cache\n"
+            "escape\nmissing\n.\n..\n"
+        )
+
+        assert cache.artifact_paths(repo) == [Path("node_modules"), Path("build")]
+
+    def test_opt_in_with_cache_paths_file(self, cache, repo):
+        assert cache.enabled(repo) is False
+
+        (repo / ".openinspect" / "cache-paths").write_text("")
+
+        assert cache.enabled(repo) is True
+
+
+class TestRestoreAndPublish:
+    async def test_round_trip(self, cache, repo):
+        (repo / "node_modules" / "left-pad").mkdir(parents=True)
+        (repo / "node_modules" / "left-pad" / "index.js").write_text("module.exports = 1")
+        (repo / ".venv" / "bin").mkdir(parents=True)
+        (repo / ".venv" / "bin" / "python").symlink_to("/usr/bin/python3")
+        key = cache.key(repo, _script(repo))
+
+        assert await cache.publish(repo, key) > 0
+        for name in ("node_modules", ".venv"):
+            shutil.rmtree(repo / name)
+
+        assert await cache.restore(repo, key) is True
+        assert (repo / "node_modules" / "left-pad" / "index.js").read_text() == (
+            "module.exports = 1"
+        )
+        assert (repo / ".venv" / "bin" / "python").readlink() == Path("/usr/bin/python3")
+
+    async def test_gzip_without_zstd(self, cache, repo):
+        (repo / "node_modules").mkdir()
+        key = cache.key(repo, _script(repo))
+        with patch("src.sandbox.setup_cache.shutil.which", return_value=None):
+            await cache.publish(repo, key)
+            shutil.rmtree(repo / "node_modules")
+
+            assert [p.name for p in cache.root.rglob("*.tar.*")] == [f"{key}.tar.gz"]
+            assert await cache.restore(repo, key) is True
+        assert (repo / "node_modules").is_dir()
+
+    async def test_miss(self, cache, repo):
+        assert await cache.restore(repo, "0" * 32) is False
+
+    async def test_nothing_to_publish(self, cache, repo):
+        assert await cache.publish(repo, "0" * 32) is None
+        assert list(cache.root.rglob("*.tar.*")) == []
+
+    async def test_corrupt_archive_is_a_miss(self, cache, repo):
+        (repo / "node_modules").mkdir()
+        key = cache.key(repo, _script(repo))
+        await cache.publish(repo, key)
+        [archive] = cache.root.rglob("*.tar.*")
+        archive.write_bytes(b"not a tarball")
+
+        assert await cache.restore(repo, key) is False
+
+    async def test_restore_refuses_members_outside_the_checkout(self, cache, repo, tmp_path):
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / "payload").write_text("x")
+        key = "0" * 32
+        subprocess.run(
+            ["tar", "-c", "--gzip", "-P", "-f", str(cache.root / f"{key}.tar.gz"), str(outside)],
+            check=True,
+            capture_output=True,
+        )
+        shutil.rmtree(outside)
+
+        assert await cache.restore(repo, key) is False
+        assert not outside.exists()
+        assert not (repo / str(tmp_path).lstrip("/")).exists()
+
+    async def test_publish_keeps_newest_archives(self, cache, repo):
+        (repo / "node_modules").mkdir()
+        keys = [f"{n:032}" for n in range(SetupCache.KEEP_PER_REPO + 2)]
+        for n, key in enumerate(keys):
+            await cache.publish(repo, key)
+            [archive] = list(cache.root.rglob(f"{key}.tar.*"))
+            os.utime(archive, (n, n))
+
+        kept = sorted(p.name.split(".")[0] for p in cache.root.rglob("*.tar.*"))
+        assert kept == keys[-SetupCache.KEEP_PER_REPO :]
+        assert not [p for p in cache.root.rglob(".*") if p.is_file()]
+
+
+class TestSetupScriptCaching:
+    SCRIPT = (
+        "#!/bin/bash\n"
+        "mkdir -p node_modules/dep\n"
+        "echo built > node_modules/dep/out\n"
+        'echo run >> "$RUNS"\n'
+    )
+
+    def _setup(self, tmp_path, script: str = SCRIPT, cache_paths: bool = True):
+        runs = tmp_path / "runs"
+        cache = tmp_path / "setup-cache"
+        cache.mkdir(exist_ok=True)
+        sup = _make_supervisor(tmp_path)
+        _create_setup_script(sup.repo_path, script)
+        if cache_paths:
+            (sup.repo_path / ".openinspect" / "cache-paths").write_text("# defaults only\n")
+        return sup, runs, cache, {"SETUP_CACHE_DIR": str(cache), "RUNS": str(runs)}
+
+    async def test_sandbox_restores_what_the_builder_published(self, tmp_path):
+        builder, runs, _, env = self._setup(tmp_path)
+        with patch.dict(os.environ, env):
+            assert await builder.run_setup_script(publish=True) is True
+        assert runs.read_text() == "run\n"
+
+        shutil.rmtree(builder.repo_path / "node_modules")
+        session = _make_supervisor(tmp_path)
+        with patch.dict(os.environ, env), patch.object(session.log, "info") as log_info:
+            assert await session.run_setup_script() is True
+
+        assert runs.read_text() == "run\n"
+        assert (session.repo_path / "node_modules" / "dep" / "out").read_text() == "built\n"
+        assert log_info.call_args_list[0].args[0] == "setup.cache_hit"
+
+    async def test_session_sandbox_never_publishes(self, tmp_path):
+        session, runs, cache, env = self._setup(tmp_path)
+
+        with patch.dict(os.environ, env):
+            assert await session.run_setup_script() is True
+
+        assert runs.read_text() == "run\n"
+        assert list(cache.rglob("*.tar.*")) == []
+
+    async def test_builder_skips_script_when_cache_is_current(self, tmp_path):
+        builder, runs, _, env = self._setup(tmp_path)
+        with patch.dict(os.environ, env):
+            await builder.run_setup_script(publish=True)
+            assert await builder.run_setup_script(publish=True) is True
+
+        assert runs.read_text() == "run\n"
+
+    async def test_not_cached_without_cache_paths(self, tmp_path):
+        builder, runs, cache, env = self._setup(tmp_path, cache_paths=False)
+
+        with patch.dict(os.environ, env):
+            assert await builder.run_setup_script(publish=True) is True
+            shutil.rmtree(builder.repo_path / "node_modules")
+            assert await builder.run_setup_script() is True
+
+        assert runs.read_text() == "run\nrun\n"
+        assert list(cache.rglob("*.tar.*")) == []
+
+    async def test_failed_script_is_not_cached(self, tmp_path):
+        builder, _, cache, env = self._setup(tmp_path, "#!/bin/bash\nmkdir node_modules\nexit 1\n")
+
+        with patch.dict(os.environ, env):
+            assert await builder.run_setup_script(publish=True) is False
+
+        assert list(cache.rglob("*.tar.*")) == []
+
+    async def test_cache_dir_missing_runs_script(self, tmp_path):
+        sup = _make_supervisor(tmp_path)
+        _create_setup_script(sup.repo_path)
+
+        with patch.dict(os.environ, {"SETUP_CACHE_DIR": str(tmp_path / "missing")}):
+            assert sup._setup_cache_key(sup.repo_path / sup.SETUP_SCRIPT_PATH) is None
+            assert await sup.run_setup_script() is True
+
+
+class TestSandboxCacheMount:
+    @pytest.fixture
+    def cache_root(self, monkeypatch, tmp_path):
+        root = tmp_path / "data" / "setup-cache"
+        monkeypatch.setattr("src.sandbox.manager.SETUP_CACHE_ROOT", root)
+        monkeypatch.setattr("src.sandbox.manager.MIRROR_ROOT", tmp_path / "data" / "git-mirrors")
+        return root
+
+    @pytest.fixture
+    def data_volume(self, monkeypatch):
+        volume = MagicMock()
+        monkeypatch.setattr("src.sandbox.manager.inspect_volume", volume)
+        return volume
+
+    @pytest.fixture
+    def created(self, monkeypatch) -> dict:
+        captured = {}
+
+        def fake_create(*args, **kwargs):
+            captured.update(kwargs)
+            return MagicMock(object_id="obj-123", stdout=None)
+
+        monkeypatch.setattr("src.sandbox.manager.modal.Sandbox.create", fake_create)
+        return captured
+
+    async def test_session_mounts_its_repos_cache_read_only(self, cache_root, data_volume, created):
+        for owner, name in (("acme", "app"), ("other", "app")):
+            cache_dir(owner, name, cache_root).mkdir(parents=True)
+
+        await SandboxManager().create_sandbox(SandboxConfig(repo_owner="Acme", repo_name="App"))
+
+        data_volume.with_mount_options.assert_called_once_with(
+            read_only=True, sub_path="/setup-cache/acme/app"
+        )
+        assert created["volumes"] == {
+            SETUP_CACHE_MOUNT: data_volume.with_mount_options.return_value
+        }
+        assert created["env"]["SETUP_CACHE_DIR"] == SETUP_CACHE_MOUNT
+
+    async def test_no_mount_before_anything_was_published(self, cache_root, data_volume, created):
+        await SandboxManager().create_sandbox(SandboxConfig(repo_owner="acme", repo_name="app"))
+
+        assert created["volumes"] == {}
+        assert "SETUP_CACHE_DIR" not in created["env"]
+
+    async def test_builder_mounts_its_repos_cache_writable(self, cache_root, data_volume, created):
+        await SandboxManager().create_setup_cache_builder("Acme", "App", "tok", "develop")
+
+        assert cache_dir("acme", "app", cache_root).is_dir()
+        data_volume.with_mount_options.assert_called_once_with(
+            read_only=False, sub_path="/setup-cache/acme/app"
+        )
+        env = created["env"]
+        assert env["SETUP_CACHE_BUILD"] == "true"
+        assert env["SETUP_CACHE_DIR"] == SETUP_CACHE_MOUNT
+        assert json.loads(env["SESSION_CONFIG"]) == {"branch": "develop"}
+        # No agent runs in a builder, so it gets no control plane or LLM credentials
+        assert "CONTROL_PLANE_URL" not in env
+        assert "secrets" not in created
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / "upstream"
+    _create_setup_script(repo, "#!/bin/bash\nmkdir -p node_modules\n")
+    (repo / ".openinspect" / "cache-paths").write_text("")
+    (repo / "package-lock.json").write_text('{"lockfileVersion": 3}')
+    _git("init", "-q", "-b", "main", str(repo))
+    _git("add", ".", cwd=repo)
+    _commit(repo, "README.md")
+    return repo
+
+
+@pytest.fixture
+def mirror(upstream, tmp_path):
+    mirror = tmp_path / "mirror.git"
+    _git("clone", "-q", "--bare", str(upstream), str(mirror))
+    return mirror
+
+
+def _refresh(mirror):
+    _git("fetch", "-q", "origin", "+refs/heads/*:refs/heads/*", cwd=mirror)
+
+
+class TestInputsFingerprint:
+    def test_same_for_checkout_and_mirror(self, upstream, mirror):
+        assert inputs_fingerprint(upstream / ".git", "HEAD") == inputs_fingerprint(mirror, "main")
+
+    def test_changes_only_with_setup_inputs(self, upstream):
+        before = inputs_fingerprint(upstream / ".git", "HEAD")
+
+        _commit(upstream, "CHANGELOG.md")
+        assert inputs_fingerprint(upstream / ".git", "HEAD") == before
+
+        (upstream / "package-lock.json").write_text('{"lockfileVersion": 2}')
+        _commit(upstream, "package-lock.json")
+        assert inputs_fingerprint(upstream / ".git", "HEAD") != before
+
+    def test_none_when_git_fails(self, tmp_path):
+        assert inputs_fingerprint(tmp_path / "missing.git", "main") is None
+
+
+class TestScheduledBuilds:
+    @pytest.fixture
+    def cache_root(self, monkeypatch, tmp_path):
+        root = tmp_path / "setup-cache"
+        monkeypatch.setattr("src.scheduler.image_builder.SETUP_CACHE_ROOT", root)
+        return root
+
+    def test_not_built_without_opt_in(self, cache_root, upstream, mirror):
+        _git("rm", "-q", ".openinspect/cache-paths", cwd=upstream)
+        _commit(upstream, "README.md.bak")
+        _refresh(mirror)
+
+        assert _setup_cache_stale("acme", "app", mirror, "main") is False
+
+    def test_built_only_when_inputs_change(self, cache_root, upstream, mirror):
+        assert _setup_cache_stale("acme", "app", mirror, "main") is True
+
+        cache = SetupCache(cache_dir("acme", "app", cache_root), get_logger("test"))
+        cache.root.mkdir(parents=True)
+        cache.record_inputs(inputs_fingerprint(mirror, "main"))
+        _commit(upstream, "CHANGELOG.md")
+        _refresh(mirror)
+        assert _setup_cache_stale("acme", "app", mirror, "main") is False
+
+        (upstream / "package-lock.json").write_text('{"lockfileVersion": 2}')
+        _commit(upstream, "package-lock.json")
+        _refresh(mirror)
+        assert _setup_cache_stale("acme", "app", mirror, "main") is True
+
+    async def test_builder_records_the_inputs_it_built(self, tmp_path, upstream):
+        cache = tmp_path / "builder-cache"
+        cache.mkdir()
+        builder = _make_supervisor(tmp_path)
+        _git("clone", "-q", str(upstream), str(builder.repo_path))
+
+        with (
+            patch.dict(os.environ, {"SETUP_CACHE_DIR": str(cache)}),
+            patch.object(builder, "perform_git_sync", AsyncMock(return_value=True)),
+        ):
+            assert await builder.build_setup_cache() is True
+
+        recorded = SetupCache(cache, get_logger("test")).built_inputs()
+        assert recorded == inputs_fingerprint(builder.repo_path / ".git", "HEAD")
+        assert list(cache.glob("*.tar.*"))
+
+    async def test_failed_build_records_nothing(self, tmp_path, upstream):
+        cache = tmp_path / "builder-cache"
+        cache.mkdir()
+        builder = _make_supervisor(tmp_path)
+        _git("clone", "-q", str(upstream), str(builder.repo_path))
+        _create_setup_script(builder.repo_path, "#!/bin/bash\nexit 1\n")
+
+        with (
+            patch.dict(os.environ, {"SETUP_CACHE_DIR": str(cache)}),
+            patch.object(builder, "perform_git_sync", AsyncMock(return_value=True)),
+        ):
+            assert await builder.build_setup_cache() is False
+
+        assert SetupCache(cache, get_logger("test")).built_inputs() is None
@@ -20,6 +20,7 @@ def _make_supervisor(tmp_path) -> SandboxSupervisor:
     ):
         sup = SandboxSupervisor()
     sup.repo_path = tmp_path / "app"
+    sup.setup_pending_file = tmp_path / "sandbox-setup-pending"
     return sup
 
 
@@ -322,3 +323,63 @@ class TestSetupInRun:
             await sup.run()
 
         sup.run_setup_script.assert_not_called()
+
+    async def test_opencode_starts_while_setup_runs(self, tmp_path):
+        sup = _make_supervisor(tmp_path)
+        opencode_started = asyncio.Event()
+        marker_during_setup = []
+
+        async def slow_setup():
+            marker_during_setup.append(sup.setup_pending_file.exists())
+            await asyncio.wait_for(opencode_started.wait(), timeout=1.0)
+            return True
+
+        async def start_opencode():
+            opencode_started.set()
+
+        sup.perform_git_sync = AsyncMock(return_value=True)
+        sup.configure_git_identity = AsyncMock()
+        sup.run_setup_script = slow_setup
+        sup.start_opencode = start_opencode
+        sup.start_bridge = AsyncMock()
+        sup.monitor_processes = AsyncMock()
+
+        with (
+            patch.dict("os.environ", {"RESTORED_FROM_SNAPSHOT": "false"}, clear=False),
+            patch("asyncio.get_event_loop") as mock_loop,
+        ):
+            mock_loop.return_value.add_signal_handler = MagicMock()
+            await sup.run()
+
+        assert marker_during_setup == [True]
+        assert not sup.setup_pending_file.exists()
+        sup.start_bridge.assert_called_once()
+        sup.monitor_processes.assert_called_once()
+
+    async def test_processes_monitored_while_setup_runs(self, tmp_path):
+        sup = _make_supervisor(tmp_path)
+        monitoring = asyncio.Event()
+
+        async def slow_setup():
+            await asyncio.wait_for(monitoring.wait(), timeout=1.0)
+            return True
+
+        async def monitor_processes():
+            monitoring.set()
+
+        sup.perform_git_sync = AsyncMock(return_value=True)
+        sup.configure_git_identity = AsyncMock()
+        sup.run_setup_script = slow_setup
+        sup.start_opencode = AsyncMock()
+        sup.start_bridge = AsyncMock()
+        sup.monitor_processes = monitor_processes
+
+        with (
+            patch.dict("os.environ", {"RESTORED_FROM_SNAPSHOT": "false"}, clear=False),
+            patch("asyncio.get_event_loop") as mock_loop,
+        ):
+            mock_loop.return_value.add_signal_handler = MagicMock()
+            await sup.run()
+
+        assert monitoring.is_set()
+        assert sup._monitor_task.done()
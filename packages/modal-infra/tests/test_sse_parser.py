@@ -0,0 +1,77 @@
+"""Tests for the incremental SSE parser."""
+
+import pytest
+
+from src.sandbox.sse import SSEEvent, SSEParser
+
+
+def _feed_all(chunks: list[bytes]) -> list[SSEEvent]:
+    parser = SSEParser()
+    events: list[SSEEvent] = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+class TestLineEndings:
+    @pytest.mark.parametrize("eol", [b"\n", b"\r\n", b"\r"])
+    def test_all_line_endings(self, eol: bytes):
+        events = _feed_all([b"data: one" + eol + eol + b"data: two" + eol + eol])
+        assert [e.data for e in events] == ["one", "two"]
+
+    def test_crlf_split_across_chunks(self):
+        events = _feed_all([b"data: a\r", b"\n\r", b"\ndata: b\r\n\r\n"])
+        assert [e.data for e in events] == ["a", "b"]
+
+    def test_byte_at_a_time(self):
+        stream = b'data: {"x": 1}\n\nevent: custom\ndata: y\n\n'
+        events = _feed_all([stream[i : i + 1] for i in range(len(stream))])
+        assert [(e.event, e.data) for e in events] == [("message", '{"x": 1}'), ("custom", "y")]
+
+    def test_multibyte_utf8_split_across_chunks(self):
+        stream = "data: héllo 😀\n\n".encode()
+        events = _feed_all([stream[:8], stream[8:13], stream[13:]])
+        assert events[0].data == "héllo 😀"
+
+
+class TestFields:
+    def test_multiline_data_joined_with_newline(self):
+        events = _feed_all([b"data: first\ndata:second\n\n"])
+        assert events[0].data == "first\nsecond"
+
+    def test_only_one_leading_space_stripped(self):
+        events = _feed_all([b"data:  padded\n\n"])
+        assert events[0].data == " padded"
+
+    def test_comment_lines_ignored(self):
+        events = _feed_all([b": keepalive\n\n: another\ndata: x\n\n"])
+        assert [e.data for e in events] == ["x"]
+
+    def test_event_id_and_retry(self):
+        parser = SSEParser()
+        events = parser.feed(b"id: 42\nretry: 1500\nevent: update\ndata: x\n\n")
+        assert events == [SSEEvent(data="x", event="update", id="42", retry=1500)]
+        assert parser.last_event_id == "42"
+
+    def test_invalid_retry_ignored(self):
+        parser = SSEParser()
+        parser.feed(b"retry: soon\ndata: x\n\n")
+        assert parser.retry is None
+
+    def test_event_type_resets_after_dispatch(self):
+        events = _feed_all([b"event: custom\ndata: a\n\ndata: b\n\n"])
+        assert [e.event for e in events] == ["custom", "message"]
+
+    def test_blank_line_without_data_dispatches_nothing(self):
+        events = _feed_all([b"event: custom\n\n\n"])
+        assert events == []
+
+    def test_leading_bom_stripped(self):
+        events = _feed_all([b"\xef\xbb", b"\xbfdata: x\n\n"])
+        assert events[0].data == "x"
+
+    def test_incomplete_event_held_until_terminated(self):
+        parser = SSEParser()
+        assert parser.feed(b"data: partial") == []
+        assert parser.feed(b" line\n") == []
+        assert parser.feed(b"\n")[0].data == "partial line"
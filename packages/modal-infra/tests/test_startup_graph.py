@@ -0,0 +1,91 @@
+"""Tests for the dependency-graph startup pipeline."""
+
+import asyncio
+
+import pytest
+
+from src.sandbox.startup import StartupGraph
+
+
+def _phase(log: list[str], name: str, delay: float = 0.0, result: object = None):
+    async def run():
+        log.append(f"{name}:start")
+        await asyncio.sleep(delay)
+        log.append(f"{name}:end")
+        return result
+
+    return run
+
+
+class TestStartupGraph:
+    async def test_independent_phases_overlap(self):
+        log: list[str] = []
+        graph = StartupGraph()
+        graph.add("a", _phase(log, "a", 0.02))
+        graph.add("b", _phase(log, "b", 0.02))
+
+        await graph.run()
+
+        assert log[:2] == ["a:start", "b:start"]
+
+    async def test_phase_waits_for_dependencies(self):
+        log: list[str] = []
+        graph = StartupGraph()
+        graph.add("clone", _phase(log, "clone", 0.02))
+        graph.add("auth", _phase(log, "auth"))
+        graph.add("opencode", _phase(log, "opencode"), after=("clone", "auth"))
+
+        await graph.run()
+
+        assert log.index("opencode:start") > log.index("clone:end")
+        assert log.index("opencode:start") > log.index("auth:end")
+
+    async def test_results_and_timings_by_phase(self):
+        graph = StartupGraph()
+        graph.add("git_sync", _phase([], "git_sync", result=True))
+        graph.add("setup", _phase([], "setup", 0.01, result=False), after=("git_sync",))
+
+        results = await graph.run()
+
+        assert results == {"git_sync": True, "setup": False}
+        assert graph.timings["setup"].start_ms >= graph.timings["git_sync"].end_ms
+        assert graph.timings["setup"].duration_ms >= 0
+
+    async def test_critical_path_follows_latest_dependency(self):
+        graph = StartupGraph()
+        graph.add("git_sync", _phase([], "git_sync", 0.02))
+        graph.add("auth", _phase([], "auth"))
+        graph.add("setup", _phase([], "setup", 0.01), after=("git_sync",))
+        graph.add("opencode", _phase([], "opencode", 0.05), after=("git_sync", "auth"))
+        graph.add("bridge", _phase([], "bridge"), after=("opencode",))
+
+        await graph.run()
+
+        assert graph.critical_path() == ["git_sync", "opencode", "bridge"]
+
+    async def test_failure_cancels_running_phases(self):
+        log: list[str] = []
+
+        async def fail():
+            raise RuntimeError("OpenCode server failed to become healthy")
+
+        graph = StartupGraph()
+        graph.add("setup", _phase(log, "setup", 10.0))
+        graph.add("opencode", fail)
+        graph.add("bridge", _phase(log, "bridge"), after=("opencode",))
+
+        with pytest.raises(RuntimeError, match="healthy"):
+            await asyncio.wait_for(graph.run(), timeout=1.0)
+
+        assert log == ["setup:start"]
+
+    def test_unknown_dependency_is_rejected(self):
+        graph = StartupGraph()
+        with pytest.raises(ValueError, match="unknown phase"):
+            graph.add("bridge", _phase([], "bridge"), after=("opencode",))
+
+    def test_duplicate_phase_is_rejected(self):
+        graph = StartupGraph()
+        graph.add("a", _phase([], "a"))
+        with pytest.raises(ValueError, match="Duplicate"):
+            graph.add("a", _phase([], "a"))
@@ -0,0 +1,93 @@
+"""Tests for negotiated binary/compressed WebSocket frames."""
+
+import pytest
+
+from src.sandbox import transport
+from src.sandbox.bridge import AgentBridge
+from src.sandbox.transport import FLAG_DEFLATE, FLAG_MSGPACK, FrameEncoder, decode_frame
+from tests.test_bridge_send_queue import FakeWebSocket, running_writer
+
+requires_msgpack = pytest.mark.skipif(not transport.MSGPACK_AVAILABLE, reason="msgpack missing")
+
+SMALL = {"type": "token", "content": "Hi", "messageId": "m1"}
+LARGE = {"type": "tool_call", "status": "completed", "output": "line of output\n" * 500}
+
+
+@pytest.fixture
+def bridge() -> AgentBridge:
+    bridge = AgentBridge(
+        sandbox_id="test-sandbox",
+        session_id="test-session",
+        control_plane_url="http://localhost:8787",
+        auth_token="test-token",
+    )
+    bridge.ws = FakeWebSocket()
+    bridge.send_coalesce_window = 0.0
+    return bridge
+
+
+class TestFrameEncoder:
+    def test_default_is_json_text(self):
+        assert FrameEncoder().encode(SMALL) == '{"type":"token","content":"Hi","messageId":"m1"}'
+
+    def test_deflate_only_above_threshold(self):
+        encoder = FrameEncoder(deflate=True, compress_threshold=256)
+
+        small = encoder.encode(SMALL)
+        large = encoder.encode(LARGE)
+
+        assert isinstance(small, str)
+        assert isinstance(large, bytes)
+        assert large[0] == FLAG_DEFLATE
+        assert len(large) < len(LARGE["output"]) / 10
+        assert decode_frame(large) == LARGE
+
+    @requires_msgpack
+    def test_msgpack_frames_are_always_binary(self):
+        encoder = FrameEncoder(use_msgpack=True)
+
+        frame = encoder.encode(SMALL)
+
+        assert frame[0] == FLAG_MSGPACK
+        assert decode_frame(frame) == SMALL
+
+    @requires_msgpack
+    def test_msgpack_with_deflate_round_trips_batches(self):
+        encoder = FrameEncoder(deflate=True, use_msgpack=True, compress_threshold=256)
+
+        frame = encoder.encode([SMALL, LARGE])
+
+        assert frame[0] == FLAG_MSGPACK | FLAG_DEFLATE
+        assert decode_frame(frame) == [SMALL, LARGE]
+
+
+class TestNegotiation:
+    async def test_transport_deflate_suppresses_frame_deflate(self, bridge: AgentBridge):
+        assert "frame_deflate" in bridge._available_capabilities(transport_deflate=False)
+        assert "frame_deflate" not in bridge._available_capabilities(transport_deflate=True)
+
+    async def test_unacked_capabilities_keep_text_frames(self, bridge: AgentBridge):
+        async with running_writer(bridge):
+            await bridge._send_event(dict(LARGE))
+
+        assert isinstance(bridge.ws.frames[0], str)
+
+    async def test_ready_ack_switches_large_frames_to_deflate(self, bridge: AgentBridge):
+        await bridge._handle_command({"type": "ready_ack", "capabilities": ["frame_deflate"]})
+
+        async with running_writer(bridge):
+            await bridge._send_event(dict(SMALL))
+            await bridge._send_event(dict(LARGE))
+
+        small, large = bridge.ws.frames
+        assert isinstance(small, str)
+        assert large[0] == FLAG_DEFLATE
+        assert decode_frame(large)["output"] == LARGE["output"]
+
+    async def test_unadvertised_capability_ignored(self, bridge: AgentBridge):
+        bridge.advertised_capabilities = bridge._available_capabilities(transport_deflate=True)
+
+        await bridge._handle_command({"type": "ready_ack", "capabilities": ["frame_deflate"]})
+
+        assert bridge.capabilities == set()
+        assert not bridge._frame_encoder.binary